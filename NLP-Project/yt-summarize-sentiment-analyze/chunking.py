@@ -0,0 +1,135 @@
+"""
+Chunking utilities for YouTube NLP Analyzer.
+Splits long transcripts on a token budget and runs map-reduce summarization.
+"""
+
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from typing import Callable, List
+
+# Rough English average; good enough for budgeting without a tokenizer
+TOKENS_PER_WORD: float = 1.3
+
+REDUCE_STRATEGIES = ('single', 'tree')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in a piece of text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+def split_into_chunks(text: str, chunk_tokens: int = 3000, overlap_tokens: int = 150) -> List[str]:
+    """
+    Split text into overlapping word windows that fit a token budget.
+
+    Args:
+        text: Text to split
+        chunk_tokens: Token budget per chunk
+        overlap_tokens: Tokens repeated between neighbouring chunks
+
+    Returns:
+        List of chunk strings in original order
+    """
+    words = text.split()
+    chunk_words = max(1, int(chunk_tokens / TOKENS_PER_WORD))
+    overlap_words = min(int(overlap_tokens / TOKENS_PER_WORD), chunk_words // 2)
+    step = chunk_words - overlap_words
+
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(' '.join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def map_reduce(chunks: List[str],
+               map_fn: Callable[[str, int, int], str],
+               reduce_fn: Callable[[str, bool], str],
+               max_workers: int = 4,
+               reduce_strategy: str = 'single',
+               reduce_fan_in: int = 8) -> str:
+    """
+    Summarize chunks concurrently and combine the partial summaries.
+
+    Args:
+        chunks: Transcript chunks in order
+        map_fn: (chunk, index, total) -> partial summary
+        reduce_fn: (joined partial summaries, is_final) -> combined summary
+        max_workers: Number of chunks summarized concurrently
+        reduce_strategy: 'single' combines everything in one pass,
+            'tree' combines groups of reduce_fan_in until one remains
+        reduce_fan_in: Group size for the 'tree' strategy
+
+    Returns:
+        Final summary text
+
+    Raises:
+        ValueError: If reduce_strategy is unknown
+        Exception: The first error raised by map_fn or reduce_fn; chunks that
+            had not started yet are cancelled and never sent to the model
+    """
+    if reduce_strategy not in REDUCE_STRATEGIES:
+        raise ValueError(f"Unknown reduce strategy '{reduce_strategy}'. Use one of: {', '.join(REDUCE_STRATEGIES)}")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        partials = _run_all(executor, map_fn, chunks, range(len(chunks)), [len(chunks)] * len(chunks))
+
+        if reduce_strategy == 'tree':
+            while len(partials) > reduce_fan_in:
+                groups = [partials[i:i + reduce_fan_in] for i in range(0, len(partials), reduce_fan_in)]
+                partials = _run_all(executor, reduce_fn, [join_partials(g) for g in groups], [False] * len(groups))
+    finally:
+        # Don't wait for calls already running when a chunk failed
+        executor.shutdown(wait=False)
+
+    return reduce_fn(join_partials(partials), True)
+
+
+def _run_all(executor: ThreadPoolExecutor, fn: Callable, *iterables) -> List:
+    """
+    Run fn over the argument lists on the executor, like executor.map.
+
+    Unlike executor.map, the first exception is raised as soon as it happens,
+    after cancelling every call that has not started yet. A worker that
+    picks up a call after the failure (before it is cancelled) skips it.
+
+    Returns:
+        Results in argument order
+    """
+    errors = []
+
+    def call(*args):
+        if errors:
+            raise CancelledError()
+        try:
+            return fn(*args)
+        except BaseException as e:
+            errors.append(e)
+            raise
+
+    futures = [executor.submit(call, *args) for args in zip(*iterables)]
+    try:
+        for future in as_completed(futures):
+            future.result()
+    except BaseException:
+        # Same as shutdown(cancel_futures=True), which needs Python 3.9
+        for future in futures:
+            future.cancel()
+        if errors:
+            raise errors[0]
+        raise
+    return [future.result() for future in futures]
+
+
+def join_partials(partials: List[str]) -> str:
+    """Label and join partial summaries for a reduce prompt."""
+    return '\n\n'.join(f"Part {i + 1}:\n{summary.strip()}" for i, summary in enumerate(partials))
@@ -0,0 +1,137 @@
+"""
+Shared OpenAI client registry for YouTube NLP Analyzer.
+Keeps one OpenAI client per API key on a keep-alive connection pool and
+tracks health and latency per model.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+from openai import OpenAI
+
+from config import Config
+
+# Latencies kept per model for percentile stats
+LATENCY_WINDOW: int = 200
+
+
+class ModelStats:
+    """Call counts, recent latencies and last error for one model."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.calls = 0
+        self.errors = 0
+        self.latencies: deque = deque(maxlen=window)
+        self.last_error: Optional[str] = None
+
+    def record(self, latency: float, error: Optional[Exception] = None) -> None:
+        self.calls += 1
+        self.latencies.append(latency)
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'latency_avg': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'latency_p50': percentile(0.5),
+            'latency_p95': percentile(0.95),
+            'last_error': self.last_error,
+        }
+
+
+class ClientRegistry:
+    """Process-wide pool of OpenAI clients with per-model stats."""
+
+    def __init__(self, max_connections: int = 20, keepalive_connections: int = 10,
+                 timeout: float = 60.0):
+        """
+        Args:
+            max_connections: Connection cap shared by all clients
+            keepalive_connections: Idle connections kept open for reuse
+            timeout: Request timeout in seconds
+        """
+        self.max_connections = max_connections
+        self.keepalive_connections = keepalive_connections
+        self.timeout = timeout
+        self._http_client: Optional[httpx.Client] = None
+        self._clients: Dict[str, OpenAI] = {}
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _shared_http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.keepalive_connections),
+                timeout=self.timeout,
+            )
+        return self._http_client
+
+    def get_client(self, api_key: str) -> OpenAI:
+        """
+        Borrow the OpenAI client for an API key, creating it on first use.
+
+        Args:
+            api_key: OpenAI API key
+
+        Returns:
+            OpenAI client backed by the shared keep-alive connection pool
+        """
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = OpenAI(api_key=api_key, http_client=self._shared_http_client())
+                self._clients[api_key] = client
+            return client
+
+    @contextmanager
+    def track(self, model: str) -> Iterator[None]:
+        """
+        Time one API call and record it against the model.
+
+        Args:
+            model: Model name the call was made with
+        """
+        start_time = time.time()
+        try:
+            yield
+        except Exception as e:
+            self._record(model, time.time() - start_time, e)
+            raise
+        self._record(model, time.time() - start_time)
+
+    def _record(self, model: str, latency: float, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self._stats.setdefault(model, ModelStats()).record(latency, error)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Health and latency stats per model.
+
+        Returns:
+            Dictionary of model name to stats
+        """
+        with self._lock:
+            return {model: stats.to_dict() for model, stats in sorted(self._stats.items())}
+
+
+# Shared by every analyzer instance in the process
+client_registry = ClientRegistry(
+    max_connections=Config.HTTP_MAX_CONNECTIONS,
+    keepalive_connections=Config.HTTP_KEEPALIVE_CONNECTIONS,
+    timeout=Config.REQUEST_TIMEOUT,
+)
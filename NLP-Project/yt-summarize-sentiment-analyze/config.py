@@ -18,6 +18,11 @@ class Config:
     OPENAI_API_KEY: Optional[str] = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL: str = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
     
+    # Shared OpenAI connection pool (clients.py)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv('HTTP_MAX_CONNECTIONS', '20'))
+    HTTP_KEEPALIVE_CONNECTIONS: int = int(os.getenv('HTTP_KEEPALIVE_CONNECTIONS', '10'))
+    REQUEST_TIMEOUT: float = float(os.getenv('REQUEST_TIMEOUT', '60'))
+    
     # Default temperature settings
     DEFAULT_TEMPERATURE: float = float(os.getenv('DEFAULT_TEMPERATURE', '0.7'))
     MIN_TEMPERATURE: float = 0.0
@@ -27,6 +32,12 @@ class Config:
     DEFAULT_MAX_TOKENS: int = int(os.getenv('DEFAULT_MAX_TOKENS', '500'))
     MAX_INPUT_CHARS: int = 12000  # Roughly 3000 tokens for GPT-3.5
     
+    # Chunked (map-reduce) summarization settings for long transcripts
+    CHUNK_TOKENS: int = int(os.getenv('CHUNK_TOKENS', '3000'))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv('CHUNK_OVERLAP_TOKENS', '150'))
+    CHUNK_CONCURRENCY: int = int(os.getenv('CHUNK_CONCURRENCY', '4'))
+    REDUCE_STRATEGY: str = os.getenv('REDUCE_STRATEGY', 'single')  # 'single' or 'tree'
+    
     # Transcript settings
     DEFAULT_LANGUAGE: str = os.getenv('DEFAULT_LANGUAGE', 'en')
     
@@ -57,6 +68,11 @@ class Config:
         print(f"  Default Temperature: {cls.DEFAULT_TEMPERATURE}")
         print(f"  Default Max Tokens: {cls.DEFAULT_MAX_TOKENS}")
         print(f"  Default Language: {cls.DEFAULT_LANGUAGE}")
+        print(f"  Chunk Tokens: {cls.CHUNK_TOKENS} (overlap {cls.CHUNK_OVERLAP_TOKENS})")
+        print(f"  Chunk Concurrency: {cls.CHUNK_CONCURRENCY}")
+        print(f"  Reduce Strategy: {cls.REDUCE_STRATEGY}")
+        print(f"  HTTP Pool: {cls.HTTP_MAX_CONNECTIONS} connections ({cls.HTTP_KEEPALIVE_CONNECTIONS} kept alive)")
+        print(f"  Request Timeout: {cls.REQUEST_TIMEOUT}s")
         print(f"  API Key Set: {'Yes' if cls.OPENAI_API_KEY else 'No'}")
 
 
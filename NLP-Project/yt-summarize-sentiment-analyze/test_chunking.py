@@ -0,0 +1,75 @@
+"""
+Tests for chunking: chunk splitting and map-reduce failure handling.
+
+Run with: python -m pytest test_chunking.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from chunking import map_reduce, split_into_chunks
+
+TEXT = ' '.join(f'word{i}' for i in range(1000))
+
+
+def test_chunks_cover_the_text_in_order():
+    chunks = split_into_chunks(TEXT, chunk_tokens=130, overlap_tokens=13)
+    assert len(chunks) == 11
+    assert chunks[0].split()[0] == 'word0'
+    assert chunks[-1].split()[-1] == 'word999'
+    # Neighbouring chunks share the overlap
+    assert chunks[0].split()[-10:] == chunks[1].split()[:10]
+
+
+@pytest.mark.parametrize('reduce_strategy', ['single', 'tree'])
+def test_partials_are_reduced_in_chunk_order(reduce_strategy):
+    chunks = [f'chunk {i}' for i in range(20)]
+    reduced = []
+
+    def map_fn(chunk: str, index: int, total: int) -> str:
+        time.sleep(0.001 * (total - index))  # later chunks finish first
+        return f'summary {index}/{total}'
+
+    def reduce_fn(partials: str, is_final: bool) -> str:
+        reduced.append(is_final)
+        return partials
+
+    summary = map_reduce(chunks, map_fn, reduce_fn, max_workers=4,
+                         reduce_strategy=reduce_strategy, reduce_fan_in=8)
+    assert [line for line in summary.split('\n') if line.startswith('summary')] == \
+        [f'summary {i}/20' for i in range(20)]
+    assert reduced[-1] is True
+    assert reduced.count(False) == (3 if reduce_strategy == 'tree' else 0)
+
+
+def test_failed_chunk_stops_the_remaining_chunks():
+    called = []
+    running = threading.Event()
+    release = threading.Event()
+
+    def map_fn(chunk: str, index: int, total: int) -> str:
+        called.append(index)
+        if index == 0:
+            running.wait(2)  # chunk 1 is still running when chunk 0 fails
+            raise RuntimeError('quota exceeded')
+        running.set()
+        release.wait(2)
+        return chunk
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match='quota exceeded'):
+        map_reduce([f'chunk {i}' for i in range(10)], map_fn, lambda partials, is_final: partials, max_workers=2)
+    elapsed = time.monotonic() - started
+    release.set()
+    time.sleep(0.1)
+
+    # Only the chunks already running were called, and the error did not wait for them
+    assert sorted(called) == [0, 1]
+    assert elapsed < 1
+
+
+def test_unknown_reduce_strategy():
+    with pytest.raises(ValueError):
+        map_reduce(['a'], lambda c, i, t: c, lambda p, f: p, reduce_strategy='pairs')
@@ -12,7 +12,9 @@ from typing import Optional, Dict, Any
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 import re
-from openai import OpenAI
+from config import Config
+from clients import client_registry
+from chunking import estimate_tokens, split_into_chunks, map_reduce
 
 
 class YouTubeNLPAnalyzer:
@@ -32,7 +34,8 @@ class YouTubeNLPAnalyzer:
             print("You can still get transcripts, but summarization will not work.")
         
         self.model = model
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        # Borrowed from the shared registry so every instance reuses one connection pool
+        self.client = client_registry.get_client(self.api_key) if self.api_key else None
     
     @staticmethod
     def extract_video_id(url: str) -> str:
@@ -95,14 +98,23 @@ class YouTubeNLPAnalyzer:
         except Exception as e:
             raise Exception(f"Error fetching transcript: {str(e)}")
     
-    def summarize(self, text: str, temperature: float = 0.7, max_tokens: int = 500) -> str:
+    def summarize(self, text: str, temperature: float = 0.7, max_tokens: int = 500,
+                  chunk_tokens: Optional[int] = None, concurrency: Optional[int] = None,
+                  reduce_strategy: Optional[str] = None) -> str:
         """
         Summarize text using OpenAI's GPT model.
         
+        Transcripts longer than one chunk are split on a token budget with
+        overlap, the chunks are summarized concurrently, and the partial
+        summaries are combined in a reduce pass.
+        
         Args:
             text: Text to summarize
             temperature: Controls randomness (0.0-2.0). Lower is more focused, higher is more creative.
             max_tokens: Maximum length of the summary
+            chunk_tokens: Token budget per chunk (default: Config.CHUNK_TOKENS)
+            concurrency: Number of chunks summarized at once (default: Config.CHUNK_CONCURRENCY)
+            reduce_strategy: 'single' or 'tree' (default: Config.REDUCE_STRATEGY)
             
         Returns:
             Summary text
@@ -113,31 +125,70 @@ class YouTubeNLPAnalyzer:
         if not self.client:
             raise Exception("OpenAI API key not configured. Cannot perform summarization.")
         
+        chunk_tokens = chunk_tokens or Config.CHUNK_TOKENS
+        concurrency = concurrency or Config.CHUNK_CONCURRENCY
+        reduce_strategy = reduce_strategy or Config.REDUCE_STRATEGY
+        
         try:
             print(f"Generating summary with temperature={temperature}...")
             
-            # Truncate text if too long (GPT-3.5-turbo has ~4096 token limit)
-            max_input_chars = 12000  # Roughly 3000 tokens
-            if len(text) > max_input_chars:
-                print(f"Warning: Text truncated from {len(text)} to {max_input_chars} characters")
-                text = text[:max_input_chars] + "..."
+            if estimate_tokens(text) <= chunk_tokens:
+                summary = self._complete_summary(
+                    f"Please provide a comprehensive summary of the following video transcript:\n\n{text}",
+                    temperature, max_tokens
+                )
+            else:
+                chunks = split_into_chunks(text, chunk_tokens, Config.CHUNK_OVERLAP_TOKENS)
+                print(f"Long transcript: summarizing {len(chunks)} chunks (concurrency={concurrency}, reduce={reduce_strategy})")
+                
+                def summarize_chunk(chunk: str, index: int, total: int) -> str:
+                    return self._complete_summary(
+                        f"Summarize part {index + 1} of {total} of a video transcript. Keep every main point "
+                        f"and important detail so the parts can be combined later:\n\n{chunk}",
+                        temperature, max_tokens
+                    )
+                
+                def combine_partials(partials: str, is_final: bool) -> str:
+                    if is_final:
+                        prompt = ("Please provide a comprehensive summary of a video transcript, given below as "
+                                  f"summaries of its consecutive parts:\n\n{partials}")
+                    else:
+                        prompt = ("Combine the following summaries of consecutive parts of a video transcript "
+                                  f"into one summary that keeps all main points:\n\n{partials}")
+                    return self._complete_summary(prompt, temperature, max_tokens)
+                
+                summary = map_reduce(chunks, summarize_chunk, combine_partials,
+                                     max_workers=concurrency, reduce_strategy=reduce_strategy)
             
+            print("✓ Summary generated successfully")
+            return summary
+            
+        except Exception as e:
+            raise Exception(f"Error during summarization: {str(e)}")
+    
+    def _complete_summary(self, user_prompt: str, temperature: float, max_tokens: int) -> str:
+        """
+        Run one summarization chat completion.
+        
+        Args:
+            user_prompt: Prompt containing the text to summarize
+            temperature: Sampling temperature
+            max_tokens: Maximum length of the completion
+            
+        Returns:
+            Completion text
+        """
+        with client_registry.track(self.model):
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that creates concise, informative summaries of video transcripts. Focus on the main points, key takeaways, and important details."},
-                    {"role": "user", "content": f"Please provide a comprehensive summary of the following video transcript:\n\n{text}"}
+                    {"role": "user", "content": user_prompt}
                 ],
                 temperature=temperature,
                 max_tokens=max_tokens
             )
-            
-            summary = response.choices[0].message.content.strip()
-            print("✓ Summary generated successfully")
-            return summary
-            
-        except Exception as e:
-            raise Exception(f"Error during summarization: {str(e)}")
+        return response.choices[0].message.content.strip()
     
     def analyze_sentiment(self, text: str, temperature: float = 0.3) -> Dict[str, Any]:
         """
@@ -164,15 +215,16 @@ class YouTubeNLPAnalyzer:
             if len(text) > max_input_chars:
                 text = text[:max_input_chars] + "..."
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a sentiment analysis expert. Analyze the overall sentiment of the text and provide a classification (positive, negative, or neutral) along with a confidence score (0-100) and brief reasoning."},
-                    {"role": "user", "content": f"Analyze the sentiment of this video transcript and respond in the following format:\nSentiment: [positive/negative/neutral]\nConfidence: [0-100]\nReasoning: [brief explanation]\n\nTranscript:\n{text}"}
-                ],
-                temperature=temperature,
-                max_tokens=200
-            )
+            with client_registry.track(self.model):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a sentiment analysis expert. Analyze the overall sentiment of the text and provide a classification (positive, negative, or neutral) along with a confidence score (0-100) and brief reasoning."},
+                        {"role": "user", "content": f"Analyze the sentiment of this video transcript and respond in the following format:\nSentiment: [positive/negative/neutral]\nConfidence: [0-100]\nReasoning: [brief explanation]\n\nTranscript:\n{text}"}
+                    ],
+                    temperature=temperature,
+                    max_tokens=200
+                )
             
             analysis = response.choices[0].message.content.strip()
             print("✓ Sentiment analysis completed")
@@ -196,7 +248,8 @@ class YouTubeNLPAnalyzer:
             raise Exception(f"Error during sentiment analysis: {str(e)}")
     
     def full_analysis(self, video_url: str, temperature: float = 0.7, 
-                     include_sentiment: bool = True) -> Dict[str, Any]:
+                     include_sentiment: bool = True, chunk_tokens: Optional[int] = None,
+                     concurrency: Optional[int] = None, reduce_strategy: Optional[str] = None) -> Dict[str, Any]:
         """
         Perform complete analysis: transcript extraction, summarization, and sentiment analysis.
         
@@ -204,6 +257,9 @@ class YouTubeNLPAnalyzer:
             video_url: YouTube video URL
             temperature: Temperature for text generation
             include_sentiment: Whether to include sentiment analysis
+            chunk_tokens: Token budget per chunk for long transcripts
+            concurrency: Number of chunks summarized concurrently
+            reduce_strategy: How partial summaries are combined ('single' or 'tree')
             
         Returns:
             Dictionary containing all analysis results
@@ -222,7 +278,8 @@ class YouTubeNLPAnalyzer:
         print("\n" + "="*60)
         print("STEP 2: Generating Summary")
         print("="*60)
-        summary = self.summarize(transcript, temperature=temperature)
+        summary = self.summarize(transcript, temperature=temperature, chunk_tokens=chunk_tokens,
+                                 concurrency=concurrency, reduce_strategy=reduce_strategy)
         results['summary'] = summary
         
         # Sentiment analysis
@@ -270,6 +327,14 @@ Examples:
                        help='Include sentiment analysis')
     parser.add_argument('-l', '--language', default='en',
                        help='Transcript language code. Default: en')
+    parser.add_argument('--chunk-tokens', type=int, default=Config.CHUNK_TOKENS,
+                       help=f'Token budget per chunk for long transcripts. Default: {Config.CHUNK_TOKENS}')
+    parser.add_argument('--chunk-concurrency', type=int, default=Config.CHUNK_CONCURRENCY,
+                       help=f'Chunks summarized concurrently. Default: {Config.CHUNK_CONCURRENCY}')
+    parser.add_argument('--stats', action='store_true',
+                       help='Print per-model API call count and latency stats at the end')
+    parser.add_argument('--reduce-strategy', choices=['single', 'tree'], default=Config.REDUCE_STRATEGY,
+                       help=f'How partial summaries are combined. Default: {Config.REDUCE_STRATEGY}')
     
     args = parser.parse_args()
     
@@ -297,7 +362,10 @@ Examples:
             results = analyzer.full_analysis(
                 args.url, 
                 temperature=args.temperature,
-                include_sentiment=args.sentiment
+                include_sentiment=args.sentiment,
+                chunk_tokens=args.chunk_tokens,
+                concurrency=args.chunk_concurrency,
+                reduce_strategy=args.reduce_strategy
             )
             
             # Display results
@@ -329,6 +397,13 @@ Examples:
             print("\n" + "="*60)
             print(f"Analysis completed with temperature={args.temperature}")
             print("="*60)
+            
+            if args.stats:
+                print("\n⏱️  API STATS:")
+                print("-" * 60)
+                for model, stats in client_registry.stats().items():
+                    print(f"{model}: {stats['calls']} calls, {stats['errors']} errors, "
+                          f"avg {stats['latency_avg']}s, p95 {stats['latency_p95']}s")
     
     except Exception as e:
         print(f"\n❌ Error: {str(e)}", file=sys.stderr)
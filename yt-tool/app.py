@@ -1,24 +1,43 @@
-from flask import Flask, render_template, request, jsonify
+import time
+
+# Startup timing report: measured from the first import
+STARTUP_STARTED = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, Response, g
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
 from youtube_transcript_api.formatters import TextFormatter
-import google.generativeai as genai
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from textblob import TextBlob
 from dotenv import load_dotenv
 import os
 import re
-import time
-import yt_dlp
 import json
-import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from rouge_score import rouge_scorer
-import pandas as pd
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support, confusion_matrix
+import queue
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from transcript_cache import TranscriptCache
+from summary_cache import SummaryCache, make_summary_key
+from chunked_summary import map_reduce_summarize, estimate_tokens
+from sentiment_engine import score_polarities, classify_polarities, SentimentAccumulator
+from text_preprocessing import default_preprocessor
+from metrics_snapshot import MetricsSnapshotStore, dataset_available
+from llm_clients import GeminiClientRegistry
+from jobs import JobQueue
+from comment_fetcher import CommentFetcher, CommentFetchError
+from comment_store import CommentSentimentStore
+from rate_limit import HostRateLimiter, LLMRateController, RateLimitError, parse_rate_limits, YOUTUBE_HOST, GEMINI_HOST
+from batch import resolve_playlist, run_batch, ndjson
+from rouge_eval import RougeEvaluator
+from subtitle_fetcher import SubtitleFetcher
+from response_shaping import parse_fields, select_fields, compress_response
+import telemetry
+from telemetry import span, traced
+import lazy_imports
+from lazy_imports import load
+
+# Heavy dependencies (google.generativeai, yt-dlp, NLTK, TextBlob,
+# pandas, googleapiclient) are imported on first use through load()
+STARTUP_IMPORTS_DONE = time.perf_counter()
 
 # Load environment variables
 load_dotenv()
@@ -29,17 +48,140 @@ app = Flask(__name__)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 
+# Offline mode: local stand-ins for Gemini, youtube-transcript-api, yt-dlp and the Data API (see mock_backends.py)
+MOCK_BACKENDS = os.getenv('MOCK_BACKENDS', 'false').lower() in ('1', 'true', 'yes')
+mock_profiles = None
+if MOCK_BACKENDS:
+    import mock_backends
+    mock_profiles = mock_backends.install()
+    YouTubeTranscriptApi = mock_backends.MockTranscriptApi
+    GEMINI_API_KEY = GEMINI_API_KEY or 'mock'
+    YOUTUBE_API_KEY = YOUTUBE_API_KEY or 'mock'
+    print("Running with mock backends (MOCK_BACKENDS=true): no calls leave this machine")
+
+# Default cache and store locations; mock runs get their own so mock summaries,
+# transcripts and comments never end up in the real caches
+CACHE_ROOT = os.path.join('.cache', 'mock') if MOCK_BACKENDS else '.cache'
+
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables. Please create a .env file with your API key.")
 
-genai.configure(api_key=GEMINI_API_KEY)
+lazy_imports.on_load('google.generativeai', lambda genai: genai.configure(api_key=GEMINI_API_KEY))
+
+# Persistent transcript cache (video ID + language -> transcript text)
+transcript_cache = TranscriptCache(
+    cache_dir=os.getenv('TRANSCRIPT_CACHE_DIR', os.path.join(CACHE_ROOT, 'transcripts')),
+    ttl_seconds=int(os.getenv('TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600)),
+    max_bytes=int(float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', 200)) * 1024 * 1024)
+)
+
+# Summary result cache (in-process LRU + SQLite on disk)
+summary_cache = SummaryCache(
+    db_path=os.getenv('SUMMARY_CACHE_PATH', os.path.join(CACHE_ROOT, 'summaries.sqlite3')),
+    memory_entries=int(os.getenv('SUMMARY_CACHE_MEMORY_ENTRIES', 256)),
+    disk_entries=int(os.getenv('SUMMARY_CACHE_DISK_ENTRIES', 5000)),
+    deterministic_only=os.getenv('SUMMARY_CACHE_DETERMINISTIC_ONLY', 'false').lower() in ('1', 'true', 'yes')
+)
+
+# Per-host request pacing shared by every request thread ("host=rate_per_second[:burst],...")
+host_limiter = HostRateLimiter(parse_rate_limits(
+    os.getenv('HOST_RATE_LIMITS', f'{YOUTUBE_HOST}=2:5,www.googleapis.com=10:20')
+))
+
+# Response compression (br when the brotli package is installed, otherwise gzip) for bodies above a size
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+
+# How /process responses carry the transcript: inline, left out, or as a /transcripts/<id> link
+TRANSCRIPT_MODES = ('full', 'omit', 'ref')
 
+# yt-dlp subtitle fallback: pooled YoutubeDL instances, cached subtitle tracks, pooled downloads.
+# YTDLP_FIXTURE_DIR serves videos from local fixtures instead of YouTube (offline testing)
+subtitle_fetcher = SubtitleFetcher(
+    rate_limiter=host_limiter,
+    info_cache_ttl=int(os.getenv('SUBTITLE_INFO_CACHE_TTL', 1800)),
+    pool_size=int(os.getenv('SUBTITLE_HTTP_POOL_SIZE', 10)),
+    fixture_dir=os.getenv('YTDLP_FIXTURE_DIR') or None
+)
 
+# Paginated comment fetching (per-thread discovery client, prefetching, per-video cache)
+COMMENT_MAX_COMMENTS = int(os.getenv('COMMENT_MAX_COMMENTS', 100))
+COMMENT_MAX_COMMENTS_LIMIT = int(os.getenv('COMMENT_MAX_COMMENTS_LIMIT', 5000))
+comment_fetcher = CommentFetcher(
+    YOUTUBE_API_KEY,
+    prefetch_pages=int(os.getenv('COMMENT_PREFETCH_PAGES', 2)),
+    cache_ttl=int(os.getenv('COMMENT_CACHE_TTL', 600)),
+    rate_limiter=host_limiter,
+    prefetch_workers=int(os.getenv('COMMENT_PREFETCH_WORKERS', 4))
+)
+
+# Per-video store of scored comments; refreshes only fetch comments newer than the stored watermark.
+# Off by default: the store analyzes the newest comments (order=time) instead of the most relevant ones
+COMMENT_STORE_ENABLED = os.getenv('COMMENT_STORE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+comment_store = CommentSentimentStore(
+    db_path=os.getenv('COMMENT_STORE_PATH', os.path.join(CACHE_ROOT, 'comment_sentiment.sqlite3')),
+    refresh_interval=int(os.getenv('COMMENT_STORE_REFRESH_INTERVAL', 60))
+)
+
+# Bounded pool shared by /evaluate for concurrent per-model summarization
+EVAL_MAX_WORKERS = int(os.getenv('EVAL_MAX_WORKERS', 6))
+EVAL_MODEL_TIMEOUT = float(os.getenv('EVAL_MODEL_TIMEOUT', 120))
+# Seconds past the deadline /evaluate waits for a model whose call overran its request timeout
+EVAL_TIMEOUT_GRACE = 5
+evaluation_executor = ThreadPoolExecutor(max_workers=EVAL_MAX_WORKERS, thread_name_prefix='evaluate')
+
+# ROUGE scorer for /evaluate; keeps recently used references tokenized and stemmed
+rouge_evaluator = RougeEvaluator(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
+
+# Pool for /process stages that run alongside the transcript/summary path (comment fetch + scoring)
+stage_executor = ThreadPoolExecutor(max_workers=int(os.getenv('PROCESS_STAGE_WORKERS', 8)), thread_name_prefix='stage')
+
+# Map-reduce summarization settings for transcripts longer than one chunk
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 30000))
+SUMMARY_CHUNK_OVERLAP = int(os.getenv('SUMMARY_CHUNK_OVERLAP', 200))
+SUMMARY_CHUNK_CONCURRENCY = int(os.getenv('SUMMARY_CHUNK_CONCURRENCY', 4))
+SUMMARY_REDUCE_STRATEGY = os.getenv('SUMMARY_REDUCE_STRATEGY', 'single')
+# Part of every summary cache key, so changing these settings doesn't serve summaries made with the old ones
+SUMMARY_CHUNKING = (SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP, SUMMARY_REDUCE_STRATEGY)
+
+# /process/batch: videos processed concurrently per process and videos allowed per batch
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))
+BATCH_MAX_VIDEOS = int(os.getenv('BATCH_MAX_VIDEOS', 50))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch')
+
+# Background workers for asynchronous /process jobs (polled via /jobs/<id>)
+job_queue = JobQueue(
+    max_workers=int(os.getenv('JOB_MAX_WORKERS', 4)),
+    result_ttl=int(os.getenv('JOB_RESULT_TTL', 3600))
+)
+
+# Precomputed /sentiment-metrics snapshots, rebuilt when the dataset or thresholds change
+SENTIMENT_DATASET_PATH = 'youtube_comments_cleaned.csv'
+MAX_METRICS_SAMPLE_SIZE = int(os.getenv('MAX_METRICS_SAMPLE_SIZE', 100000))
+# Requested sample sizes are snapped to the nearest of these, so each has one snapshot
+METRICS_SAMPLE_SIZES = [
+    int(size) for size in os.getenv('SENTIMENT_METRICS_SAMPLE_SIZES', '100,500,1000,5000,10000,50000,100000').split(',')
+    if size.strip()
+]
+metrics_snapshots = MetricsSnapshotStore(
+    SENTIMENT_DATASET_PATH,
+    cache_dir=os.getenv('METRICS_CACHE_DIR', os.path.join(CACHE_ROOT, 'metrics')),
+    sample_sizes=METRICS_SAMPLE_SIZES,
+    max_snapshots=int(os.getenv('SENTIMENT_METRICS_MAX_SNAPSHOTS', 4))
+)
+if os.getenv('SENTIMENT_METRICS_PREBUILD', 'true').lower() in ('1', 'true', 'yes') and dataset_available(SENTIMENT_DATASET_PATH):
+    metrics_snapshots.prebuild()
+
+
+@traced('preprocess_text')
 def preprocess_text(text, apply_preprocessing=True):
     """
     Preprocess text with tokenization, stop-word removal, and normalization.
     Phase 1: NLP Preprocessing Pipeline for Academic Requirements
     
+    Uses the shared TextPreprocessor, which builds the stop-word set and
+    translation table once instead of on every call.
+    
     Args:
         text (str): Raw text to preprocess
         apply_preprocessing (bool): Whether to apply preprocessing steps
@@ -50,61 +192,15 @@ def preprocess_text(text, apply_preprocessing=True):
     if not apply_preprocessing:
         return text
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove punctuation
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    
-    # Tokenization
-    tokens = word_tokenize(text)
-    
-    # Remove stop words
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [token for token in tokens if token not in stop_words and token.strip()]
-    
-    # Rejoin tokens
-    preprocessed_text = ' '.join(filtered_tokens)
-    
-    return preprocessed_text
+    return default_preprocessor.preprocess(text)
 
 
 def get_youtube_comments(video_id, max_comments=100):
-    """Fetch comments from a YouTube video"""
+    """Fetch comments from a YouTube video, following pagination up to max_comments"""
     if not YOUTUBE_API_KEY:
         return None, "YOUTUBE_API_KEY not configured. Add it to .env file to enable comment analysis."
     
-    try:
-        youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
-        comments = []
-        
-        request = youtube.commentThreads().list(
-            part='snippet',
-            videoId=video_id,
-            maxResults=min(max_comments, 100),
-            order='relevance',
-            textFormat='plainText'
-        )
-        
-        response = request.execute()
-        
-        for item in response.get('items', []):
-            comment = item['snippet']['topLevelComment']['snippet']
-            comments.append({
-                'text': comment['textDisplay'],
-                'author': comment['authorDisplayName'],
-                'likes': comment['likeCount'],
-                'published': comment['publishedAt']
-            })
-        
-        return comments, None
-        
-    except HttpError as e:
-        if e.resp.status == 403:
-            return None, "YouTube API quota exceeded or comments are disabled for this video."
-        return None, f"Error fetching comments: {str(e)}"
-    except Exception as e:
-        return None, f"Error fetching comments: {str(e)}"
+    return comment_fetcher.fetch(video_id, max_comments)
 
 
 def analyze_sentiment(comments):
@@ -112,49 +208,145 @@ def analyze_sentiment(comments):
     if not comments:
         return None
     
+    return analyze_comment_pages([comments])
+
+
+@traced('sentiment_scoring')
+def score_comments(comments, accumulator=None):
+    """
+    Score and classify one batch of comments; polarity is -1 (negative) to 1 (positive).
+    
+    Args:
+        comments (list): Comment dicts
+        accumulator (SentimentAccumulator): Updated with the batch when given
+    
+    Returns:
+        list: Sentiment entries (text shortened to 100 characters) in input order
+    """
+    polarities = score_polarities([comment['text'] for comment in comments])
+    labels = classify_polarities(polarities, lowercase=True).tolist()
+    rounded = [round(polarity, 3) for polarity in polarities.tolist()]
+    
     sentiments = []
-    for comment in comments:
-        blob = TextBlob(comment['text'])
-        polarity = blob.sentiment.polarity  # -1 (negative) to 1 (positive)
-        
-        # Classify sentiment
-        if polarity > 0.1:
-            sentiment = 'positive'
-        elif polarity < -0.1:
-            sentiment = 'negative'
-        else:
-            sentiment = 'neutral'
-        
+    for comment, polarity, sentiment in zip(comments, rounded, labels):
+        text = comment['text']
         sentiments.append({
-            'text': comment['text'][:100] + '...' if len(comment['text']) > 100 else comment['text'],
+            'id': comment.get('id'),
+            'published': comment.get('published'),
+            'text': text if len(text) <= 100 else f'{text[:100]}...',
             'author': comment['author'],
             'sentiment': sentiment,
-            'polarity': round(polarity, 3),
+            'polarity': polarity,
             'likes': comment['likes']
         })
     
-    # Calculate overall statistics
-    total = len(sentiments)
-    positive = sum(1 for s in sentiments if s['sentiment'] == 'positive')
-    negative = sum(1 for s in sentiments if s['sentiment'] == 'negative')
-    neutral = sum(1 for s in sentiments if s['sentiment'] == 'neutral')
-    avg_polarity = sum(s['polarity'] for s in sentiments) / total if total > 0 else 0
+    if accumulator is not None:
+        accumulator.update(labels, rounded)
+    return sentiments
+
+
+def until_cancelled(pages, cancel):
+    """
+    Pass pages through until cancel is set, then close the source so its
+    background prefetch stops too.
+    """
+    try:
+        while cancel is None or not cancel.is_set():
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            if cancel is not None and cancel.is_set():
+                return
+            yield page
+    finally:
+        pages.close()
+
+
+def refresh_comment_analysis(video_id, max_comments, cancel=None):
+    """
+    Bring the stored sentiment for a video up to date and return its analysis.
+    
+    Comments are fetched newest first. The first refresh stores the newest
+    max_comments; later ones fetch only comments published since the stored
+    watermark, at most max_comments new ones per refresh. A refresh that
+    runs out of budget before it reaches the watermark leaves the watermark
+    in place, and the next one continues into the gap (see comment_store).
+    The statistics cover the max_comments most recent stored comments.
+    A refresh stopped through cancel keeps the comments it stored but leaves
+    the watermark and backfill cursor as they were.
+    """
+    new_comments = 0
+    if not comment_store.is_fresh(video_id):
+        state = comment_store.sync_state(video_id)
+        watermark, backfill_from = state['watermark'], state['backfill_from']
+        # Comments newer than backfill_from are already stored: page through them without scoring
+        budget = max_comments + state['stored_between']
+        # With a watermark most refreshes stop on the first page, so don't fetch ahead
+        pages = until_cancelled(comment_fetcher.iter_pages(video_id, budget, order='time', use_cache=False,
+                                                           prefetch=watermark is None), cancel)
+        fetched = 0
+        oldest = None
+        reached_watermark = False
+        for comments in pages:
+            fetched += len(comments)
+            oldest = comments[-1]['published']
+            fresh = [comment for comment in comments if watermark is None or comment['published'] >= watermark]
+            unseen = [
+                comment for comment in fresh
+                if backfill_from is None or not backfill_from < comment['published'] <= state['newest']
+            ]
+            if unseen:
+                new_comments += comment_store.add(video_id, score_comments(unseen))
+            # Pages are newest first, so everything after an older comment is already stored
+            if len(fresh) < len(comments):
+                reached_watermark = True
+                break
+        else:
+            # Fewer comments than the budget: the video has no older ones left
+            reached_watermark = fetched < budget
+        
+        if cancel is not None and cancel.is_set():
+            return None
+        
+        # The first fill keeps only the newest max_comments by design
+        complete = reached_watermark or watermark is None
+        comment_store.mark_refreshed(video_id, backfill_from=None if complete else oldest)
+    
+    analysis = comment_store.analysis(video_id, limit=max_comments)
+    if analysis:
+        analysis['new_comments'] = new_comments
+    return analysis
+
+
+def analyze_comment_pages(pages):
+    """
+    Perform sentiment analysis on pages of comments as they arrive.
+    
+    Each page is scored in one batch while the next page is still being
+    fetched, so scoring overlaps with the YouTube API round trips.
+    
+    Args:
+        pages (iterable): Lists of comment dicts, e.g. from CommentFetcher.iter_pages
+    
+    Returns:
+        dict: comments + statistics, or None if there were no comments
+    """
+    sentiments = []
+    accumulator = SentimentAccumulator()
+    for comments in pages:
+        sentiments.extend(score_comments(comments, accumulator))
+    
+    if not sentiments:
+        return None
     
     return {
         'comments': sentiments,
-        'statistics': {
-            'total': total,
-            'positive': positive,
-            'negative': negative,
-            'neutral': neutral,
-            'positive_percent': round((positive / total) * 100, 1) if total > 0 else 0,
-            'negative_percent': round((negative / total) * 100, 1) if total > 0 else 0,
-            'neutral_percent': round((neutral / total) * 100, 1) if total > 0 else 0,
-            'average_polarity': round(avg_polarity, 3)
-        }
+        'statistics': accumulator.statistics()
     }
 
 
+@traced('extract_video_id')
 def extract_video_id(url):
     """Extract YouTube video ID from various URL formats"""
     patterns = [
@@ -170,73 +362,44 @@ def extract_video_id(url):
     return None
 
 
+@traced('transcript_ytdlp')
 def get_transcript_ytdlp(video_id):
     """Fallback method to get transcript using yt-dlp"""
-    try:
-        ydl_opts = {
-            'skip_download': True,
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': ['en'],
-            'subtitlesformat': 'json3',
-            'quiet': True,
-            'no_warnings': True,
-        }
-        
-        url = f'https://www.youtube.com/watch?v={video_id}'
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            # Try to get subtitles
-            if 'subtitles' in info and 'en' in info['subtitles']:
-                # Get the subtitle URL
-                sub_url = info['subtitles']['en'][0]['url']
-                import urllib.request
-                with urllib.request.urlopen(sub_url) as response:
-                    sub_data = json.loads(response.read().decode())
-                    # Extract text from JSON3 format
-                    text_parts = []
-                    for event in sub_data.get('events', []):
-                        if 'segs' in event:
-                            for seg in event['segs']:
-                                if 'utf8' in seg:
-                                    text_parts.append(seg['utf8'])
-                    return ' '.join(text_parts), None
-            
-            # Try automatic captions
-            if 'automatic_captions' in info and 'en' in info['automatic_captions']:
-                sub_url = info['automatic_captions']['en'][0]['url']
-                import urllib.request
-                with urllib.request.urlopen(sub_url) as response:
-                    sub_data = json.loads(response.read().decode())
-                    text_parts = []
-                    for event in sub_data.get('events', []):
-                        if 'segs' in event:
-                            for seg in event['segs']:
-                                if 'utf8' in seg:
-                                    text_parts.append(seg['utf8'])
-                    return ' '.join(text_parts), None
-            
-            return None, "No subtitles found for this video."
-            
-    except Exception as e:
-        return None, f"yt-dlp error: {str(e)}"
+    cached = transcript_cache.get(video_id, 'en')
+    if cached is not None:
+        return cached, None
+    
+    transcript_text, error = subtitle_fetcher.fetch(video_id, 'en')
+    if error:
+        return None, error
+    transcript_cache.set(video_id, 'en', transcript_text, source='yt-dlp')
+    return transcript_text, None
 
 
+@traced('get_transcript')
 def get_transcript(video_id):
     """Fetch transcript for a YouTube video"""
     
+    # Serve from the transcript cache when possible ('*' = any-language fallback)
+    for language in ('en', '*'):
+        cached = transcript_cache.get(video_id, language)
+        if cached is not None:
+            return cached, None
+    
     # Try youtube-transcript-api first (faster)
     try:
+        host_limiter.acquire(YOUTUBE_HOST)
         transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
         transcript_text = ' '.join([entry['text'] for entry in transcript_list])
+        transcript_cache.set(video_id, 'en', transcript_text, source='youtube-transcript-api')
         return transcript_text, None
     except:
         try:
             # Try any language
+            host_limiter.acquire(YOUTUBE_HOST)
             transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
             transcript_text = ' '.join([entry['text'] for entry in transcript_list])
+            transcript_cache.set(video_id, '*', transcript_text, source='youtube-transcript-api')
             return transcript_text, None
         except:
             pass
@@ -246,61 +409,100 @@ def get_transcript(video_id):
     return get_transcript_ytdlp(video_id)
 
 
-def summarize_with_gemini(transcript, temperature=0.7, length="medium", apply_preprocessing=False, model_name='models/gemini-2.0-flash'):
-    """Summarize the transcript using Gemini API"""
-    try:
-        # Apply preprocessing if requested
-        processed_transcript = preprocess_text(transcript, apply_preprocessing)
-        
-        # Configure safety settings to be more permissive for educational content
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE"
-            }
-        ]
-        
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            safety_settings=safety_settings
-        )
-        
-        # Define length-specific prompts
-        length_prompts = {
-            "concise": "Provide a brief, concise summary in 2-3 sentences covering only the most important points",
-            "medium": "Provide a balanced summary covering the main points, key takeaways, and important details",
-            "detailed": "Provide a comprehensive, detailed summary with all main points, supporting details, key examples, and important takeaways organized in clear sections"
-        }
-        
-        prompt_instruction = length_prompts.get(length, length_prompts["medium"])
-        
-        prompt = f"""{prompt_instruction} of the following video transcript:
+# Configure safety settings to be more permissive for educational content
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_NONE"
+    }
+]
+
+DEFAULT_MODEL = 'models/gemini-2.0-flash'
+
+# Models compared by /evaluate - using available models that support generateContent
+EVALUATION_MODELS = [
+    'models/gemini-2.0-flash-exp',      # Latest experimental flash model
+    'models/gemini-2.5-flash',          # Fast, efficient model
+    'models/gemini-2.5-pro'             # High quality pro model
+]
+
+# Per-model request budget ("model=requests_per_minute[:burst],..."), adaptive concurrency and retries
+gemini_limiter = LLMRateController(
+    default_rpm=float(os.getenv('GEMINI_DEFAULT_RPM', 60)),
+    model_rpm=parse_rate_limits(os.getenv('GEMINI_MODEL_RPM', '')),
+    initial_concurrency=int(os.getenv('GEMINI_INITIAL_CONCURRENCY', 4)),
+    max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', 16)),
+    max_attempts=int(os.getenv('GEMINI_MAX_ATTEMPTS', 5)),
+    default_deadline=float(os.getenv('GEMINI_RETRY_DEADLINE', 120))
+)
+
+# Prefix of summary errors caused by quota/rate limits (reported as 503 instead of 500)
+RATE_LIMIT_ERROR = 'Gemini rate limit reached'
 
-        {processed_transcript}
+# One shared model per name for the whole process, with per-model health/latency stats.
+# Warm-up (off by default) connects to the Gemini API in a background thread at startup
+gemini_clients = GeminiClientRegistry(safety_settings=SAFETY_SETTINGS)
+if os.getenv('GEMINI_WARM_UP', 'false').lower() in ('1', 'true', 'yes'):
+    gemini_clients.warm_up([DEFAULT_MODEL] + EVALUATION_MODELS)
+
+# Define length-specific prompts
+LENGTH_PROMPTS = {
+    "concise": "Provide a brief, concise summary in 2-3 sentences covering only the most important points",
+    "medium": "Provide a balanced summary covering the main points, key takeaways, and important details",
+    "detailed": "Provide a comprehensive, detailed summary with all main points, supporting details, key examples, and important takeaways organized in clear sections"
+}
+
+
+def build_summary_prompt(transcript, length="medium"):
+    """Build the single-pass summarization prompt for a transcript"""
+    prompt_instruction = LENGTH_PROMPTS.get(length, LENGTH_PROMPTS["medium"])
+    
+    return f"""{prompt_instruction} of the following video transcript:
+
+        {transcript}
         
         Summary:"""
+
+
+@traced('gemini_generate')
+def generate_with_gemini(prompt, temperature=0.7, model_name=DEFAULT_MODEL, timeout=None):
+    """
+    Run a single Gemini generation and return (text, error).
+    
+    The call goes through gemini_limiter: it waits for the model's request
+    budget and a concurrency slot, and 429s/5xx are retried with jittered
+    backoff until `timeout` (or GEMINI_RETRY_DEADLINE) runs out.
+    """
+    try:
+        model = gemini_clients.get(model_name)
         
-        generation_config = genai.types.GenerationConfig(
+        generation_config = load('google.generativeai').types.GenerationConfig(
             temperature=temperature,
             max_output_tokens=2048,
         )
         
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
+        def attempt(remaining):
+            host_limiter.acquire(GEMINI_HOST)
+            with gemini_clients.track(model_name):
+                return model.generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    request_options={'timeout': remaining}
+                )
+        
+        response = gemini_limiter.call(model_name, attempt, timeout)
         
         # Check if response was blocked or has no text
         if not response.text or response.text.strip() == "":
@@ -316,6 +518,8 @@ def summarize_with_gemini(transcript, temperature=0.7, length="medium", apply_pr
             return None, "No content generated (empty response)"
         
         return response.text, None
+    except RateLimitError as e:
+        return None, f"{RATE_LIMIT_ERROR}: {str(e)}"
     except Exception as e:
         error_msg = str(e)
         # Extract more specific error information if available
@@ -324,21 +528,409 @@ def summarize_with_gemini(transcript, temperature=0.7, length="medium", apply_pr
         return None, f"Error generating summary: {error_msg}"
 
 
+@traced('summarize')
+def summarize_with_gemini(transcript, temperature=0.7, length="medium", apply_preprocessing=False, model_name=DEFAULT_MODEL, use_cache=True, timeout=None):
+    """
+    Summarize the transcript using Gemini API (map-reduce over chunks for long transcripts).
+    
+    timeout bounds the whole summary: every chunk and reduce call gets what
+    is left of it as its request timeout.
+    """
+    cache_key = None
+    if use_cache and summary_cache.should_cache(temperature):
+        cache_key = make_summary_key(transcript, model_name, length, temperature, apply_preprocessing, SUMMARY_CHUNKING)
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return cached, None
+    
+    # Apply preprocessing if requested
+    processed_transcript = preprocess_text(transcript, apply_preprocessing)
+    
+    prompt_instruction = LENGTH_PROMPTS.get(length, LENGTH_PROMPTS["medium"])
+    deadline = time.time() + timeout if timeout else None
+    
+    def generate(prompt):
+        if deadline is None:
+            return generate_with_gemini(prompt, temperature, model_name)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None, f"Timed out after {timeout:g} seconds"
+        return generate_with_gemini(prompt, temperature, model_name, remaining)
+    
+    def summarize_chunk(chunk, index, total):
+        if total == 1:
+            prompt = build_summary_prompt(chunk, length)
+        else:
+            prompt = f"""Summarize part {index + 1} of {total} of a video transcript. Keep every main point, key example and important detail so the parts can be combined later:
+
+        {chunk}
+        
+        Summary:"""
+        return generate(prompt)
+    
+    def combine_partials(partials, is_final):
+        if is_final:
+            prompt = f"""{prompt_instruction} of the following video transcript, given as summaries of its consecutive parts:
+
+        {partials}
+        
+        Summary:"""
+        else:
+            prompt = f"""Combine the following summaries of consecutive parts of a video transcript into one summary that keeps all main points and important details:
+
+        {partials}
+        
+        Summary:"""
+        return generate(prompt)
+    
+    summary, error = map_reduce_summarize(
+        processed_transcript, summarize_chunk, combine_partials,
+        chunk_tokens=SUMMARY_CHUNK_TOKENS,
+        overlap_tokens=SUMMARY_CHUNK_OVERLAP,
+        max_workers=SUMMARY_CHUNK_CONCURRENCY,
+        reduce_strategy=SUMMARY_REDUCE_STRATEGY
+    )
+    if error:
+        return None, error
+    
+    if cache_key is not None:
+        summary_cache.set(cache_key, summary)
+    
+    return summary, None
+
+
+def stream_summary_with_gemini(transcript, temperature=0.7, length="medium", apply_preprocessing=False, model_name=DEFAULT_MODEL, use_cache=True):
+    """
+    Yield summary text fragments as Gemini generates them.
+    
+    Cached summaries and long (chunked) transcripts are yielded as a single
+    fragment. Raises RuntimeError with the user-facing message on failure.
+    """
+    cache_key = None
+    if use_cache and summary_cache.should_cache(temperature):
+        cache_key = make_summary_key(transcript, model_name, length, temperature, apply_preprocessing, SUMMARY_CHUNKING)
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    processed_transcript = preprocess_text(transcript, apply_preprocessing)
+    
+    # Long transcripts need the map-reduce pipeline; only short ones stream token by token
+    if estimate_tokens(processed_transcript) > SUMMARY_CHUNK_TOKENS:
+        summary, error = summarize_with_gemini(transcript, temperature, length, apply_preprocessing, model_name, use_cache=use_cache)
+        if error:
+            raise RuntimeError(error)
+        yield summary
+        return
+    
+    try:
+        model = gemini_clients.get(model_name)
+        
+        generation_config = load('google.generativeai').types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=2048,
+        )
+        
+        def attempt(remaining):
+            host_limiter.acquire(GEMINI_HOST)
+            with gemini_clients.track(model_name):
+                return model.generate_content(
+                    build_summary_prompt(processed_transcript, length),
+                    generation_config=generation_config,
+                    stream=True,
+                    request_options={'timeout': remaining}
+                )
+        
+        # The SDK returns once the first chunk has arrived, so rate-limit errors
+        # surface (and are retried) before anything has been yielded. The
+        # concurrency slot stays taken until the stream is finished or closed
+        chunks = gemini_limiter.stream(model_name, attempt)
+        parts = []
+        try:
+            for chunk in chunks:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Raised by the SDK when a chunk carries no text (e.g. blocked by safety filters)
+                    finish_reason = chunk.candidates[0].finish_reason if chunk.candidates else 'unknown'
+                    raise RuntimeError(f"Content generation blocked (finish_reason: {finish_reason})")
+                if text:
+                    parts.append(text)
+                    yield text
+        finally:
+            chunks.close()
+    except RuntimeError:
+        raise
+    except RateLimitError as e:
+        raise RuntimeError(f"{RATE_LIMIT_ERROR}: {str(e)}")
+    except Exception as e:
+        raise RuntimeError(f"Error generating summary: {str(e)}")
+    
+    summary = ''.join(parts)
+    if not summary.strip():
+        raise RuntimeError("No content generated (empty response)")
+    
+    if cache_key is not None:
+        summary_cache.set(cache_key, summary)
+
+
+@traced('comment_analysis')
+def build_comment_analysis(video_id, max_comments=None, cancel=None):
+    """
+    Fetch and score comments for a video page by page, returning the comment_analysis payload.
+    
+    Args:
+        video_id (str): YouTube video ID
+        max_comments (int): Comment budget
+        cancel (threading.Event): When set, no further pages are fetched
+            (checked between pages; the page in flight still completes)
+    """
+    if not YOUTUBE_API_KEY:
+        return {'error': "YOUTUBE_API_KEY not configured. Add it to .env file to enable comment analysis."}
+    
+    max_comments = max_comments or COMMENT_MAX_COMMENTS
+    try:
+        if COMMENT_STORE_ENABLED:
+            analysis = refresh_comment_analysis(video_id, max_comments, cancel)
+        else:
+            analysis = analyze_comment_pages(until_cancelled(comment_fetcher.iter_pages(video_id, max_comments), cancel))
+    except CommentFetchError as e:
+        return {'error': str(e)}
+    if cancel is not None and cancel.is_set():
+        return {'error': 'Comment analysis cancelled'}
+    if analysis:
+        return analysis
+    return {'error': 'No comments found'}
+
+
+def parse_max_comments(data):
+    """Read the optional max_comments request field, clamped to COMMENT_MAX_COMMENTS_LIMIT"""
+    try:
+        max_comments = int(data.get('max_comments', COMMENT_MAX_COMMENTS))
+    except (TypeError, ValueError):
+        max_comments = COMMENT_MAX_COMMENTS
+    return max(1, min(max_comments, COMMENT_MAX_COMMENTS_LIMIT))
+
+
+def sse_event(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def collect_service_metrics():
+    """Scrape-time metrics owned by other components (Gemini clients, rate limiter, jobs)"""
+    models = gemini_clients.stats()
+    limits = gemini_limiter.stats()
+    jobs = job_queue.stats()
+    return [
+        ('yt_tool_gemini_calls_total', 'counter', 'Gemini API calls per model',
+         [({'model': model}, stats['calls']) for model, stats in models.items()]),
+        ('yt_tool_gemini_errors_total', 'counter', 'Failed Gemini API calls per model',
+         [({'model': model}, stats['errors']) for model, stats in models.items()]),
+        ('yt_tool_gemini_concurrency_limit', 'gauge', 'Current adaptive concurrency limit per model',
+         [({'model': model}, stats['concurrency_limit']) for model, stats in limits.items()]),
+        ('yt_tool_gemini_retries_total', 'counter', 'Retried Gemini calls per model',
+         [({'model': model}, stats['retries']) for model, stats in limits.items()]),
+        ('yt_tool_gemini_rate_limited_total', 'counter', 'Gemini calls answered with 429 per model',
+         [({'model': model}, stats['rate_limited']) for model, stats in limits.items()]),
+        ('yt_tool_jobs', 'gauge', 'Background jobs by status',
+         [({'status': status}, count) for status, count in jobs.items()]),
+    ]
+
+
+telemetry.registry.register_collector(telemetry.cache_collector({
+    'transcript': transcript_cache,
+    'summary': summary_cache,
+    'comments': comment_fetcher,
+    'subtitle_info': subtitle_fetcher
+}))
+telemetry.registry.register_collector(collect_service_metrics)
+
+
+@app.before_request
+def start_request_trace():
+    g.trace, g.trace_token = telemetry.start_trace(request.endpoint or request.path)
+
+
+@app.after_request
+def finish_request_trace(response):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        telemetry.request_duration.observe(time.perf_counter() - trace.start, {
+            'endpoint': request.endpoint or 'unknown',
+            'method': request.method,
+            'status': str(response.status_code)
+        })
+        response.headers['X-Trace-Id'] = trace.trace_id
+        server_timing = trace.server_timing()
+        if server_timing:
+            response.headers['Server-Timing'] = server_timing
+    return response
+
+
+@app.teardown_request
+def end_request_trace(exc):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        telemetry.end_trace(token)
+
+
+@app.after_request
+def compress(response):
+    if RESPONSE_COMPRESSION:
+        compress_response(response, request.accept_encodings, min_size=RESPONSE_COMPRESSION_MIN_SIZE)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: stage/request latency histograms, cache hit rates, Gemini and job counters"""
+    return Response(telemetry.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/')
 def index():
     """Render the main page"""
     return render_template('index.html')
 
 
+def timed_stage(timings, name, fn, *args, **kwargs):
+    """Call fn and record its wall-clock time in timings[name] (seconds)"""
+    start_time = time.time()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[name] = round(time.time() - start_time, 3)
+
+
+def process_pipeline(video_id, temperature=0.7, length='medium', analyze_comments=False,
+                     apply_preprocessing=False, use_cache=True, max_comments=None):
+    """
+    Run the transcript -> summary pipeline for one video, with the comment
+    stage (fetch + sentiment scoring) running in parallel since it does not
+    need the transcript.
+    
+    Returns:
+        tuple: (result dict with per-stage timings, error message, HTTP status code)
+    """
+    start_time = time.time()
+    timings = {}
+    
+    # Start comments first so they overlap with the transcript and summary stages
+    comments_future = None
+    comments_cancel = threading.Event()
+    if analyze_comments:
+        # Copy the context so the comment stage's spans join this request's trace
+        comments_future = stage_executor.submit(contextvars.copy_context().run, timed_stage, timings, 'comments',
+                                              build_comment_analysis, video_id, max_comments, comments_cancel)
+    
+    def stop_comments():
+        # A queued stage never starts; a running one stops before its next page
+        if comments_future:
+            comments_cancel.set()
+            comments_future.cancel()
+    
+    # Get transcript
+    transcript, error = timed_stage(timings, 'transcript', get_transcript, video_id)
+    if error:
+        stop_comments()
+        return None, error, 400
+    
+    # Generate summary
+    summary, error = timed_stage(timings, 'summary', summarize_with_gemini, transcript, temperature, length,
+                                 apply_preprocessing, use_cache=use_cache)
+    if error:
+        stop_comments()
+        return None, error, 503 if error.startswith(RATE_LIMIT_ERROR) else 500
+    
+    result = {
+        'transcript': transcript,
+        'summary': summary,
+        'video_id': video_id,
+        'preprocessing_applied': apply_preprocessing
+    }
+    
+    # Join the comment stage
+    if comments_future:
+        try:
+            result['comment_analysis'] = comments_future.result()
+        except Exception as e:
+            result['comment_analysis'] = {'error': str(e)}
+    
+    timings['total'] = round(time.time() - start_time, 3)
+    result['timings'] = timings
+    
+    return result, None, 200
+
+
+def parse_shaping(data):
+    """
+    Read the response shaping options from a request body (falling back to the query string).
+    
+    Returns:
+        tuple: (fields list or None, transcript mode, error message)
+    """
+    fields = parse_fields(data.get('fields', request.args.get('fields')))
+    transcript_mode = data.get('transcript', request.args.get('transcript', 'full'))
+    if transcript_mode not in TRANSCRIPT_MODES:
+        return None, None, f"transcript must be one of: {', '.join(TRANSCRIPT_MODES)}"
+    return fields, transcript_mode, None
+
+
+def shape_process_result(result, fields=None, transcript_mode='full'):
+    """
+    Apply the transcript mode and field selection to a process_pipeline result.
+    
+    'ref' replaces the transcript with a link to /transcripts/<video_id>. The
+    transcript cache serves that link, so the transcript stays inline unless
+    it is actually stored there (the cache may be disabled, the write may have
+    failed, or the entry may have been evicted already).
+    """
+    if transcript_mode != 'full' and 'transcript' in result:
+        result = dict(result)
+        transcript = result.pop('transcript')
+        if transcript_mode == 'ref':
+            video_id = result['video_id']
+            if transcript_cache.contains(video_id, 'en') or transcript_cache.contains(video_id, '*'):
+                result['transcript_ref'] = {
+                    'url': f"/transcripts/{video_id}",
+                    'characters': len(transcript),
+                    'words': len(transcript.split())
+                }
+            else:
+                result['transcript'] = transcript
+    return select_fields(result, fields)
+
+
+def run_process_job(params):
+    """Job-queue adapter for process_pipeline, returning (result, error)"""
+    result, error, _ = process_pipeline(**params)
+    return result, error
+
+
 @app.route('/process', methods=['POST'])
 def process_video():
-    """Process the YouTube video URL"""
+    """
+    Process the YouTube video URL.
+    
+    With "async": true the pipeline is queued and the response is a job ID
+    to poll at /jobs/<id>; identical requests already in flight share a job.
+    """
     data = request.json
     url = data.get('url', '').strip()
-    temperature = float(data.get('temperature', 0.7))
-    length = data.get('length', 'medium')
-    analyze_comments = data.get('analyze_comments', False)
-    apply_preprocessing = data.get('apply_preprocessing', False)
+    params = {
+        'temperature': float(data.get('temperature', 0.7)),
+        'length': data.get('length', 'medium'),
+        'analyze_comments': bool(data.get('analyze_comments', False)),
+        'apply_preprocessing': bool(data.get('apply_preprocessing', False)),
+        'use_cache': bool(data.get('use_cache', True)),
+        'max_comments': parse_max_comments(data)
+    }
+    
+    fields, transcript_mode, error = parse_shaping(data)
+    if error:
+        return jsonify({'error': error}), 400
     
     if not url:
         return jsonify({'error': 'Please provide a YouTube URL'}), 400
@@ -347,36 +939,286 @@ def process_video():
     video_id = extract_video_id(url)
     if not video_id:
         return jsonify({'error': 'Invalid YouTube URL'}), 400
+    params['video_id'] = video_id
     
-    # Get transcript
-    transcript, error = get_transcript(video_id)
+    if data.get('async', False):
+        job_key = json.dumps(params, sort_keys=True)
+        job, created = job_queue.submit(job_key, run_process_job, params)
+        response = jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'deduplicated': not created,
+            'status_url': f'/jobs/{job.id}'
+        })
+        response.headers['Location'] = f'/jobs/{job.id}'
+        return response, 202
+    
+    result, error, status = process_pipeline(**params)
+    if error:
+        return jsonify({'error': error}), status
+    
+    return jsonify(shape_process_result(result, fields, transcript_mode))
+
+
+@app.route('/process/batch', methods=['POST'])
+def process_batch():
+    """
+    Process many videos (a "urls" list and/or a "playlist" ID or URL) with the
+    /process settings, streaming one NDJSON line per video as it finishes.
+    
+    Lines: {"event": "batch", ...}, then per video {"index", "video_id",
+    "status": "ok" | "error", "result" | "error", "elapsed"}, then
+    {"event": "done", ...}. One failed video does not fail the batch.
+    """
+    data = request.json or {}
+    params = {
+        'temperature': float(data.get('temperature', 0.7)),
+        'length': data.get('length', 'medium'),
+        'analyze_comments': bool(data.get('analyze_comments', False)),
+        'apply_preprocessing': bool(data.get('apply_preprocessing', False)),
+        'use_cache': bool(data.get('use_cache', True)),
+        'max_comments': parse_max_comments(data)
+    }
+    fields, transcript_mode, error = parse_shaping(data)
     if error:
         return jsonify({'error': error}), 400
     
-    # Generate summary
-    summary, error = summarize_with_gemini(transcript, temperature, length, apply_preprocessing)
+    video_ids = []
+    invalid = []
+    for url in data.get('urls', []):
+        video_id = extract_video_id(str(url).strip())
+        if video_id:
+            video_ids.append(video_id)
+        else:
+            invalid.append(url)
+    if invalid:
+        return jsonify({'error': 'Invalid YouTube URL(s)', 'invalid_urls': invalid}), 400
+    
+    if data.get('playlist'):
+        playlist_ids, error = resolve_playlist(str(data['playlist']).strip(), BATCH_MAX_VIDEOS, host_limiter)
+        if error:
+            return jsonify({'error': error}), 400
+        video_ids.extend(playlist_ids)
+    
+    video_ids = list(dict.fromkeys(video_ids))
+    if not video_ids:
+        return jsonify({'error': 'Please provide YouTube URLs or a playlist'}), 400
+    if len(video_ids) > BATCH_MAX_VIDEOS:
+        return jsonify({'error': f'A batch can contain at most {BATCH_MAX_VIDEOS} videos'}), 400
+    
+    def process(video_id):
+        result, error, _ = process_pipeline(video_id, **params)
+        if result is not None:
+            result = shape_process_result(result, fields, transcript_mode)
+        return result, error
+    
+    # generate() runs after the request's trace context is reset; keep a copy for the videos
+    request_context = contextvars.copy_context()
+    
+    def generate():
+        start_time = time.time()
+        counts = {'ok': 0, 'error': 0}
+        yield ndjson({'event': 'batch', 'total': len(video_ids), 'video_ids': video_ids})
+        for record in run_batch(video_ids, process, batch_executor, request_context):
+            counts[record['status']] += 1
+            yield ndjson(record)
+        yield ndjson({
+            'event': 'done',
+            'succeeded': counts['ok'],
+            'failed': counts['error'],
+            'elapsed': round(time.time() - start_time, 3)
+        })
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of an asynchronous /process job, with its result once finished.
+    
+    Takes the /process shaping options as query parameters (?fields=...&transcript=ref).
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    fields, transcript_mode, error = parse_shaping({})
     if error:
-        return jsonify({'error': error}), 500
+        return jsonify({'error': error}), 400
+    data = job.to_dict()
+    if 'result' in data:
+        data['result'] = shape_process_result(data['result'], fields, transcript_mode)
+    return jsonify(data)
+
+
+@app.route('/transcripts/<video_id>', methods=['GET'])
+def get_cached_transcript(video_id):
+    """
+    A transcript from the transcript cache (the target of transcript_ref links).
     
-    result = {
-        'transcript': transcript,
-        'summary': summary,
-        'video_id': video_id,
-        'preprocessing_applied': apply_preprocessing
-    }
+    ?format=text returns plain text. Responses carry an ETag, so clients can revalidate cheaply.
+    """
+    for language in ('en', '*'):
+        transcript = transcript_cache.get(video_id, language)
+        if transcript is not None:
+            break
+    else:
+        return jsonify({'error': 'Transcript not cached; request it through /process first'}), 404
     
-    # Get and analyze comments if requested
-    if analyze_comments:
-        comments, error = get_youtube_comments(video_id)
+    if request.args.get('format') == 'text':
+        response = Response(transcript, mimetype='text/plain')
+    else:
+        response = jsonify({'video_id': video_id, 'language': language, 'transcript': transcript})
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response.make_conditional(request)
+
+
+@app.route('/process/stream', methods=['POST'])
+def process_video_stream():
+    """
+    Process the YouTube video URL, streaming results as server-sent events.
+    
+    Events: video, transcript, summary_chunk (repeated), summary,
+    comment_analysis, error, done
+    """
+    data = request.json
+    url = data.get('url', '').strip()
+    temperature = float(data.get('temperature', 0.7))
+    length = data.get('length', 'medium')
+    analyze_comments = data.get('analyze_comments', False)
+    apply_preprocessing = data.get('apply_preprocessing', False)
+    use_cache = data.get('use_cache', True)
+    max_comments = parse_max_comments(data)
+    
+    if not url:
+        return jsonify({'error': 'Please provide a YouTube URL'}), 400
+    
+    # Extract video ID
+    video_id = extract_video_id(url)
+    if not video_id:
+        return jsonify({'error': 'Invalid YouTube URL'}), 400
+    
+    def summary_stage(events):
+        events.put(('video', {'video_id': video_id}))
+        
+        transcript, error = get_transcript(video_id)
         if error:
-            result['comment_analysis'] = {'error': error}
-        elif comments:
-            sentiment_analysis = analyze_sentiment(comments)
-            result['comment_analysis'] = sentiment_analysis
-        else:
-            result['comment_analysis'] = {'error': 'No comments found'}
+            events.put(('error', {'error': error, 'stage': 'transcript'}))
+            return
+        events.put(('transcript', {
+            'transcript': transcript,
+            'preprocessing_applied': apply_preprocessing
+        }))
+        
+        parts = []
+        try:
+            for text in stream_summary_with_gemini(transcript, temperature, length, apply_preprocessing, use_cache=use_cache):
+                parts.append(text)
+                events.put(('summary_chunk', {'text': text}))
+        except RuntimeError as e:
+            events.put(('error', {'error': str(e), 'stage': 'summary'}))
+            return
+        events.put(('summary', {'summary': ''.join(parts)}))
+    
+    def comment_stage(events):
+        events.put(('comment_analysis', build_comment_analysis(video_id, max_comments)))
     
-    return jsonify(result)
+    # generate() runs after the view has returned and the request's trace context is
+    # reset, so keep a copy of it now for the stage threads
+    request_context = contextvars.copy_context()
+    
+    def generate():
+        # Each stage runs in its own thread and pushes events as soon as they are ready;
+        # comments don't depend on the transcript, so both start immediately
+        events = queue.Queue()
+        stages = [summary_stage] + ([comment_stage] if analyze_comments else [])
+        
+        def run(stage):
+            try:
+                stage(events)
+            except Exception as e:
+                events.put(('error', {'error': str(e), 'stage': stage.__name__}))
+            finally:
+                events.put(None)
+        
+        for stage in stages:
+            # Each thread runs in its own copy of the request's context so its spans join the trace
+            threading.Thread(target=request_context.copy().run, args=(run, stage), daemon=True).start()
+        
+        remaining = len(stages)
+        while remaining:
+            item = events.get()
+            if item is None:
+                remaining -= 1
+                continue
+            yield sse_event(*item)
+        
+        yield sse_event('done', {})
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def evaluate_single_model(model_name, transcript, temperature, length,
+                          apply_preprocessing, use_cache=False, timeout=None, deadline=None):
+    """
+    Summarize with one model and compute its compression metrics (ROUGE is scored for all models at once).
+    
+    The Gemini calls get what is left until `deadline` (time.time(); default
+    `timeout` seconds from now) as their request timeout, so a slow model
+    gives its worker back at the deadline instead of when the SDK gives up.
+    """
+    try:
+        # Measure processing time
+        start_time = time.time()
+        if timeout and deadline is None:
+            deadline = start_time + timeout
+        remaining = None if deadline is None else deadline - start_time
+        if remaining is not None and remaining <= 0:
+            # Waited in the pool past the deadline: don't start a call nobody will wait for
+            return {'model': model_name, 'error': f'Timed out after {timeout:g} seconds', 'processing_time': 0}
+        
+        summary, error = summarize_with_gemini(transcript, temperature, length, apply_preprocessing, model_name,
+                                               use_cache=use_cache, timeout=remaining)
+        processing_time = time.time() - start_time
+        
+        if error and deadline is not None and time.time() >= deadline:
+            error = f'Timed out after {timeout:g} seconds ({error})'
+        if error:
+            return {
+                'model': model_name,
+                'error': error,
+                'processing_time': processing_time
+            }
+        
+        # Calculate compression ratio
+        original_words = len(transcript.split())
+        summary_words = len(summary.split())
+        compression_ratio = round((summary_words / original_words) * 100, 2)
+        
+        return {
+            'model': model_name,
+            'summary': summary,
+            'processing_time': round(processing_time, 3),
+            'metrics': {
+                'compression_ratio': compression_ratio,
+                'original_words': original_words,
+                'summary_words': summary_words
+            }
+        }
+        
+    except Exception as e:
+        return {
+            'model': model_name,
+            'error': str(e),
+            'processing_time': 0
+        }
 
 
 @app.route('/evaluate', methods=['POST'])
@@ -387,6 +1229,11 @@ def evaluate_models():
     temperature = float(data.get('temperature', 0.7))
     length = data.get('length', 'medium')
     apply_preprocessing = data.get('apply_preprocessing', False)
+    # Cached summaries would make processing_time meaningless, so opt in explicitly
+    use_cache = data.get('use_cache', False)
+    model_timeout = float(data.get('model_timeout', EVAL_MODEL_TIMEOUT))
+    # e.g. "video_id,results.model,results.metrics" leaves out the per-model summaries
+    fields = parse_fields(data.get('fields', request.args.get('fields')))
     
     if not url:
         return jsonify({'error': 'Please provide a YouTube URL'}), 400
@@ -401,68 +1248,36 @@ def evaluate_models():
     if error:
         return jsonify({'error': error}), 400
     
-    # Models to compare - using available models that support generateContent
-    models_to_test = [
-        'models/gemini-2.0-flash-exp',      # Latest experimental flash model
-        'models/gemini-2.5-flash',          # Fast, efficient model
-        'models/gemini-2.5-pro'             # High quality pro model
-    ]
-    
-    results = []
-    scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
+    # Models to compare
+    models_to_test = EVALUATION_MODELS
     
     # Reference: Use first 1000 words of transcript as reference for ROUGE
     reference_text = ' '.join(transcript.split()[:1000])
     
-    for model_name in models_to_test:
+    # Fan out one summarization per model; wall-clock time tracks the slowest model.
+    # The deadline is shared, so time spent queued for a worker counts against it
+    deadline = time.time() + model_timeout
+    futures = [
+        evaluation_executor.submit(
+            evaluate_single_model, model_name, transcript,
+            temperature, length, apply_preprocessing, use_cache, model_timeout, deadline
+        )
+        for model_name in models_to_test
+    ]
+    
+    # Gather in submission order so the results list is stable. Each model's calls
+    # end at the deadline, so the grace only covers a call that overruns its timeout
+    results = []
+    for model_name, future in zip(models_to_test, futures):
         try:
-            # Measure processing time
-            start_time = time.time()
-            summary, error = summarize_with_gemini(transcript, temperature, length, apply_preprocessing, model_name)
-            processing_time = time.time() - start_time
-            
-            if error:
-                results.append({
-                    'model': model_name,
-                    'error': error,
-                    'processing_time': processing_time
-                })
-                continue
-            
-            # Calculate ROUGE scores
-            rouge_scores = scorer.score(reference_text, summary)
-            
-            # Calculate compression ratio
-            original_words = len(transcript.split())
-            summary_words = len(summary.split())
-            compression_ratio = round((summary_words / original_words) * 100, 2)
-            
+            results.append(future.result(timeout=max(0, deadline - time.time()) + EVAL_TIMEOUT_GRACE))
+        except FutureTimeoutError:
+            future.cancel()
             results.append({
                 'model': model_name,
-                'summary': summary,
-                'processing_time': round(processing_time, 3),
-                'metrics': {
-                    'rouge1': {
-                        'precision': round(rouge_scores['rouge1'].precision, 4),
-                        'recall': round(rouge_scores['rouge1'].recall, 4),
-                        'fmeasure': round(rouge_scores['rouge1'].fmeasure, 4)
-                    },
-                    'rouge2': {
-                        'precision': round(rouge_scores['rouge2'].precision, 4),
-                        'recall': round(rouge_scores['rouge2'].recall, 4),
-                        'fmeasure': round(rouge_scores['rouge2'].fmeasure, 4)
-                    },
-                    'rougeL': {
-                        'precision': round(rouge_scores['rougeL'].precision, 4),
-                        'recall': round(rouge_scores['rougeL'].recall, 4),
-                        'fmeasure': round(rouge_scores['rougeL'].fmeasure, 4)
-                    },
-                    'compression_ratio': compression_ratio,
-                    'original_words': original_words,
-                    'summary_words': summary_words
-                }
+                'error': f'Timed out after {model_timeout:g} seconds (the call is still running)',
+                'processing_time': round(model_timeout, 3)
             })
-            
         except Exception as e:
             results.append({
                 'model': model_name,
@@ -470,116 +1285,84 @@ def evaluate_models():
                 'processing_time': 0
             })
     
-    return jsonify({
+    # Score every summary against the reference in one batch (the reference is tokenized and stemmed once)
+    scored = [result for result in results if 'summary' in result]
+    rouge_scores = rouge_evaluator.score_many(reference_text, [result['summary'] for result in scored])
+    for result, scores in zip(scored, rouge_scores):
+        for rouge_type, score in scores.items():
+            result['metrics'][rouge_type] = {
+                'precision': round(score.precision, 4),
+                'recall': round(score.recall, 4),
+                'fmeasure': round(score.fmeasure, 4)
+            }
+    
+    return jsonify(select_fields({
         'video_id': video_id,
         'transcript_length': len(transcript.split()),
         'models_evaluated': len(results),
         'results': results
+    }, fields))
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Per-model Gemini health and latency stats plus cache stats"""
+    return jsonify({
+        'models': gemini_clients.stats(),
+        'rate_limits': gemini_limiter.stats(),
+        'transcript_cache': transcript_cache.stats(),
+        'summary_cache': summary_cache.stats(),
+        'comment_cache': comment_fetcher.stats(),
+        'subtitle_info_cache': subtitle_fetcher.stats(),
+        'comment_store': comment_store.stats(),
+        'jobs': job_queue.stats(),
+        'startup': {**STARTUP_REPORT, 'lazy_imports': lazy_imports.import_timings()},
+        'mock_backends': {name: profile.to_dict() for name, profile in mock_profiles.items()} if mock_profiles else None
     })
 
 
 @app.route('/sentiment-metrics', methods=['GET'])
 def get_sentiment_metrics():
-    """Get sentiment analysis evaluation metrics using labeled dataset"""
+    """Get sentiment analysis evaluation metrics using labeled dataset (served from a precomputed snapshot)"""
     try:
         # Check if evaluation file exists
-        csv_path = 'youtube_comments_cleaned.csv'
-        
-        if not os.path.exists(csv_path):
+        if not dataset_available(SENTIMENT_DATASET_PATH):
             return jsonify({
-                'error': 'Dataset file not found. Please ensure youtube_comments_cleaned.csv exists.'
+                'error': 'Dataset file not found. Please ensure youtube_comments_cleaned.csv exists '
+                         '(run git lfs pull if it is only a Git LFS pointer).'
             }), 404
         
-        # Load and sample dataset
-        df = pd.read_csv(csv_path)
-        df = df[df['CommentText'].str.strip().str.len() > 0]  # Remove empty
-        
-        # Sample for evaluation (limit to 1000 for performance)
-        sample_size = min(1000, len(df))
-        df_sample = df.sample(n=sample_size, random_state=42)
-        
-        # Helper function to analyze single comment
-        def analyze_single_comment(text):
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            
-            if polarity > 0.1:
-                return 'Positive'
-            elif polarity < -0.1:
-                return 'Negative'
-            else:
-                return 'Neutral'
-        
-        # Apply TextBlob sentiment analysis
-        df_sample['Predicted_Sentiment'] = df_sample['CommentText'].apply(analyze_single_comment)
-        
-        # Calculate metrics
-        y_true = df_sample['Sentiment']
-        y_pred = df_sample['Predicted_Sentiment']
-        
-        accuracy = accuracy_score(y_true, y_pred)
-        precision, recall, f1, support = precision_recall_fscore_support(
-            y_true, y_pred, labels=['Positive', 'Negative', 'Neutral'], zero_division=0, average=None
-        )
-        precision_macro, recall_macro, f1_macro, _ = precision_recall_fscore_support(
-            y_true, y_pred, average='macro', zero_division=0
-        )
-        cm = confusion_matrix(y_true, y_pred, labels=['Positive', 'Negative', 'Neutral'])
+        try:
+            sample_size = int(request.args.get('sample_size', 1000))
+        except ValueError:
+            return jsonify({'error': 'sample_size must be an integer'}), 400
+        if not 1 <= sample_size <= MAX_METRICS_SAMPLE_SIZE:
+            return jsonify({'error': f'sample_size must be between 1 and {MAX_METRICS_SAMPLE_SIZE}'}), 400
         
+        # The snapshot served is the one for the nearest allowed size; say which
         return jsonify({
-            'dataset_info': {
-                'total_comments': len(df),
-                'evaluated_comments': sample_size,
-                'sentiment_distribution': df_sample['Sentiment'].value_counts().to_dict()
-            },
-            'metrics': {
-                'accuracy': round(accuracy, 4),
-                'precision_macro': round(precision_macro, 4),
-                'recall_macro': round(recall_macro, 4),
-                'f1_macro': round(f1_macro, 4)
-            },
-            'per_class_metrics': {
-                'positive': {
-                    'precision': round(precision[0], 4),
-                    'recall': round(recall[0], 4),
-                    'f1_score': round(f1[0], 4),
-                    'support': int(support[0])
-                },
-                'negative': {
-                    'precision': round(precision[1], 4),
-                    'recall': round(recall[1], 4),
-                    'f1_score': round(f1[1], 4),
-                    'support': int(support[1])
-                },
-                'neutral': {
-                    'precision': round(precision[2], 4),
-                    'recall': round(recall[2], 4),
-                    'f1_score': round(f1[2], 4),
-                    'support': int(support[2])
-                }
-            },
-            'confusion_matrix': {
-                'positive': {
-                    'predicted_positive': int(cm[0][0]),
-                    'predicted_negative': int(cm[0][1]),
-                    'predicted_neutral': int(cm[0][2])
-                },
-                'negative': {
-                    'predicted_positive': int(cm[1][0]),
-                    'predicted_negative': int(cm[1][1]),
-                    'predicted_neutral': int(cm[1][2])
-                },
-                'neutral': {
-                    'predicted_positive': int(cm[2][0]),
-                    'predicted_negative': int(cm[2][1]),
-                    'predicted_neutral': int(cm[2][2])
-                }
-            }
+            **metrics_snapshots.get(sample_size),
+            'requested_sample_size': sample_size,
+            'sample_size': metrics_snapshots.snap(sample_size)
         })
         
     except Exception as e:
         return jsonify({'error': f'Error calculating metrics: {str(e)}'}), 500
 
 
+# Startup timing report (GET /health repeats it with the lazily imported modules' load times)
+STARTUP_REPORT = {
+    'imports_seconds': round(STARTUP_IMPORTS_DONE - STARTUP_STARTED, 3),
+    'setup_seconds': round(time.perf_counter() - STARTUP_IMPORTS_DONE, 3),
+    'total_seconds': round(time.perf_counter() - STARTUP_STARTED, 3)
+}
+print(f"App ready in {STARTUP_REPORT['total_seconds']:.2f}s "
+      f"(imports {STARTUP_REPORT['imports_seconds']:.2f}s, setup {STARTUP_REPORT['setup_seconds']:.2f}s)")
+
+# Warm the lazily imported dependencies in the background once the server is serving
+if os.getenv('PRELOAD_DEPENDENCIES', 'true').lower() in ('1', 'true', 'yes'):
+    lazy_imports.preload(delay=float(os.getenv('PRELOAD_DELAY', 2)))
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
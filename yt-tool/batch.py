@@ -0,0 +1,160 @@
+"""
+Batch Processing
+Runs the /process pipeline over many videos (a list of URLs or a playlist)
+on a bounded worker pool, yielding one record per video as soon as it
+finishes so results can be streamed as NDJSON. A failed video is reported
+in its own record and never stops the rest of the batch.
+
+Command line:
+    python batch.py URL [URL ...] [--playlist ID_OR_URL] [--output results.ndjson]
+"""
+
+import argparse
+import contextvars
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from lazy_imports import load
+from rate_limit import YOUTUBE_HOST
+
+
+def resolve_playlist(playlist, limit=None, rate_limiter=None):
+    """
+    List the video IDs of a YouTube playlist (no API key needed).
+
+    Args:
+        playlist (str): Playlist ID or URL
+        limit (int): Stop after this many videos
+        rate_limiter (HostRateLimiter): Paces the request to YouTube
+
+    Returns:
+        tuple: (list of video IDs, error message)
+    """
+    url = playlist if playlist.startswith('http') else f'https://www.youtube.com/playlist?list={playlist}'
+    ydl_opts = {
+        'extract_flat': True,
+        'skip_download': True,
+        'quiet': True,
+        'no_warnings': True,
+    }
+    if limit:
+        ydl_opts['playlistend'] = limit
+
+    try:
+        if rate_limiter is not None:
+            rate_limiter.acquire(YOUTUBE_HOST)
+        with load('yt_dlp').YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        return None, f"Could not load playlist: {str(e)}"
+
+    video_ids = [entry['id'] for entry in info.get('entries') or [] if entry and entry.get('id')]
+    if not video_ids:
+        return None, "Playlist has no videos"
+    return video_ids[:limit] if limit else video_ids, None
+
+
+def run_batch(video_ids, process_fn, executor, context=None):
+    """
+    Process videos concurrently and yield one record per video in completion order.
+
+    Each video runs in its own copy of `context`, so spans it records join
+    the caller's trace.
+
+    Args:
+        video_ids (list): Video IDs (duplicates are processed once)
+        process_fn (callable): video_id -> (result, error)
+        executor (Executor): Bounded pool the videos run on
+        context (contextvars.Context): Context to run the videos in (defaults to a copy of the caller's)
+
+    Yields:
+        dict: {'index', 'video_id', 'status': 'ok' | 'error', 'result' | 'error', 'elapsed'}
+    """
+    def run(video_id):
+        start_time = time.time()
+        try:
+            result, error = process_fn(video_id)
+        except Exception as e:
+            result, error = None, str(e)
+        return result, error, round(time.time() - start_time, 3)
+
+    context = context if context is not None else contextvars.copy_context()
+    futures = {}
+    for index, video_id in enumerate(dict.fromkeys(video_ids)):
+        futures[executor.submit(context.copy().run, run, video_id)] = (index, video_id)
+
+    for future in as_completed(futures):
+        index, video_id = futures[future]
+        result, error, elapsed = future.result()
+        record = {'index': index, 'video_id': video_id, 'elapsed': elapsed}
+        if error:
+            record.update(status='error', error=error)
+        else:
+            record.update(status='ok', result=result)
+        yield record
+
+
+def ndjson(record):
+    """One NDJSON line"""
+    return json.dumps(record) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize many YouTube videos in one run (NDJSON output)')
+    parser.add_argument('urls', nargs='*', help='YouTube video URLs or IDs')
+    parser.add_argument('--playlist', help='Playlist ID or URL to add to the batch')
+    parser.add_argument('--limit', type=int, help='Maximum videos taken from the playlist')
+    parser.add_argument('--workers', type=int, default=None, help='Videos processed concurrently')
+    parser.add_argument('--temperature', type=float, default=0.7)
+    parser.add_argument('--length', default='medium', choices=['concise', 'medium', 'detailed'])
+    parser.add_argument('--comments', action='store_true', help='Include comment sentiment analysis')
+    parser.add_argument('--preprocess', action='store_true', help='Apply NLP preprocessing before summarizing')
+    parser.add_argument('--output', help='Write NDJSON here instead of stdout')
+    args = parser.parse_args()
+
+    # The app module holds the configured pipeline, caches and rate limiter
+    import app
+
+    video_ids = []
+    for url in args.urls:
+        video_id = app.extract_video_id(url) or url
+        video_ids.append(video_id)
+    if args.playlist:
+        playlist_ids, error = resolve_playlist(args.playlist, args.limit, app.host_limiter)
+        if error:
+            print(f"Error: {error}", file=sys.stderr)
+            sys.exit(1)
+        video_ids.extend(playlist_ids)
+    if not video_ids:
+        parser.error('give at least one URL or --playlist')
+
+    def process(video_id):
+        result, error, _ = app.process_pipeline(
+            video_id, args.temperature, args.length, args.comments, args.preprocess
+        )
+        return result, error
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start_time = time.time()
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers or app.BATCH_MAX_WORKERS) as executor:
+        for record in run_batch(video_ids, process, executor):
+            out.write(ndjson(record))
+            out.flush()
+            if record['status'] == 'ok':
+                succeeded += 1
+            else:
+                failed += 1
+            print(f"[{succeeded + failed}/{len(set(video_ids))}] {record['video_id']}: {record['status']} "
+                  f"({record['elapsed']:.1f}s)", file=sys.stderr)
+    if out is not sys.stdout:
+        out.close()
+
+    print(f"Done in {time.time() - start_time:.1f}s: {succeeded} succeeded, {failed} failed", file=sys.stderr)
+    sys.exit(1 if failed and not succeeded else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Map-Reduce Chunked Summarization
+Splits long transcripts on a token budget with overlap, summarizes the
+chunks concurrently (map) and combines the partial summaries (reduce).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Rough English average; good enough for budgeting without a tokenizer round trip
+TOKENS_PER_WORD = 1.3
+
+REDUCE_STRATEGIES = ('single', 'tree')
+
+
+def estimate_tokens(text):
+    """Approximate the number of model tokens in a piece of text"""
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+def split_into_chunks(text, chunk_tokens=8000, overlap_tokens=200):
+    """
+    Split text into word windows that fit a token budget.
+
+    Args:
+        text (str): Text to split
+        chunk_tokens (int): Token budget per chunk
+        overlap_tokens (int): Tokens repeated between neighbouring chunks so
+            sentences cut at a boundary keep their context
+
+    Returns:
+        list: Chunk strings in transcript order
+    """
+    words = text.split()
+    chunk_words = max(1, int(chunk_tokens / TOKENS_PER_WORD))
+    overlap_words = min(int(overlap_tokens / TOKENS_PER_WORD), chunk_words // 2)
+    step = chunk_words - overlap_words
+
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(' '.join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def map_reduce_summarize(text, map_fn, reduce_fn, chunk_tokens=8000, overlap_tokens=200,
+                         max_workers=4, reduce_strategy='single', reduce_fan_in=8):
+    """
+    Summarize a long text chunk by chunk and combine the results.
+
+    Args:
+        text (str): Full transcript
+        map_fn (callable): (chunk, index, total) -> (summary, error) for one chunk;
+            total == 1 means the text fit in a single chunk and needs no reduce pass
+        reduce_fn (callable): (combined_partials, is_final) -> (summary, error)
+        chunk_tokens (int): Token budget per chunk
+        overlap_tokens (int): Overlap between neighbouring chunks
+        max_workers (int): Number of chunks summarized concurrently
+        reduce_strategy (str): 'single' combines all partial summaries in one
+            pass; 'tree' combines them in groups of reduce_fan_in until one remains
+        reduce_fan_in (int): Group size for the 'tree' strategy
+
+    Returns:
+        tuple: (summary, error); the first failed chunk or reduce group is
+            returned at once, and chunks that have not started are cancelled
+    """
+    if reduce_strategy not in REDUCE_STRATEGIES:
+        return None, f"Unknown reduce strategy '{reduce_strategy}'. Use one of: {', '.join(REDUCE_STRATEGIES)}"
+
+    chunks = split_into_chunks(text, chunk_tokens, overlap_tokens)
+    if not chunks:
+        return None, "Transcript is empty"
+    if len(chunks) == 1:
+        return map_fn(chunks[0], 0, 1)
+
+    # Map: summarize chunks concurrently, keeping transcript order
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='summary-chunk')
+    futures = []
+    try:
+        futures = [executor.submit(map_fn, chunk, i, len(chunks)) for i, chunk in enumerate(chunks)]
+        partials = []
+        for i, future in enumerate(futures):
+            summary, error = future.result()
+            if error:
+                return None, f"Chunk {i + 1}/{len(chunks)} failed: {error}"
+            partials.append(summary)
+
+        # Reduce: combine partial summaries into the final summary
+        if reduce_strategy == 'tree':
+            while len(partials) > reduce_fan_in:
+                groups = [partials[i:i + reduce_fan_in] for i in range(0, len(partials), reduce_fan_in)]
+                futures = [executor.submit(reduce_fn, _join_partials(group), False) for group in groups]
+                partials = []
+                for future in futures:
+                    summary, error = future.result()
+                    if error:
+                        return None, f"Reduce pass failed: {error}"
+                    partials.append(summary)
+    finally:
+        # After a failure, queued chunks are dropped and calls already running are not waited for
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    return reduce_fn(_join_partials(partials), True)
+
+
+def _join_partials(partials):
+    return '\n\n'.join(f"Part {i + 1}:\n{summary.strip()}" for i, summary in enumerate(partials))
@@ -0,0 +1,238 @@
+"""
+YouTube Comment Fetcher
+Pages through commentThreads.list up to a comment budget, prefetching the
+next page while the caller scores the current one, and caches each video's
+comments in memory for a short time.
+
+googleapiclient service objects sit on httplib2, which is not thread-safe,
+so the discovery client is built once per thread and reused from then on
+instead of once per request. Prefetching runs on a fixed pool of threads
+owned by the fetcher, so those threads' clients are reused too.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import load
+from rate_limit import DATA_API_HOST
+from telemetry import span
+
+# commentThreads.list returns at most 100 threads per page
+MAX_PAGE_SIZE = 100
+
+
+class CommentFetchError(Exception):
+    """Raised while paging when the API call fails; the message is user-facing"""
+
+
+def _error_message(e):
+    if isinstance(e, load('googleapiclient.errors').HttpError) and e.resp.status == 403:
+        return "YouTube API quota exceeded or comments are disabled for this video."
+    return f"Error fetching comments: {str(e)}"
+
+
+def parse_comment_thread(item):
+    """Convert one commentThreads item into the comment dict used across the app"""
+    comment = item['snippet']['topLevelComment']['snippet']
+    return {
+        'id': item['id'],
+        'text': comment['textDisplay'],
+        'author': comment['authorDisplayName'],
+        'likes': comment['likeCount'],
+        'published': comment['publishedAt']
+    }
+
+
+class CommentFetcher:
+    """Paginated, prefetching comment fetcher with a per-video result cache"""
+
+    def __init__(self, api_key, prefetch_pages=2, cache_ttl=600, cache_entries=256, order='relevance',
+                 rate_limiter=None, prefetch_workers=4):
+        """
+        Args:
+            api_key (str): YouTube Data API key
+            prefetch_pages (int): Pages fetched ahead of the consumer
+            cache_ttl (int): Seconds a video's comments are reused (0 disables the cache)
+            cache_entries (int): Videos kept in the cache
+            order (str): commentThreads ordering ('relevance' or 'time')
+            rate_limiter (HostRateLimiter): Paces page requests to the Data API
+            prefetch_workers (int): Threads that fetch pages ahead (videos prefetched at once)
+        """
+        self.api_key = api_key
+        self.prefetch_pages = max(1, prefetch_pages)
+        self.cache_ttl = cache_ttl
+        self.cache_entries = cache_entries
+        self.order = order
+        self.rate_limiter = rate_limiter
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._cache = OrderedDict()  # (video_id, max_comments, order) -> (fetched_at, comments)
+        self._lock = threading.Lock()
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=max(1, prefetch_workers),
+                                                     thread_name_prefix='comment-prefetch')
+
+    def client(self):
+        """The calling thread's YouTube discovery client, built on first use"""
+        youtube = getattr(self._local, 'youtube', None)
+        if youtube is None:
+            youtube = load('googleapiclient.discovery').build(
+                'youtube', 'v3', developerKey=self.api_key, cache_discovery=False
+            )
+            self._local.youtube = youtube
+        return youtube
+
+    def _fetch_pages(self, video_id, max_comments, order):
+        """Follow nextPageToken until the budget is spent, yielding one page of comments at a time"""
+        youtube = self.client()
+        page_token = None
+        fetched = 0
+        while fetched < max_comments:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(DATA_API_HOST)
+            with span('comment_fetch_page'):
+                response = youtube.commentThreads().list(
+                    part='snippet',
+                    videoId=video_id,
+                    maxResults=min(max_comments - fetched, MAX_PAGE_SIZE),
+                    order=order,
+                    textFormat='plainText',
+                    pageToken=page_token
+                ).execute()
+            page = [parse_comment_thread(item) for item in response.get('items', [])]
+            fetched += len(page)
+            if page:
+                yield page
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+    def iter_pages(self, video_id, max_comments=100, order=None, use_cache=True, prefetch=True):
+        """
+        Yield pages of comments as they arrive, fetching the next page in the
+        background while the caller works on the current one.
+
+        Cached videos are yielded as a single page. Raises CommentFetchError on failure.
+
+        Args:
+            video_id (str): YouTube video ID
+            max_comments (int): Comment budget (pages are fetched until it is reached)
+            order (str): Overrides the fetcher's default ordering
+            use_cache (bool): Read and fill the per-video cache (callers that
+                stop early, e.g. at a watermark, should pass False)
+            prefetch (bool): Fetch ahead in a background thread; without it each
+                page is only requested once the caller asks for it, so stopping
+                early spends no extra API quota
+
+        Yields:
+            list: Comment dicts (id, text, author, likes, published)
+        """
+        order = order or self.order
+        cache_key = (video_id, max_comments, order)
+        cached = self._cache_get(cache_key) if use_cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        if not prefetch:
+            try:
+                yield from self._fetch_pages(video_id, max_comments, order)
+            except Exception as e:
+                raise CommentFetchError(_error_message(e))
+            return
+
+        pages = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+        done = object()
+
+        def offer(item):
+            # Block while the consumer is busy, but give up once it has stopped reading
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for page in self._fetch_pages(video_id, max_comments, order):
+                    if not offer(page):
+                        return
+            except Exception as e:
+                offer(CommentFetchError(_error_message(e)))
+                return
+            offer(done)
+
+        # Run in a copy of the caller's context so page spans join the request's trace
+        self._prefetch_executor.submit(contextvars.copy_context().run, produce)
+
+        comments = []
+        try:
+            while True:
+                page = pages.get()
+                if page is done:
+                    break
+                if isinstance(page, CommentFetchError):
+                    raise page
+                comments.extend(page)
+                yield page
+        finally:
+            # Lets the producer exit if the consumer stops early
+            stop.set()
+
+        if use_cache:
+            self._cache_set(cache_key, comments)
+
+    def fetch(self, video_id, max_comments=100, order=None):
+        """
+        Fetch all comments up to the budget.
+
+        Returns:
+            tuple: (list of comment dicts, error message)
+        """
+        try:
+            comments = []
+            for page in self.iter_pages(video_id, max_comments, order):
+                comments.extend(page)
+            return comments, None
+        except CommentFetchError as e:
+            return None, str(e)
+
+    def _cache_get(self, key):
+        if self.cache_ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.time() - entry[0] > self.cache_ttl:
+                del self._cache[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _cache_set(self, key, comments):
+        if self.cache_ttl <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.time(), comments)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached videos"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
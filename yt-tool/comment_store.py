@@ -0,0 +1,255 @@
+"""
+Per-Video Comment Sentiment Store
+Keeps every scored comment in SQLite keyed by (video ID, comment ID) along
+with a per-video SentimentAccumulator (counts, polarity sum, histogram), so
+a refresh only has to fetch and score comments published since the last one.
+
+The watermark is the newest publishedAt up to which every comment is
+stored. Comments are fetched newest first, and paging stops at the first
+comment older than the watermark. Comments published at exactly the
+watermark are fetched again but ignored by ID, so they are never counted
+twice.
+
+A refresh that runs out of comment budget before it reaches the watermark
+leaves a gap between the watermark and the oldest comment it fetched. The
+watermark then stays where it was and that oldest publishedAt is kept as
+backfill_from; the next refresh pages through the comments it already has
+(newer than backfill_from) without scoring them and continues into the gap.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from sentiment_engine import SentimentAccumulator
+
+# PRAGMA user_version of the layout below; a database written by a newer version is refused
+SCHEMA_VERSION = 1
+
+CREATE_VIDEOS = (
+    'CREATE TABLE IF NOT EXISTS videos ('
+    'video_id TEXT PRIMARY KEY, watermark TEXT, backfill_from TEXT, refreshed_at REAL, accumulator TEXT)'
+)
+CREATE_COMMENTS = (
+    'CREATE TABLE IF NOT EXISTS comments ('
+    'video_id TEXT NOT NULL, comment_id TEXT NOT NULL, published TEXT NOT NULL, '
+    'text TEXT, author TEXT, likes INTEGER, sentiment TEXT NOT NULL, polarity REAL NOT NULL, '
+    'PRIMARY KEY (video_id, comment_id))'
+)
+
+
+class CommentSentimentStore:
+    """SQLite store of scored comments with incrementally maintained per-video statistics"""
+
+    def __init__(self, db_path, refresh_interval=60):
+        """
+        Args:
+            db_path (str): SQLite file
+            refresh_interval (int): Seconds after a refresh during which the
+                stored analysis is served without calling the API at all
+        """
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        """Open the database lazily (called under lock)"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._init_schema(conn)
+            self._conn = conn
+        return self._conn
+
+    def _init_schema(self, conn):
+        """Create the tables, refusing a database written by a newer version"""
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"{self.db_path} was written by a newer version (schema {version}); "
+                "point COMMENT_STORE_PATH at another file"
+            )
+        conn.execute(CREATE_VIDEOS)
+        conn.execute(CREATE_COMMENTS)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_comments_published ON comments(video_id, published)')
+        if version < SCHEMA_VERSION:
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
+
+    def _accumulator(self, conn, video_id):
+        """The stored accumulator for a video (called under lock)"""
+        row = conn.execute('SELECT accumulator FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+        if row and row[0]:
+            return SentimentAccumulator.from_dict(json.loads(row[0]))
+        return SentimentAccumulator()
+
+    def sync_state(self, video_id):
+        """
+        Where the next refresh of a video has to start and stop.
+
+        Returns:
+            dict: watermark (publishedAt up to which every comment is stored),
+                backfill_from (oldest publishedAt of an unfinished refresh, or None),
+                newest (newest stored publishedAt), stored_between (comments stored
+                from backfill_from on, which a backfill pages through again) and refreshed_at
+        """
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                'SELECT watermark, backfill_from, refreshed_at FROM videos WHERE video_id = ?', (video_id,)
+            ).fetchone()
+            watermark, backfill_from, refreshed_at = row if row else (None, None, None)
+            newest, stored_between = conn.execute(
+                'SELECT MAX(published), COUNT(*) FROM comments WHERE video_id = ? AND published >= ?',
+                (video_id, backfill_from or '')
+            ).fetchone()
+        return {
+            'watermark': watermark,
+            'backfill_from': backfill_from,
+            'newest': newest,
+            'stored_between': stored_between if backfill_from else 0,
+            'refreshed_at': refreshed_at
+        }
+
+    def is_fresh(self, video_id):
+        """True when the video was refreshed within refresh_interval seconds"""
+        with self._lock:
+            row = self._db().execute('SELECT refreshed_at FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+        return row is not None and row[0] is not None and time.time() - row[0] < self.refresh_interval
+
+    def add(self, video_id, entries):
+        """
+        Store scored comments, folding only new comment IDs into the video's accumulator.
+
+        The watermark is not moved here; mark_refreshed() does that once the
+        refresh knows whether it reached the old watermark.
+
+        Args:
+            video_id (str): YouTube video ID
+            entries (list): Scored comment dicts (id, published, text, author, likes, sentiment, polarity)
+
+        Returns:
+            int: Number of comments that were not stored before
+        """
+        labels = []
+        polarities = []
+
+        with self._lock:
+            conn = self._db()
+            conn.execute('INSERT OR IGNORE INTO videos (video_id) VALUES (?)', (video_id,))
+            for entry in entries:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO comments '
+                    '(video_id, comment_id, published, text, author, likes, sentiment, polarity) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (video_id, entry['id'], entry['published'], entry['text'], entry['author'],
+                     entry['likes'], entry['sentiment'], entry['polarity'])
+                )
+                if cursor.rowcount == 1:
+                    labels.append(entry['sentiment'])
+                    polarities.append(entry['polarity'])
+
+            if labels:
+                accumulator = self._accumulator(conn, video_id).update(labels, polarities)
+                conn.execute(
+                    'UPDATE videos SET accumulator = ? WHERE video_id = ?',
+                    (json.dumps(accumulator.to_dict()), video_id)
+                )
+            conn.commit()
+        return len(labels)
+
+    def mark_refreshed(self, video_id, backfill_from=None):
+        """
+        Record that the video was just synced with the API.
+
+        Args:
+            video_id (str): YouTube video ID
+            backfill_from (str): None when the refresh reached the watermark (or
+                was the first fill), which moves the watermark up to the newest
+                stored comment; otherwise the oldest publishedAt the refresh
+                fetched, where the next one has to continue
+        """
+        with self._lock:
+            conn = self._db()
+            conn.execute('INSERT OR IGNORE INTO videos (video_id) VALUES (?)', (video_id,))
+            if backfill_from is None:
+                conn.execute(
+                    'UPDATE videos SET refreshed_at = ?, backfill_from = NULL, '
+                    'watermark = (SELECT MAX(published) FROM comments WHERE video_id = ?) WHERE video_id = ?',
+                    (time.time(), video_id, video_id)
+                )
+            else:
+                conn.execute(
+                    'UPDATE videos SET refreshed_at = ?, backfill_from = ? WHERE video_id = ?',
+                    (time.time(), backfill_from, video_id)
+                )
+            conn.commit()
+
+    def analysis(self, video_id, limit=100):
+        """
+        Build the comment_analysis payload from stored data.
+
+        statistics cover the `limit` most recent comments that are returned;
+        stored_statistics cover every comment stored for the video.
+
+        Args:
+            video_id (str): YouTube video ID
+            limit (int): Number of most recent comments included in the payload
+
+        Returns:
+            dict: comments + statistics, or None if nothing is stored for the video
+        """
+        with self._lock:
+            conn = self._db()
+            accumulator = self._accumulator(conn, video_id)
+            if not accumulator.total:
+                return None
+            comments = conn.execute(
+                'SELECT comment_id, published, text, author, sentiment, polarity, likes FROM comments '
+                'WHERE video_id = ? ORDER BY published DESC LIMIT ?',
+                (video_id, limit)
+            ).fetchall()
+
+        recent = SentimentAccumulator().update([row[4] for row in comments], [row[5] for row in comments])
+        return {
+            'order': 'time',
+            'comments': [
+                {
+                    'id': comment_id,
+                    'published': published,
+                    'text': text,
+                    'author': author,
+                    'sentiment': sentiment,
+                    'polarity': polarity,
+                    'likes': likes
+                }
+                for comment_id, published, text, author, sentiment, polarity, likes in comments
+            ],
+            'statistics': recent.statistics(),
+            'stored_statistics': accumulator.statistics()
+        }
+
+    def clear(self, video_id=None):
+        """Forget one video, or every video when video_id is None"""
+        with self._lock:
+            conn = self._db()
+            if video_id is None:
+                conn.execute('DELETE FROM comments')
+                conn.execute('DELETE FROM videos')
+            else:
+                conn.execute('DELETE FROM comments WHERE video_id = ?', (video_id,))
+                conn.execute('DELETE FROM videos WHERE video_id = ?', (video_id,))
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            conn = self._db()
+            return {
+                'videos': conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0],
+                'comments': conn.execute('SELECT COUNT(*) FROM comments').fetchone()[0]
+            }
@@ -0,0 +1,244 @@
+"""
+Labeled Comments Dataset Access
+Streams youtube_comments_cleaned.csv in chunks (only the columns we need)
+and draws reproducible reservoir samples without loading the whole file.
+
+A one-time conversion (python comments_dataset.py --convert) writes a
+columnar binary copy next to the CSV: UTF-8 comment bytes + offsets and a
+category-encoded Sentiment column, all memory-mapped with NumPy and with
+empty comments already removed. Readers use it automatically while it
+matches the CSV.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMN = 'CommentText'
+LABEL_COLUMN = 'Sentiment'
+DEFAULT_CSV_PATH = 'youtube_comments_cleaned.csv'
+DEFAULT_CHUNKSIZE = 100000
+
+# Columnar copy layout (version bump invalidates older copies)
+COLUMNAR_VERSION = 1
+COLUMNAR_DIRNAME = os.path.join('.cache', 'comments_columnar')
+
+
+def iter_comment_chunks(csv_path=DEFAULT_CSV_PATH, chunksize=DEFAULT_CHUNKSIZE, prefer_columnar=True):
+    """
+    Yield DataFrame chunks with only CommentText and Sentiment, empty comments removed.
+
+    Reads the columnar copy instead of the CSV when one exists for the
+    current version of the CSV; both yield the same rows in the same order.
+
+    Args:
+        csv_path (str): Path to the labeled comments CSV
+        chunksize (int): Rows parsed per chunk
+        prefer_columnar (bool): Use the columnar copy when it is up to date
+
+    Yields:
+        pd.DataFrame: One filtered chunk at a time
+    """
+    if prefer_columnar and columnar_is_fresh(csv_path):
+        yield from iter_columnar_chunks(columnar_dir_for(csv_path), chunksize)
+        return
+
+    yield from iter_csv_chunks(csv_path, chunksize)
+
+
+def iter_csv_chunks(csv_path=DEFAULT_CSV_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """Parse the CSV itself in chunks (see iter_comment_chunks)"""
+    reader = pd.read_csv(
+        csv_path,
+        usecols=[TEXT_COLUMN, LABEL_COLUMN],
+        dtype={TEXT_COLUMN: str, LABEL_COLUMN: str},
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        yield chunk[chunk[TEXT_COLUMN].str.strip().str.len() > 0]
+
+
+def reservoir_sample(chunks, sample_size, seed=42):
+    """
+    Uniformly sample rows from a stream of chunks in constant memory (Algorithm R).
+
+    Every row i >= sample_size draws j in [0, i]; if j < sample_size it replaces
+    reservoir slot j. The draws for a whole chunk are made in one vectorized call
+    and applied in row order, which gives the same result as the row-by-row loop.
+
+    Args:
+        chunks (iterable): DataFrames as produced by iter_comment_chunks
+        sample_size (int): Number of rows to keep
+        seed (int): Random seed, so repeated runs pick the same sample
+
+    Returns:
+        tuple: (sample DataFrame, total number of rows seen)
+    """
+    rng = np.random.default_rng(seed)
+    texts = np.empty(sample_size, dtype=object)
+    labels = np.empty(sample_size, dtype=object)
+    seen = 0
+
+    for chunk in chunks:
+        chunk_texts = chunk[TEXT_COLUMN].to_numpy(dtype=object)
+        chunk_labels = chunk[LABEL_COLUMN].to_numpy(dtype=object)
+        n = len(chunk_texts)
+
+        # Fill the reservoir first
+        fill = min(max(sample_size - seen, 0), n)
+        if fill:
+            texts[seen:seen + fill] = chunk_texts[:fill]
+            labels[seen:seen + fill] = chunk_labels[:fill]
+
+        # Then replace slots with decreasing probability
+        if fill < n:
+            positions = np.arange(seen + fill, seen + n)
+            slots = rng.integers(0, positions + 1)
+            chosen = np.nonzero(slots < sample_size)[0]
+            for offset in chosen:
+                texts[slots[offset]] = chunk_texts[fill + offset]
+                labels[slots[offset]] = chunk_labels[fill + offset]
+
+        seen += n
+
+    kept = min(seen, sample_size)
+    sample = pd.DataFrame({TEXT_COLUMN: texts[:kept], LABEL_COLUMN: labels[:kept]})
+    return sample, seen
+
+
+def columnar_dir_for(csv_path):
+    """Directory holding the columnar copy of a CSV"""
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), COLUMNAR_DIRNAME)
+
+
+def _read_meta(out_dir):
+    try:
+        with open(os.path.join(out_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def columnar_is_fresh(csv_path, out_dir=None):
+    """True when a complete columnar copy exists and was built from the current CSV"""
+    meta = _read_meta(out_dir or columnar_dir_for(csv_path))
+    if not meta or meta.get('version') != COLUMNAR_VERSION:
+        return False
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        # No CSV at all: the columnar copy is the only source
+        return True
+    return meta['source_mtime_ns'] == st.st_mtime_ns and meta['source_size'] == st.st_size
+
+
+def convert_to_columnar(csv_path=DEFAULT_CSV_PATH, out_dir=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Write the memory-mappable columnar copy of the dataset.
+
+    Files written to out_dir:
+        text.bin       uint8   UTF-8 bytes of every comment, back to back
+        offsets.bin    int64   row i spans text.bin[offsets[i]:offsets[i + 1]]
+        sentiment.bin  int8    category code per row (-1 = missing)
+        meta.json      rows, categories and the CSV's mtime/size
+
+    Returns:
+        dict: The written metadata
+    """
+    out_dir = out_dir or columnar_dir_for(csv_path)
+    st = os.stat(csv_path)
+    tmp_dir = f'{out_dir}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    categories = {}
+    rows = 0
+    position = 0
+    with open(os.path.join(tmp_dir, 'text.bin'), 'wb') as text_file, \
+            open(os.path.join(tmp_dir, 'offsets.bin'), 'wb') as offsets_file, \
+            open(os.path.join(tmp_dir, 'sentiment.bin'), 'wb') as sentiment_file:
+        offsets_file.write(np.array([0], dtype=np.int64).tobytes())
+
+        for chunk in iter_csv_chunks(csv_path, chunksize):
+            encoded = [text.encode('utf-8') for text in chunk[TEXT_COLUMN].tolist()]
+            lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+            text_file.write(b''.join(encoded))
+            offsets_file.write((position + np.cumsum(lengths)).tobytes())
+            position += int(lengths.sum())
+
+            labels = chunk[LABEL_COLUMN].tolist()
+            for label in labels:
+                if isinstance(label, str) and label not in categories:
+                    categories[label] = len(categories)
+            codes = np.fromiter((categories.get(label, -1) if isinstance(label, str) else -1 for label in labels),
+                                dtype=np.int8, count=len(labels))
+            sentiment_file.write(codes.tobytes())
+            rows += len(encoded)
+
+    meta = {
+        'version': COLUMNAR_VERSION,
+        'rows': rows,
+        'categories': sorted(categories, key=categories.get),
+        'source_mtime_ns': st.st_mtime_ns,
+        'source_size': st.st_size,
+        'created': time.time()
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return meta
+
+
+def columnar_rows(out_dir):
+    """Number of rows in a columnar copy"""
+    return _read_meta(out_dir)['rows']
+
+
+def read_columnar_range(out_dir, start, stop, meta=None):
+    """Read rows [start, stop) of the columnar copy as a CommentText/Sentiment DataFrame"""
+    meta = meta or _read_meta(out_dir)
+    stop = min(stop, meta['rows'])
+    text_path = os.path.join(out_dir, 'text.bin')
+    offsets = np.memmap(os.path.join(out_dir, 'offsets.bin'), dtype=np.int64, mode='r')
+    codes = np.memmap(os.path.join(out_dir, 'sentiment.bin'), dtype=np.int8, mode='r')
+
+    bounds = np.asarray(offsets[start:stop + 1]) - offsets[start]
+    if offsets[stop] > offsets[start]:
+        text = np.memmap(text_path, dtype=np.uint8, mode='r')
+        blob = text[offsets[start]:offsets[stop]].tobytes()
+    else:
+        blob = b''
+    texts = [blob[a:b].decode('utf-8') for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist())]
+    labels = pd.Categorical.from_codes(np.asarray(codes[start:stop], dtype=np.int64), categories=meta['categories'])
+    return pd.DataFrame({TEXT_COLUMN: texts, LABEL_COLUMN: labels}, index=pd.RangeIndex(start, stop))
+
+
+def iter_columnar_chunks(out_dir, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield CommentText/Sentiment chunks from the memory-mapped columnar copy"""
+    meta = _read_meta(out_dir)
+    for start in range(0, meta['rows'], chunksize):
+        yield read_columnar_range(out_dir, start, start + chunksize, meta)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Labeled comments dataset utilities')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help='Labeled comments CSV')
+    parser.add_argument('--convert', action='store_true', help='Write the columnar copy of the CSV')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows read per chunk')
+    args = parser.parse_args()
+
+    if args.convert:
+        start_time = time.time()
+        meta = convert_to_columnar(args.csv, chunksize=args.chunksize)
+        print(f"Wrote {meta['rows']:,} comments to {columnar_dir_for(args.csv)} "
+              f"in {time.time() - start_time:.1f}s (categories: {', '.join(meta['categories'])})")
+    else:
+        state = 'up to date' if columnar_is_fresh(args.csv) else 'missing or stale'
+        print(f"Columnar copy for {args.csv}: {state}. Run with --convert to (re)build it.")
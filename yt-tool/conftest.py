@@ -0,0 +1,22 @@
+"""
+Test settings: app.py reads its configuration at import time, so tests that
+import it get a dummy Gemini key, no network warm-up or background preload,
+and caches in a temporary directory instead of .cache/.
+"""
+
+import os
+import tempfile
+
+_cache_dir = tempfile.mkdtemp(prefix='yt-tool-tests-')
+
+for name, value in {
+    'GEMINI_API_KEY': 'test-key',
+    'GEMINI_WARM_UP': 'false',
+    'PRELOAD_DEPENDENCIES': 'false',
+    'SENTIMENT_METRICS_PREBUILD': 'false',
+    'TRANSCRIPT_CACHE_DIR': os.path.join(_cache_dir, 'transcripts'),
+    'SUMMARY_CACHE_PATH': os.path.join(_cache_dir, 'summaries.sqlite3'),
+    'COMMENT_STORE_PATH': os.path.join(_cache_dir, 'comment_sentiment.sqlite3'),
+    'METRICS_CACHE_DIR': os.path.join(_cache_dir, 'metrics'),
+}.items():
+    os.environ.setdefault(name, value)
@@ -3,10 +3,16 @@ Sentiment Analysis Evaluation Script
 Compares TextBlob sentiment analysis with labeled YouTube comments dataset
 """
 
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from textblob import TextBlob
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support, confusion_matrix, classification_report
 import numpy as np
+from sentiment_engine import LABELS, classify_polarities, classify_texts, polarity
+from comments_dataset import (DEFAULT_CHUNKSIZE, LABEL_COLUMN, TEXT_COLUMN, columnar_dir_for,
+                              columnar_is_fresh, columnar_rows, iter_comment_chunks,
+                              read_columnar_range, reservoir_sample)
 
 def analyze_sentiment_textblob(text):
     """
@@ -14,138 +20,315 @@ def analyze_sentiment_textblob(text):
     Returns: 'Positive', 'Negative', or 'Neutral'
     """
     try:
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        
-        if polarity > 0.1:
-            return 'Positive'
-        elif polarity < -0.1:
-            return 'Negative'
-        else:
-            return 'Neutral'
+        return str(classify_polarities([polarity(text)])[0])
     except:
         return 'Neutral'  # Default for errors
 
-def evaluate_sentiment_model(csv_path='youtube_comments_cleaned.csv', sample_size=1000):
+
+class ConfusionAccumulator:
+    """
+    Incrementally accumulates a confusion matrix so metrics can be computed
+    over any number of chunks in constant memory.
+
+    Rows are true labels, columns are predicted labels, both in LABELS order.
+    Rows whose true label is outside LABELS still count towards accuracy
+    (as misclassified), matching sklearn's accuracy_score.
+
+    Macro averages run over the labels that occur in y_true or y_pred, which is
+    what sklearn does when no labels= is given (as the classification_report
+    this replaces did): a class missing from a sample does not pull the macro
+    scores down with a zero.
+    """
+
+    def __init__(self, labels=LABELS):
+        self.labels = list(labels)
+        self.matrix = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+        self.present = np.zeros(len(self.labels), dtype=bool)
+        self.total = 0
+        self.correct = 0
+
+    def update(self, y_true, y_pred):
+        """Add a batch of true / predicted labels"""
+        y_true = np.asarray(y_true, dtype=object)
+        y_pred = np.asarray(y_pred, dtype=object)
+        self.total += len(y_true)
+        self.correct += int(np.sum(y_true == y_pred))
+
+        true_codes = pd.Categorical(y_true, categories=self.labels).codes
+        pred_codes = pd.Categorical(y_pred, categories=self.labels).codes
+        self.present[true_codes[true_codes >= 0]] = True
+        self.present[pred_codes[pred_codes >= 0]] = True
+        known = (true_codes >= 0) & (pred_codes >= 0)
+        np.add.at(self.matrix, (true_codes[known], pred_codes[known]), 1)
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a different chunk or shard) into this one"""
+        self.matrix += other.matrix
+        self.present |= other.present
+        self.total += other.total
+        self.correct += other.correct
+        return self
+
+    def metrics(self):
+        """
+        Compute accuracy plus per-class, macro and weighted precision/recall/F1.
+
+        Returns:
+            dict with 'accuracy', 'precision', 'recall', 'f1', 'support' (arrays in
+            label order), '*_macro' (over the labels present), '*_weighted'
+            and 'confusion_matrix'
+        """
+        tp = np.diag(self.matrix).astype(np.float64)
+        predicted = self.matrix.sum(axis=0).astype(np.float64)
+        support = self.matrix.sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        weights = support / support.sum() if support.sum() else np.zeros(len(support))
+        present = self.present if self.present.any() else np.ones(len(self.labels), dtype=bool)
+        return {
+            'accuracy': self.correct / self.total if self.total else 0.0,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'support': support,
+            'precision_macro': float(precision[present].mean()),
+            'recall_macro': float(recall[present].mean()),
+            'f1_macro': float(f1[present].mean()),
+            'precision_weighted': float((precision * weights).sum()),
+            'recall_weighted': float((recall * weights).sum()),
+            'f1_weighted': float((f1 * weights).sum()),
+            'confusion_matrix': self.matrix.copy()
+        }
+
+
+def iter_shards(csv_path, chunksize, by_range=False):
+    """
+    Split the dataset into evaluation shards.
+
+    With by_range and an up-to-date columnar copy, shards are just row ranges
+    that each worker reads from the memory-mapped files itself; otherwise the
+    shards are the parsed CSV chunks.
+    """
+    if by_range and columnar_is_fresh(csv_path):
+        out_dir = columnar_dir_for(csv_path)
+        for start in range(0, columnar_rows(out_dir), chunksize):
+            yield ('range', (out_dir, start, start + chunksize))
+    else:
+        for chunk in iter_comment_chunks(csv_path, chunksize):
+            yield ('rows', chunk)
+
+
+def score_shard(shard, keep_predictions=False):
+    """
+    Score one shard (runs inside a worker process when --workers > 1).
+
+    Returns:
+        tuple: (ConfusionAccumulator for the shard, results DataFrame or None)
+    """
+    kind, payload = shard
+    chunk = read_columnar_range(*payload) if kind == 'range' else payload
+
+    predicted = classify_texts(chunk[TEXT_COLUMN])
+    accumulator = ConfusionAccumulator().update(chunk[LABEL_COLUMN], predicted)
+
+    results = None
+    if keep_predictions:
+        results = pd.DataFrame({
+            TEXT_COLUMN: chunk[TEXT_COLUMN].to_numpy(dtype=object),
+            LABEL_COLUMN: chunk[LABEL_COLUMN].to_numpy(dtype=object),
+            'Predicted_Sentiment': predicted.to_numpy(dtype=object)
+        })
+        results['Correct'] = results[LABEL_COLUMN] == results['Predicted_Sentiment']
+    return accumulator, results
+
+
+def stream_evaluate(csv_path='youtube_comments_cleaned.csv', chunksize=DEFAULT_CHUNKSIZE, results_path=None, workers=1):
+    """
+    Evaluate every labeled comment chunk by chunk in constant memory.
+
+    With workers > 1 the shards are scored in a process pool. Shard results
+    are merged (and predictions written) in shard order, so the output is the
+    same for any worker count.
+
+    Args:
+        csv_path (str): Labeled comments CSV
+        chunksize (int): Rows per chunk / shard
+        results_path (str): Optional CSV to append per-comment predictions to
+        workers (int): Number of worker processes
+
+    Returns:
+        ConfusionAccumulator: Counts over the full dataset
+    """
+    accumulator = ConfusionAccumulator()
+    if results_path and os.path.exists(results_path):
+        os.remove(results_path)
+    keep_predictions = bool(results_path)
+
+    def collect(shard_accumulator, results, shard_number):
+        accumulator.merge(shard_accumulator)
+        print(f"   ... shard {shard_number:,} done, {accumulator.total:,} comments scored", end='\r')
+        if results is not None:
+            results.to_csv(results_path, mode='a', index=False, header=not os.path.exists(results_path))
+
+    shards = iter_shards(csv_path, chunksize, by_range=workers > 1)
+    if workers <= 1:
+        for number, shard in enumerate(shards, 1):
+            collect(*score_shard(shard, keep_predictions), number)
+    else:
+        # Keep a bounded window of shards in flight and consume them in order
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            number = 0
+            for shard in shards:
+                pending.append(executor.submit(score_shard, shard, keep_predictions))
+                if len(pending) >= workers * 2:
+                    number += 1
+                    collect(*pending.popleft().result(), number)
+            while pending:
+                number += 1
+                collect(*pending.popleft().result(), number)
+    print()
+    return accumulator
+
+
+def evaluate_sentiment_model(csv_path='youtube_comments_cleaned.csv', sample_size=1000, chunksize=DEFAULT_CHUNKSIZE, workers=1):
     """
     Evaluate TextBlob sentiment analysis against labeled dataset
+
+    The CSV is streamed in chunks. With a sample_size, a reservoir sample is
+    drawn while streaming; with sample_size=None every comment is evaluated,
+    sharded across `workers` processes.
     """
     print("="*80)
     print("SENTIMENT ANALYSIS EVALUATION")
     print("="*80)
-    
+
     # Load dataset
-    print(f"\n📁 Loading dataset: {csv_path}")
-    df = pd.read_csv(csv_path)
-    
-    print(f"   Total comments in dataset: {len(df):,}")
-    
-    # Filter English comments (remove non-English to improve evaluation accuracy)
-    df = df[df['CommentText'].str.strip().str.len() > 0]  # Remove empty
-    
-    # Sample data if needed
-    if len(df) > sample_size:
-        print(f"   Sampling {sample_size:,} comments for evaluation...")
-        df = df.sample(n=sample_size, random_state=42)
-    
-    print(f"\n📊 Sentiment Distribution in Dataset:")
-    print(df['Sentiment'].value_counts())
-    print(f"\n   Using {len(df):,} comments for evaluation")
-    
-    # Apply TextBlob sentiment analysis
-    print("\n🔍 Analyzing sentiments with TextBlob...")
-    df['Predicted_Sentiment'] = df['CommentText'].apply(analyze_sentiment_textblob)
-    
-    # Prepare data for evaluation
-    y_true = df['Sentiment']
-    y_pred = df['Predicted_Sentiment']
-    
+    print(f"\n📁 Streaming dataset: {csv_path}")
+
+    if sample_size is None:
+        # Full dataset: accumulate counts chunk by chunk, write predictions incrementally
+        print(f"\n🔍 Analyzing all comments with TextBlob ({workers} worker{'s' if workers != 1 else ''})...")
+        accumulator = stream_evaluate(csv_path, chunksize, results_path='sentiment_evaluation_results.csv', workers=workers)
+        df = None
+        print(f"   Total comments in dataset: {accumulator.total:,}")
+    else:
+        # Sample data while streaming (reservoir sampling keeps memory constant)
+        df, total = reservoir_sample(iter_comment_chunks(csv_path, chunksize), sample_size, seed=42)
+        print(f"   Total comments in dataset: {total:,}")
+        if total > sample_size:
+            print(f"   Sampling {sample_size:,} comments for evaluation...")
+
+        print(f"\n📊 Sentiment Distribution in Dataset:")
+        print(df[LABEL_COLUMN].value_counts())
+        print(f"\n   Using {len(df):,} comments for evaluation")
+
+        # Apply TextBlob sentiment analysis
+        print("\n🔍 Analyzing sentiments with TextBlob...")
+        df['Predicted_Sentiment'] = classify_texts(df[TEXT_COLUMN])
+        accumulator = ConfusionAccumulator().update(df[LABEL_COLUMN], df['Predicted_Sentiment'])
+
+    metrics = print_report(accumulator)
+
+    if df is not None:
+        # Sample Predictions
+        print(f"\n📝 Sample Predictions (First 10):")
+        print("-" * 80)
+        for idx in range(min(10, len(df))):
+            row = df.iloc[idx]
+            match = "✅" if row[LABEL_COLUMN] == row['Predicted_Sentiment'] else "❌"
+            print(f"\n{match} Comment: {row[TEXT_COLUMN][:70]}...")
+            print(f"   Labeled: {row[LABEL_COLUMN]:<10} | Predicted: {row['Predicted_Sentiment']:<10}")
+
+    # Summary Statistics
+    accuracy = metrics['accuracy']
+    f1 = metrics['f1']
+    evaluated = accumulator.total
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+    print(f"Total Comments Evaluated: {evaluated:,}")
+    print(f"Correctly Classified: {accumulator.correct:,} ({accuracy*100:.2f}%)")
+    print(f"Misclassified: {evaluated - accumulator.correct:,} ({(1-accuracy)*100:.2f}%)")
+    print(f"\nBest Performing Class (F1): {LABELS[np.argmax(f1)]}")
+    print(f"Worst Performing Class (F1): {LABELS[np.argmin(f1)]}")
+
+    # Save detailed results
+    if df is not None:
+        results_df = df[[TEXT_COLUMN, LABEL_COLUMN, 'Predicted_Sentiment']].copy()
+        results_df['Correct'] = results_df[LABEL_COLUMN] == results_df['Predicted_Sentiment']
+        results_df.to_csv('sentiment_evaluation_results.csv', index=False)
+    print(f"\n💾 Detailed results saved to: sentiment_evaluation_results.csv")
+
+    return {
+        'accuracy': accuracy,
+        'precision_macro': metrics['precision_macro'],
+        'recall_macro': metrics['recall_macro'],
+        'f1_macro': metrics['f1_macro'],
+        'f1_positive': f1[0],
+        'f1_negative': f1[1],
+        'f1_neutral': f1[2],
+        'confusion_matrix': metrics['confusion_matrix']
+    }
+
+
+def print_report(accumulator):
+    """Print accuracy, per-class metrics and the confusion matrix; returns the metrics dict"""
+    metrics = accumulator.metrics()
+    precision, recall, f1, support = metrics['precision'], metrics['recall'], metrics['f1'], metrics['support']
+
     # Calculate metrics
     print("\n" + "="*80)
     print("EVALUATION METRICS")
     print("="*80)
-    
+
     # Overall Accuracy
-    accuracy = accuracy_score(y_true, y_pred)
+    accuracy = metrics['accuracy']
     print(f"\n✅ Overall Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
-    
+
     # Precision, Recall, F1-Score per class
-    precision, recall, f1, support = precision_recall_fscore_support(
-        y_true, y_pred, labels=['Positive', 'Negative', 'Neutral'], zero_division=0
-    )
-    
     print(f"\n📈 Per-Class Metrics:")
     print(f"\n{'Class':<15} {'Precision':<12} {'Recall':<12} {'F1-Score':<12} {'Support'}")
     print("-" * 65)
-    
-    for i, label in enumerate(['Positive', 'Negative', 'Neutral']):
+
+    for i, label in enumerate(LABELS):
         print(f"{label:<15} {precision[i]:<12.4f} {recall[i]:<12.4f} {f1[i]:<12.4f} {support[i]}")
-    
+
     # Macro and Weighted Averages
-    precision_macro, recall_macro, f1_macro, _ = precision_recall_fscore_support(
-        y_true, y_pred, average='macro', zero_division=0
-    )
-    precision_weighted, recall_weighted, f1_weighted, _ = precision_recall_fscore_support(
-        y_true, y_pred, average='weighted', zero_division=0
-    )
-    
     print("-" * 65)
-    print(f"{'Macro Avg':<15} {precision_macro:<12.4f} {recall_macro:<12.4f} {f1_macro:<12.4f}")
-    print(f"{'Weighted Avg':<15} {precision_weighted:<12.4f} {recall_weighted:<12.4f} {f1_weighted:<12.4f}")
-    
+    print(f"{'Macro Avg':<15} {metrics['precision_macro']:<12.4f} {metrics['recall_macro']:<12.4f} {metrics['f1_macro']:<12.4f}")
+    print(f"{'Weighted Avg':<15} {metrics['precision_weighted']:<12.4f} {metrics['recall_weighted']:<12.4f} {metrics['f1_weighted']:<12.4f}")
+
     # Confusion Matrix
     print(f"\n📊 Confusion Matrix:")
-    cm = confusion_matrix(y_true, y_pred, labels=['Positive', 'Negative', 'Neutral'])
+    cm = metrics['confusion_matrix']
     print(f"\n{'':>15} {'Predicted'}")
     print(f"{'':>15} {'Positive':<12} {'Negative':<12} {'Neutral':<12}")
     print("-" * 55)
-    for i, true_label in enumerate(['Positive', 'Negative', 'Neutral']):
+    for i, true_label in enumerate(LABELS):
         print(f"{'Actual':<8} {true_label:<6} {cm[i][0]:<12} {cm[i][1]:<12} {cm[i][2]:<12}")
-    
-    # Detailed Classification Report
-    print(f"\n📋 Detailed Classification Report:")
-    print(classification_report(y_true, y_pred, labels=['Positive', 'Negative', 'Neutral'], zero_division=0))
-    
-    # Sample Predictions
-    print(f"\n📝 Sample Predictions (First 10):")
-    print("-" * 80)
-    for idx in range(min(10, len(df))):
-        row = df.iloc[idx]
-        match = "✅" if row['Sentiment'] == row['Predicted_Sentiment'] else "❌"
-        print(f"\n{match} Comment: {row['CommentText'][:70]}...")
-        print(f"   Labeled: {row['Sentiment']:<10} | Predicted: {row['Predicted_Sentiment']:<10}")
-    
-    # Summary Statistics
-    print("\n" + "="*80)
-    print("SUMMARY")
-    print("="*80)
-    print(f"Total Comments Evaluated: {len(df):,}")
-    print(f"Correctly Classified: {int(accuracy * len(df)):,} ({accuracy*100:.2f}%)")
-    print(f"Misclassified: {int((1-accuracy) * len(df)):,} ({(1-accuracy)*100:.2f}%)")
-    print(f"\nBest Performing Class (F1): {['Positive', 'Negative', 'Neutral'][np.argmax(f1)]}")
-    print(f"Worst Performing Class (F1): {['Positive', 'Negative', 'Neutral'][np.argmin(f1)]}")
-    
-    # Save detailed results
-    results_df = df[['CommentText', 'Sentiment', 'Predicted_Sentiment']].copy()
-    results_df['Correct'] = results_df['Sentiment'] == results_df['Predicted_Sentiment']
-    results_df.to_csv('sentiment_evaluation_results.csv', index=False)
-    print(f"\n💾 Detailed results saved to: sentiment_evaluation_results.csv")
-    
-    return {
-        'accuracy': accuracy,
-        'precision_macro': precision_macro,
-        'recall_macro': recall_macro,
-        'f1_macro': f1_macro,
-        'f1_positive': f1[0],
-        'f1_negative': f1[1],
-        'f1_neutral': f1[2],
-        'confusion_matrix': cm
-    }
+
+    return metrics
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Evaluate TextBlob sentiment against the labeled comments dataset')
+    parser.add_argument('--csv', default='youtube_comments_cleaned.csv', help='Labeled comments CSV')
+    parser.add_argument('--sample-size', type=int, default=1000, help='Comments to sample (default: 1000)')
+    parser.add_argument('--full', action='store_true', help='Evaluate every comment instead of a sample')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows read per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for --full evaluation (default: 1)')
+    args = parser.parse_args()
+
     # Run evaluation
-    metrics = evaluate_sentiment_model(sample_size=1000)
-    
+    metrics = evaluate_sentiment_model(args.csv, sample_size=None if args.full else args.sample_size,
+                                       chunksize=args.chunksize, workers=max(1, args.workers))
+
     print("\n" + "="*80)
     print("✨ Evaluation Complete!")
     print("="*80)
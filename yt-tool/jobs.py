@@ -0,0 +1,128 @@
+"""
+Background Job Queue
+Runs long /process pipelines on a local worker pool so request threads
+return immediately with a job ID that can be polled.
+
+Jobs are deduplicated on a caller-supplied key: submitting the same key
+while a matching job is still queued or running returns that job instead
+of starting another one. Finished jobs are kept for result_ttl seconds.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """One submitted unit of work and its outcome"""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == SUCCEEDED:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Bounded worker pool with in-flight deduplication and pollable jobs"""
+
+    def __init__(self, max_workers=4, result_ttl=3600):
+        """
+        Args:
+            max_workers (int): Jobs running at once; the rest wait in the queue
+            result_ttl (int): Seconds a finished job stays available for polling
+        """
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}       # job ID -> Job
+        self._in_flight = {}  # dedupe key -> Job still queued or running
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Enqueue fn(*args, **kwargs), or join an identical job that is still in flight.
+
+        fn returns (result, error); a non-empty error or an exception marks the job failed.
+
+        Returns:
+            tuple: (Job, created) where created is False for a deduplicated submission
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job, False
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job, True
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            result, error = fn(*args, **kwargs)
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            job.status = FAILED if error else SUCCEEDED
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+
+    def get(self, job_id):
+        """Return the Job for an ID, or None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def _purge_expired(self):
+        """Forget finished jobs older than result_ttl (called under lock)"""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """Job counts by status (finished jobs past result_ttl are not counted)"""
+        with self._lock:
+            self._purge_expired()
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
@@ -0,0 +1,105 @@
+"""
+Lazy Dependency Loading
+Heavy third-party packages (google.generativeai, yt-dlp, TextBlob and the
+NLTK stemmer used for ROUGE, pandas, googleapiclient) are imported on
+first use by the code path that needs them instead of when app.py is
+imported, so the server starts accepting requests in a fraction of the time.
+
+Each first import is timed for the startup report, and preload() imports
+the rest in a background thread once the server is up, so the first
+request that needs them usually finds them loaded already.
+
+substitute() swaps a module for a stand-in before it is first loaded; the
+mock backends use it to run the app without Gemini or YouTube.
+"""
+
+import importlib
+import threading
+import time
+
+# Imported lazily across the app, in the order preload() warms them
+HEAVY_MODULES = (
+    'google.generativeai',
+    'textblob.en',
+    'nltk.stem.porter',
+    'pandas',
+    'googleapiclient.discovery',
+    'yt_dlp',
+)
+
+_modules = {}  # module name -> loaded module (or its substitute)
+_substitutes = {}
+_timings = {}  # module name -> (seconds spent importing, who loaded it)
+_hooks = {}  # module name -> callbacks run once after the first import
+
+# One lock for every lazy import: packages with internal circular imports (NLTK,
+# reached through both textblob and nltk.stem) break when two threads import
+# different parts of them at the same time
+_import_lock = threading.RLock()
+
+
+def load(name, source='first use'):
+    """
+    Import a module on first call and return it (a dict lookup afterwards).
+
+    Args:
+        name (str): Dotted module name
+        source (str): Recorded in the timing report ('first use' or 'preload')
+
+    Returns:
+        module: The imported module
+    """
+    module = _modules.get(name)
+    if module is not None:
+        return module
+    with _import_lock:
+        if name not in _modules:
+            start_time = time.perf_counter()
+            module = _substitutes[name] if name in _substitutes else importlib.import_module(name)
+            for hook in _hooks.pop(name, []):
+                hook(module)
+            _timings[name] = (time.perf_counter() - start_time, source)
+            _modules[name] = module
+    return _modules[name]
+
+
+def on_load(name, hook):
+    """Run hook(module) right after the module's first import (or now, if it is loaded already)"""
+    with _import_lock:
+        if name not in _modules:
+            _hooks.setdefault(name, []).append(hook)
+            return
+    hook(_modules[name])
+
+
+def substitute(name, module):
+    """Make load(name) return `module` instead of importing the real package (call before first use)"""
+    with _import_lock:
+        _substitutes[name] = module
+        _modules.pop(name, None)
+
+
+def preload(names=HEAVY_MODULES, delay=0.0):
+    """
+    Import modules in a daemon thread, after `delay` seconds.
+
+    Imports that fail (optional packages not installed) are skipped; the
+    route that needs the module reports the error when it is used.
+    """
+    def run():
+        time.sleep(delay)
+        for name in names:
+            try:
+                load(name, source='preload')
+            except Exception as e:
+                print(f"Preloading {name} failed: {e}")
+
+    threading.Thread(target=run, name='preload-dependencies', daemon=True).start()
+
+
+def import_timings():
+    """Seconds each lazily loaded module took to import and whether a request or the preload paid for it"""
+    return {
+        name: {'seconds': round(seconds, 3), 'loaded_by': source}
+        for name, (seconds, source) in sorted(_timings.items())
+    }
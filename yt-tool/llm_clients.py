@@ -0,0 +1,179 @@
+"""
+Gemini Client Registry
+Keeps one configured GenerativeModel per model name for the life of the
+process and tracks health and latency per model.
+
+genai.GenerativeModel objects share the SDK's default generative client
+(one gRPC channel per process), so borrowing a cached model reuses the
+open connection instead of rebuilding the model, its safety settings and
+its client on every request. warm_up() opens the channel ahead of the
+first request; its outcome is reported separately from real calls.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from lazy_imports import load
+
+# Latencies kept per model for percentile stats
+LATENCY_WINDOW = 200
+
+# A model is reported unhealthy after this many failures in a row
+UNHEALTHY_AFTER_FAILURES = 3
+
+
+class ModelStats:
+    """Call counts, recent latencies and last error for one model"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.calls = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.latencies = deque(maxlen=window)
+        self.last_error = None
+        self.last_error_at = None
+        self.last_success_at = None
+        self.warm_up = None
+
+    def record(self, latency, error=None):
+        self.calls += 1
+        self.latencies.append(latency)
+        if error:
+            self.errors += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            self.last_error_at = time.time()
+        else:
+            self.consecutive_failures = 0
+            self.last_success_at = time.time()
+
+    @property
+    def status(self):
+        if not self.calls:
+            return 'unknown'
+        if self.consecutive_failures >= UNHEALTHY_AFTER_FAILURES:
+            return 'unhealthy'
+        if self.consecutive_failures:
+            return 'degraded'
+        return 'healthy'
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            'status': self.status,
+            'calls': self.calls,
+            'errors': self.errors,
+            'error_rate': round(self.errors / self.calls, 4) if self.calls else 0.0,
+            'latency_avg': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'latency_p50': percentile(0.5),
+            'latency_p95': percentile(0.95),
+            'last_error': self.last_error,
+            'last_error_at': self.last_error_at,
+            'last_success_at': self.last_success_at,
+            'warm_up': self.warm_up
+        }
+
+
+class GeminiClientRegistry:
+    """Process-wide pool of warmed Gemini models with per-model health stats"""
+
+    def __init__(self, safety_settings=None):
+        """
+        Args:
+            safety_settings (list): Safety settings applied to every model
+        """
+        self.safety_settings = safety_settings
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name):
+        """
+        Borrow the shared GenerativeModel for a model name, creating it on first use.
+
+        Returns:
+            genai.GenerativeModel: Safe to use from several threads at once
+        """
+        model = self._models.get(model_name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = load('google.generativeai').GenerativeModel(
+                        model_name=model_name,
+                        safety_settings=self.safety_settings
+                    )
+                    self._models[model_name] = model
+        return model
+
+    def _model_stats(self, model_name):
+        stats = self._stats.get(model_name)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(model_name, ModelStats())
+        return stats
+
+    def record(self, model_name, latency, error=None):
+        """Record the outcome of one call"""
+        stats = self._model_stats(model_name)
+        with self._lock:
+            stats.record(latency, error)
+
+    def record_warm_up(self, model_name, latency, error=None):
+        """Record the warm-up outcome, which does not count as a call or affect the model's status"""
+        stats = self._model_stats(model_name)
+        with self._lock:
+            stats.warm_up = {
+                'ok': error is None,
+                'latency': round(latency, 3),
+                'error': str(error) if error is not None else None,
+                'at': time.time()
+            }
+
+    @contextmanager
+    def track(self, model_name):
+        """Time a call and record it; exceptions are recorded as errors and re-raised"""
+        start_time = time.time()
+        try:
+            yield
+        except Exception as e:
+            self.record(model_name, time.time() - start_time, e)
+            raise
+        self.record(model_name, time.time() - start_time)
+
+    def warm_up(self, model_names):
+        """
+        Create the models and open the API connection in a background thread.
+
+        count_tokens goes through the same generative client as generate_content
+        but is not billed, so it checks the model exists and leaves the shared
+        channel connected. Outcomes are kept in each model's 'warm_up' stats
+        (not its call counts or status), and failures are printed.
+        """
+        def run():
+            for model_name in model_names:
+                start_time = time.time()
+                try:
+                    self.get(model_name).count_tokens('warm up')
+                except Exception as e:
+                    print(f"Warm-up of {model_name} failed: {e}")
+                    self.record_warm_up(model_name, time.time() - start_time, e)
+                else:
+                    self.record_warm_up(model_name, time.time() - start_time)
+
+        thread = threading.Thread(target=run, name='gemini-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Health and latency stats per model"""
+        with self._lock:
+            return {model_name: stats.to_dict() for model_name, stats in sorted(self._stats.items())}
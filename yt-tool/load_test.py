@@ -0,0 +1,237 @@
+"""
+Load Test Harness
+Drives /process, /evaluate and /sentiment-metrics at a target request rate
+and reports throughput and latency percentiles per endpoint.
+
+Requests are sent open-loop: each one is scheduled at a fixed time, and
+its latency is measured from that time, not from when a worker got to it.
+A server that falls behind therefore shows up in the percentiles
+(no coordinated omission) instead of quietly lowering the request rate.
+
+Command line:
+    python load_test.py --mock --rps 20 --duration 30
+    python load_test.py --url http://localhost:5000 --mix process=1 --rps 5 --duration 60 --output report.json
+
+--mock starts the app in this process with MOCK_BACKENDS=true (see
+mock_backends.py), so no Gemini or YouTube access is needed.
+
+/sentiment-metrics reads the labeled dataset, which has no mock. The
+default mix leaves it out when youtube_comments_cleaned.csv is missing or
+only a Git LFS pointer in this checkout.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from metrics_snapshot import dataset_available
+
+ENDPOINTS = ('process', 'evaluate', 'sentiment-metrics')
+DEFAULT_MIX = 'process=8,evaluate=1,sentiment-metrics=1'
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'youtube_comments_cleaned.csv')
+
+
+def parse_mix(spec):
+    """Parse "process=8,evaluate=1" into {endpoint: weight}"""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f'unknown endpoint {name!r} (choose from {", ".join(ENDPOINTS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, q):
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def schedule(mix, rps, duration):
+    """
+    Endpoint for each request slot, interleaved by weight (smooth weighted round robin).
+
+    Returns:
+        list: (offset seconds, endpoint) for every request in the run
+    """
+    total_weight = sum(mix.values())
+    current = {name: 0.0 for name in mix}
+    slots = []
+    for i in range(int(rps * duration)):
+        for name, weight in mix.items():
+            current[name] += weight
+        name = max(current, key=current.get)
+        current[name] -= total_weight
+        slots.append((i / rps, name))
+    return slots
+
+
+class LoadTest:
+    """One run against a base URL"""
+
+    def __init__(self, base_url, videos=20, use_cache=True, analyze_comments=True, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.video_ids = [f'mock{i:07d}' for i in range(videos)]
+        self.use_cache = use_cache
+        self.analyze_comments = analyze_comments
+        self.timeout = timeout
+        self._video_cycle = itertools.cycle(self.video_ids)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.results = []  # (endpoint, latency seconds, ok, status or error)
+
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _next_video(self):
+        with self._lock:
+            return next(self._video_cycle)
+
+    def request(self, endpoint):
+        url = f'https://www.youtube.com/watch?v={self._next_video()}'
+        if endpoint == 'process':
+            return self.session().post(f'{self.base_url}/process', timeout=self.timeout, json={
+                'url': url, 'use_cache': self.use_cache, 'analyze_comments': self.analyze_comments,
+                'transcript': 'omit'
+            })
+        if endpoint == 'evaluate':
+            return self.session().post(f'{self.base_url}/evaluate', timeout=self.timeout, json={
+                'url': url, 'use_cache': self.use_cache, 'fields': 'results.model,results.metrics,results.error'
+            })
+        return self.session().get(f'{self.base_url}/sentiment-metrics', timeout=self.timeout)
+
+    def _run_one(self, scheduled_at, endpoint):
+        try:
+            response = self.request(endpoint)
+            ok, outcome = response.ok, response.status_code
+        except Exception as e:
+            ok, outcome = False, type(e).__name__
+        latency = time.perf_counter() - scheduled_at
+        with self._lock:
+            self.results.append((endpoint, latency, ok, outcome))
+
+    def run(self, mix, rps, duration, concurrency=64):
+        """Send the scheduled requests and wait for all of them; returns the wall-clock seconds"""
+        slots = schedule(mix, rps, duration)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for offset, endpoint in slots:
+                scheduled_at = start + offset
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._run_one, scheduled_at, endpoint)
+        return time.perf_counter() - start
+
+    def report(self, elapsed, rps):
+        """Per-endpoint and overall throughput, error counts and latency percentiles"""
+        groups = {}
+        for endpoint, latency, ok, outcome in self.results:
+            groups.setdefault(endpoint, []).append((latency, ok, outcome))
+        groups['all'] = [(latency, ok, outcome) for _, latency, ok, outcome in self.results]
+
+        report = {'target_rps': rps, 'elapsed_seconds': round(elapsed, 3), 'endpoints': {}}
+        for name, rows in groups.items():
+            latencies = sorted(latency for latency, ok, _ in rows if ok)
+            failures = {}
+            for _, ok, outcome in rows:
+                if not ok:
+                    failures[str(outcome)] = failures.get(str(outcome), 0) + 1
+            report['endpoints'][name] = {
+                'requests': len(rows),
+                'succeeded': len(latencies),
+                'failures': failures,
+                'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None
+            }
+        return report
+
+
+def format_report(report):
+    lines = [f"Target {report['target_rps']:g} req/s, finished in {report['elapsed_seconds']:.1f}s", '',
+             f"{'endpoint':<18}{'requests':>9}{'ok':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"]
+
+    def ms(value):
+        return f'{value * 1000:.0f}' if value is not None else '-'
+
+    for name, row in report['endpoints'].items():
+        lines.append(f"{name:<18}{row['requests']:>9}{row['succeeded']:>7}{row['throughput_rps']:>8}"
+                     f"{ms(row['p50']):>9}{ms(row['p95']):>9}{ms(row['p99']):>9}{ms(row['max']):>9}")
+        if row['failures']:
+            lines.append(f"{'':<18}failures: {row['failures']}")
+    return '\n'.join(lines)
+
+
+def start_mock_server():
+    """Import the app with mock backends and serve it on an ephemeral local port"""
+    os.environ['MOCK_BACKENDS'] = 'true'
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    from werkzeug.serving import make_server
+    import app
+
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /process, /evaluate and /sentiment-metrics')
+    parser.add_argument('--url', help='Base URL of a running server')
+    parser.add_argument('--mock', action='store_true', help='Start the app in-process with mock backends')
+    parser.add_argument('--rps', type=float, default=10, help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic to send')
+    parser.add_argument('--mix', help=f'Endpoint weights (default {DEFAULT_MIX}, without '
+                                      'sentiment-metrics when the dataset is not available)')
+    parser.add_argument('--videos', type=int, default=20, help='Distinct video IDs to cycle through')
+    parser.add_argument('--no-cache', action='store_true', help='Send use_cache=false (every summary is generated)')
+    parser.add_argument('--no-comments', action='store_true', help='Skip comment analysis on /process')
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum requests in flight')
+    parser.add_argument('--output', help='Also write the report as JSON here')
+    args = parser.parse_args()
+
+    if bool(args.url) == args.mock:
+        parser.error('give exactly one of --url or --mock')
+    try:
+        mix = parse_mix(args.mix or DEFAULT_MIX)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.mix and not dataset_available(DATASET_PATH):
+        del mix['sentiment-metrics']
+        print("Dataset not available (missing or a Git LFS pointer): leaving sentiment-metrics out of the mix",
+              file=sys.stderr)
+
+    base_url = start_mock_server() if args.mock else args.url
+    test = LoadTest(base_url, videos=args.videos, use_cache=not args.no_cache,
+                    analyze_comments=not args.no_comments)
+    print(f"Sending {int(args.rps * args.duration)} requests to {base_url} ...", file=sys.stderr)
+    elapsed = test.run(mix, args.rps, args.duration, args.concurrency)
+    report = test.report(elapsed, args.rps)
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Sentiment Metrics Snapshots
+Precomputes the /sentiment-metrics payload and serves it from memory or disk.
+A snapshot is invalidated when the dataset's mtime/size or the classifier
+thresholds change. Requested sample sizes are snapped to the nearest of a
+small set of allowed sizes, each of which gets its own snapshot, and only
+the most recently used snapshots are kept in memory.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import sentiment_engine
+from sentiment_engine import classify_texts
+
+# Bump when the payload layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+DEFAULT_SAMPLE_SIZES = (100, 500, 1000, 5000, 10000, 50000, 100000)
+
+# First line of a file that git-lfs has not replaced with its content yet
+LFS_POINTER_PREFIX = b'version https://git-lfs'
+
+
+def dataset_available(csv_path):
+    """True when the dataset exists and is not an unfetched Git LFS pointer"""
+    try:
+        with open(csv_path, 'rb') as f:
+            return not f.read(len(LFS_POINTER_PREFIX)).startswith(LFS_POINTER_PREFIX)
+    except OSError:
+        return False
+
+
+def build_sentiment_metrics(csv_path, sample_size=1000):
+    """Evaluate TextBlob on a reservoir sample and build the /sentiment-metrics payload"""
+    # Imported here: both pull in pandas, which the rest of the app does not need at startup
+    from comments_dataset import iter_comment_chunks, reservoir_sample
+    from evaluate_sentiment import ConfusionAccumulator
+
+    # Stream the dataset in chunks (only the needed columns) and reservoir-sample it
+    df_sample, total_comments = reservoir_sample(iter_comment_chunks(csv_path), sample_size, seed=42)
+    sample_size = len(df_sample)
+
+    # Apply TextBlob sentiment analysis in one batch
+    df_sample['Predicted_Sentiment'] = classify_texts(df_sample['CommentText'])
+
+    # Calculate metrics from the accumulated confusion matrix
+    metrics = ConfusionAccumulator().update(df_sample['Sentiment'], df_sample['Predicted_Sentiment']).metrics()
+    precision, recall, f1, support = metrics['precision'], metrics['recall'], metrics['f1'], metrics['support']
+    cm = metrics['confusion_matrix']
+
+    def per_class(i):
+        return {
+            'precision': round(float(precision[i]), 4),
+            'recall': round(float(recall[i]), 4),
+            'f1_score': round(float(f1[i]), 4),
+            'support': int(support[i])
+        }
+
+    def confusion_row(i):
+        return {
+            'predicted_positive': int(cm[i][0]),
+            'predicted_negative': int(cm[i][1]),
+            'predicted_neutral': int(cm[i][2])
+        }
+
+    return {
+        'dataset_info': {
+            'total_comments': int(total_comments),
+            'evaluated_comments': sample_size,
+            'sentiment_distribution': {k: int(v) for k, v in df_sample['Sentiment'].value_counts().items()}
+        },
+        'metrics': {
+            'accuracy': round(float(metrics['accuracy']), 4),
+            'precision_macro': round(metrics['precision_macro'], 4),
+            'recall_macro': round(metrics['recall_macro'], 4),
+            'f1_macro': round(metrics['f1_macro'], 4)
+        },
+        'per_class_metrics': {
+            'positive': per_class(0),
+            'negative': per_class(1),
+            'neutral': per_class(2)
+        },
+        'confusion_matrix': {
+            'positive': confusion_row(0),
+            'negative': confusion_row(1),
+            'neutral': confusion_row(2)
+        }
+    }
+
+
+class MetricsSnapshotStore:
+    """Memory + disk store of precomputed metrics payloads"""
+
+    def __init__(self, csv_path, cache_dir, build_fn=build_sentiment_metrics,
+                 sample_sizes=DEFAULT_SAMPLE_SIZES, max_snapshots=4):
+        """
+        Args:
+            csv_path (str): Labeled comments dataset
+            cache_dir (str): Directory for persisted snapshots
+            build_fn (callable): (csv_path, sample_size) -> payload dict
+            sample_sizes (iterable): Sample sizes snapshots are built for
+            max_snapshots (int): Snapshots kept in memory (least recently used dropped first)
+        """
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.build_fn = build_fn
+        self.sample_sizes = sorted(set(sample_sizes))
+        self.max_snapshots = max(1, max_snapshots)
+        self._snapshots = OrderedDict()  # signature -> payload, least recently used first
+        # One build lock per allowed sample size, so the set never grows
+        self._locks = {size: threading.Lock() for size in self.sample_sizes}
+        self._lock = threading.Lock()
+
+    def snap(self, sample_size):
+        """The allowed sample size nearest to the requested one (the larger on a tie)"""
+        return min(self.sample_sizes, key=lambda size: (abs(size - sample_size), -size))
+
+    def signature(self, sample_size):
+        """Identify a snapshot by dataset identity, thresholds and sample size"""
+        st = os.stat(self.csv_path)
+        parts = [
+            SNAPSHOT_VERSION,
+            os.path.abspath(self.csv_path),
+            st.st_mtime_ns,
+            st.st_size,
+            sentiment_engine.POSITIVE_THRESHOLD,
+            sentiment_engine.NEGATIVE_THRESHOLD,
+            sample_size
+        ]
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, signature):
+        return os.path.join(self.cache_dir, f'sentiment-metrics-{signature}.json')
+
+    def _cached(self, signature):
+        with self._lock:
+            payload = self._snapshots.get(signature)
+            if payload is not None:
+                self._snapshots.move_to_end(signature)
+            return payload
+
+    def _remember(self, signature, payload):
+        with self._lock:
+            self._snapshots[signature] = payload
+            self._snapshots.move_to_end(signature)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+    def get(self, sample_size=1000):
+        """
+        Return the payload for the allowed sample size nearest to sample_size,
+        building it only if no valid snapshot exists. Concurrent requests for
+        the same snapshot wait for a single build.
+        """
+        sample_size = self.snap(sample_size)
+        signature = self.signature(sample_size)
+        payload = self._cached(signature)
+        if payload is not None:
+            return payload
+
+        with self._locks[sample_size]:
+            payload = self._cached(signature)
+            if payload is not None:
+                return payload
+
+            path = self._path(signature)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)['payload']
+            except (OSError, ValueError, KeyError):
+                payload = self.build_fn(self.csv_path, sample_size)
+                self._persist(path, signature, sample_size, payload)
+
+            self._remember(signature, payload)
+            return payload
+
+    def _persist(self, path, signature, sample_size, payload):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Drop stale snapshots for this sample size
+            for name in os.listdir(self.cache_dir):
+                if name.startswith('sentiment-metrics-') and name.endswith('.json'):
+                    stale = os.path.join(self.cache_dir, name)
+                    try:
+                        with open(stale, 'r', encoding='utf-8') as f:
+                            if json.load(f).get('sample_size') == sample_size:
+                                os.remove(stale)
+                    except (OSError, ValueError):
+                        pass
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'sample_size': sample_size,
+                           'created': time.time(), 'payload': payload}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def prebuild(self, sample_sizes=(1000,)):
+        """Build snapshots in a background thread so the first request is a plain read"""
+        def run():
+            for sample_size in sample_sizes:
+                try:
+                    self.get(sample_size)
+                except Exception as e:
+                    print(f"Sentiment metrics prebuild failed for sample_size={sample_size}: {e}")
+
+        thread = threading.Thread(target=run, name='metrics-prebuild', daemon=True)
+        thread.start()
+        return thread
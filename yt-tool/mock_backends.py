@@ -0,0 +1,309 @@
+"""
+Mock Backends
+Deterministic local stand-ins for every external service the app calls, so
+it can be run and load-tested without Gemini or YouTube:
+
+- google.generativeai: GenerativeModel returns an extractive "summary" of
+  the prompt (sampled transcript words), streamed in chunks when asked
+- youtube-transcript-api: generated transcripts, seeded by video ID
+- yt-dlp: info dicts whose caption URLs point at a local JSON3 server
+- YouTube Data API: paginated comment threads with a sentiment mix
+
+Each backend has a latency distribution (lognormal around a median) and
+error rates, configured per backend with an env var such as
+    MOCK_GEMINI="latency=1.2,sigma=0.4,errors=0.01,rate_limited=0.02"
+Failures raise errors shaped like the real ones (a .code / .resp.status of
+500 or 429), so retries, rate control and error paths behave as in
+production. Content depends only on the inputs; timings and failures come
+from a random generator seeded with MOCK_SEED.
+
+install() registers the stand-ins with lazy_imports; app.py calls it when
+MOCK_BACKENDS=true.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import types
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import lazy_imports
+
+# Defaults per backend (median latency in seconds, lognormal sigma, failure rates)
+DEFAULT_PROFILES = {
+    'gemini': 'latency=1.0,sigma=0.4,errors=0,rate_limited=0',
+    'transcript': 'latency=0.3,sigma=0.3,errors=0,rate_limited=0',
+    'ytdlp': 'latency=1.5,sigma=0.3,errors=0,rate_limited=0',
+    'data_api': 'latency=0.15,sigma=0.3,errors=0,rate_limited=0',
+}
+
+WORDS = (
+    'video model data learning attention network training results example question answer method '
+    'system people time first important because really know going think right well actually '
+    'transformer layer token sequence summary language research problem solution approach'
+).split()
+
+POSITIVE = ['Great video, really helpful!', 'Loved this explanation, thanks', 'Amazing work, very clear and useful']
+NEGATIVE = ['This was boring and confusing', 'Terrible audio, bad video', 'Awful pacing, I hated the ending']
+NEUTRAL = ['What software do you use?', 'Watching this in 2024', 'Part two when?']
+
+
+class MockAPIError(Exception):
+    """A failed mock call; .code and .resp.status carry the HTTP status like the real SDK errors"""
+
+    def __init__(self, status, message):
+        super().__init__(f'{status} {message}')
+        self.code = status
+        self.resp = types.SimpleNamespace(status=status)
+
+
+class MockProfile:
+    """Latency and failure distribution for one backend"""
+
+    def __init__(self, latency=0.0, sigma=0.0, errors=0.0, rate_limited=0.0, seed=0):
+        self.latency = latency
+        self.sigma = sigma
+        self.errors = errors
+        self.rate_limited = rate_limited
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def parse(cls, spec, seed=0):
+        """Build from "latency=1.0,sigma=0.4,errors=0.01,rate_limited=0.02" (missing keys default to 0)"""
+        values = {}
+        for part in (spec or '').split(','):
+            key, _, value = part.partition('=')
+            if key.strip():
+                values[key.strip()] = float(value)
+        return cls(seed=seed, **values)
+
+    def call(self, name):
+        """Sleep for one sampled latency, then fail with the configured probabilities"""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * math.exp(self._random.gauss(0, self.sigma)) if self.latency else 0.0
+            roll = self._random.random()
+        time.sleep(delay)
+        if roll < self.rate_limited:
+            raise MockAPIError(429, f'Resource has been exhausted (mock {name} quota)')
+        if roll < self.rate_limited + self.errors:
+            raise MockAPIError(500, f'Internal error (mock {name})')
+
+    def to_dict(self):
+        return {'latency': self.latency, 'sigma': self.sigma, 'errors': self.errors,
+                'rate_limited': self.rate_limited, 'calls': self.calls}
+
+
+def _rng_for(*parts):
+    """A random generator seeded only by the inputs, for deterministic content"""
+    return random.Random(hashlib.sha256('|'.join(map(str, parts)).encode('utf-8')).hexdigest())
+
+
+def transcript_words(video_id, words=3000):
+    rng = _rng_for('transcript', video_id)
+    return [rng.choice(WORDS) for _ in range(words)]
+
+
+def mock_comments(video_id, count):
+    """Newest-first comment threads for a video, in commentThreads.list item format"""
+    rng = _rng_for('comments', video_id)
+    newest = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        text = rng.choice(rng.choice((POSITIVE, NEGATIVE, NEUTRAL)))
+        published = (newest - timedelta(minutes=7 * i)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        items.append({
+            'id': f'{video_id}-c{i}',
+            'snippet': {'topLevelComment': {'snippet': {
+                'textDisplay': text,
+                'authorDisplayName': f'user{rng.randint(1, 5000)}',
+                'likeCount': rng.randint(0, 200),
+                'publishedAt': published
+            }}}
+        })
+    return items
+
+
+# --- google.generativeai ---
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+
+class MockGenerativeModel:
+    """Extractive stand-in: samples words of the prompt's transcript, sized by the requested length"""
+
+    def __init__(self, model_name, safety_settings=None, profile=None):
+        self.model_name = model_name
+        self.profile = profile
+
+    @staticmethod
+    def _summarize(prompt):
+        words = prompt.split()
+        target = 40 if 'brief' in prompt else 300 if 'comprehensive' in prompt else 120
+        step = max(1, len(words) // target)
+        return ' '.join(words[::step][:target])
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        self.profile.call('gemini')
+        text = self._summarize(prompt if isinstance(prompt, str) else str(prompt))
+        if not stream:
+            return _Response(text)
+        words = text.split(' ')
+        return iter([_Response(' '.join(words[i:i + 8]) + ' ') for i in range(0, len(words), 8)])
+
+    def count_tokens(self, contents):
+        return types.SimpleNamespace(total_tokens=len(str(contents).split()))
+
+
+def _genai_module(profile):
+    return types.SimpleNamespace(
+        configure=lambda **kwargs: None,
+        GenerativeModel=lambda model_name, safety_settings=None: MockGenerativeModel(
+            model_name, safety_settings, profile),
+        types=types.SimpleNamespace(GenerationConfig=lambda **kwargs: kwargs)
+    )
+
+
+# --- youtube-transcript-api ---
+
+class MockTranscriptApi:
+    """Stand-in for YouTubeTranscriptApi (only get_transcript is used)"""
+
+    profile = None
+    words = 3000
+
+    @classmethod
+    def get_transcript(cls, video_id, languages=None):
+        cls.profile.call('transcript')
+        words = transcript_words(video_id, cls.words)
+        return [
+            {'text': ' '.join(words[i:i + 12]), 'start': i / 2.5, 'duration': 4.8}
+            for i in range(0, len(words), 12)
+        ]
+
+
+# --- yt-dlp (and the caption files it links to) ---
+
+class _CaptionHandler(BaseHTTPRequestHandler):
+    words = 3000
+
+    def do_GET(self):
+        video_id = parse_qs(urlparse(self.path).query).get('v', [''])[0]
+        words = transcript_words(video_id, self.words)
+        events = [{'tStartMs': i * 400, 'segs': [{'utf8': ' '.join(words[i:i + 12])}]}
+                  for i in range(0, len(words), 12)]
+        body = json.dumps({'wireMagic': 'pb3', 'events': events}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockYoutubeDL:
+    """Stand-in for yt_dlp.YoutubeDL: videos get auto captions, playlists list mock video IDs"""
+
+    profile = None
+    caption_url = None
+
+    def __init__(self, opts=None):
+        self.opts = opts or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        self.profile.call('yt-dlp')
+        query = parse_qs(urlparse(url).query)
+        if 'list' in query:
+            count = self.opts.get('playlistend') or 10
+            return {'entries': [{'id': f'mock{i:07d}'} for i in range(count)]}
+        video_id = query.get('v', [''])[0]
+        return {
+            'id': video_id,
+            'subtitles': {},
+            'automatic_captions': {'en': [{'ext': 'json3', 'url': f'{self.caption_url}timedtext?v={video_id}'}]}
+        }
+
+
+# --- YouTube Data API (googleapiclient) ---
+
+class _Request:
+    def __init__(self, profile, comments_per_video, video_id, max_results, page_token):
+        self.profile = profile
+        self.comments_per_video = comments_per_video
+        self.video_id = video_id
+        self.max_results = max_results
+        self.page_token = page_token
+
+    def execute(self):
+        self.profile.call('data-api')
+        start = int(self.page_token or 0)
+        end = min(start + self.max_results, self.comments_per_video)
+        response = {'items': mock_comments(self.video_id, self.comments_per_video)[start:end]}
+        if end < self.comments_per_video:
+            response['nextPageToken'] = str(end)
+        return response
+
+
+class MockYouTubeService:
+    def __init__(self, profile, comments_per_video):
+        self.profile = profile
+        self.comments_per_video = comments_per_video
+
+    def commentThreads(self):
+        return self
+
+    def list(self, part=None, videoId=None, maxResults=20, order=None, textFormat=None, pageToken=None):
+        return _Request(self.profile, self.comments_per_video, videoId, maxResults, pageToken)
+
+
+def install(env=os.environ):
+    """
+    Register the stand-ins with lazy_imports (before the real packages are loaded).
+
+    Returns:
+        dict: backend name -> MockProfile, for stats
+    """
+    seed = int(env.get('MOCK_SEED', 0))
+    profiles = {
+        name: MockProfile.parse(env.get(f'MOCK_{name.upper()}', default), seed=seed + i)
+        for i, (name, default) in enumerate(DEFAULT_PROFILES.items())
+    }
+    words = int(env.get('MOCK_TRANSCRIPT_WORDS', 3000))
+    comments_per_video = int(env.get('MOCK_COMMENTS_PER_VIDEO', 300))
+
+    lazy_imports.substitute('google.generativeai', _genai_module(profiles['gemini']))
+
+    MockTranscriptApi.profile = profiles['transcript']
+    MockTranscriptApi.words = words
+
+    _CaptionHandler.words = words
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CaptionHandler)
+    threading.Thread(target=server.serve_forever, name='mock-captions', daemon=True).start()
+    MockYoutubeDL.profile = profiles['ytdlp']
+    MockYoutubeDL.caption_url = f'http://127.0.0.1:{server.server_port}/'
+    lazy_imports.substitute('yt_dlp', types.SimpleNamespace(YoutubeDL=MockYoutubeDL))
+
+    lazy_imports.substitute('googleapiclient.discovery', types.SimpleNamespace(
+        build=lambda *args, **kwargs: MockYouTubeService(profiles['data_api'], comments_per_video)
+    ))
+    lazy_imports.substitute('googleapiclient.errors', types.SimpleNamespace(HttpError=MockAPIError))
+    return profiles
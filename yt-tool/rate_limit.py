@@ -0,0 +1,381 @@
+"""
+Rate Limiting
+Token buckets that pace calls to upstream hosts (YouTube, the YouTube Data
+API, Gemini) across every request thread in the process, and a controller
+in front of LLM calls that combines per-model token buckets, AIMD adaptive
+concurrency and jittered retries bounded by a deadline.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Upstream hosts the app talks to
+YOUTUBE_HOST = 'www.youtube.com'
+DATA_API_HOST = 'www.googleapis.com'
+GEMINI_HOST = 'generativelanguage.googleapis.com'
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (float): Bucket size (defaults to max(1, rate))
+
+        Raises:
+            ValueError: If rate is not positive or burst is below one token
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        if self.rate <= 0:
+            raise ValueError(f'token bucket rate must be positive, got {rate}')
+        if self.burst < 1:
+            # A bucket that can never hold one token would make acquire() wait forever
+            raise ValueError(f'token bucket burst must be at least 1, got {burst}')
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """
+        Block until `tokens` are available and take them.
+
+        Returns:
+            bool: False if the wait would exceed timeout (nothing is taken)
+
+        Raises:
+            ValueError: If more tokens are asked for than the bucket can hold
+        """
+        if tokens > self.burst:
+            raise ValueError(f'cannot acquire {tokens} tokens from a bucket of {self.burst}')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def parse_rate_limits(spec):
+    """
+    Parse "host=rate[:burst],..." into {host: (rate, burst)}.
+
+    Example: "www.youtube.com=2:5,www.googleapis.com=10"
+
+    A rate of 0 means unlimited.
+
+    Raises:
+        ValueError: If a rate is negative or a burst is below 1
+    """
+    limits = {}
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        host, _, value = part.partition('=')
+        rate, _, burst = value.partition(':')
+        rate, burst = float(rate), float(burst) if burst else None
+        if rate < 0:
+            raise ValueError(f'{host.strip()}: rate must not be negative, got {rate:g}')
+        if burst is not None and burst < 1:
+            raise ValueError(f'{host.strip()}: burst must be at least 1, got {burst:g}')
+        limits[host.strip()] = (rate, burst)
+    return limits
+
+
+class HostRateLimiter:
+    """One token bucket per upstream host; hosts without a limit are not throttled"""
+
+    def __init__(self, limits=None):
+        """
+        Args:
+            limits (dict): host -> (rate per second, burst or None)
+        """
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in (limits or {}).items() if rate > 0}
+
+    def acquire(self, host, timeout=None):
+        """Wait for a slot on host; returns False if it could not be had within timeout"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return True
+        return bucket.acquire(timeout=timeout)
+
+    def limits(self):
+        return {host: {'rate': bucket.rate, 'burst': bucket.burst} for host, bucket in self._buckets.items()}
+
+
+class RateLimitError(Exception):
+    """The call could not be made (or kept failing with 429s) before its deadline"""
+
+
+def error_status(error):
+    """HTTP-style status of an upstream exception (google.api_core and googleapiclient both expose one)"""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    if status is not None:
+        return int(status)
+    if '429' in str(error) or 'quota' in str(error).lower():
+        return 429
+    return None
+
+
+def is_rate_limited(error):
+    return error_status(error) == 429
+
+
+def is_retryable(error):
+    """429s and transient server-side failures are worth another attempt"""
+    return error_status(error) in (429, 500, 503, 504)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by 1/limit per successful call (about +1 per
+    round trip) and halves on a 429 or a latency spike (a call slower than
+    spike_ratio x the moving average). It halves at most once per cooldown
+    (default: one average round trip) so one burst of failures counts once.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, decrease_factor=0.5,
+                 spike_ratio=3.0, cooldown=None):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.spike_ratio = spike_ratio
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.latency_avg = None
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot; returns False if none opened up within timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, latency, overloaded=False, sample_latency=True):
+        """
+        Free a slot and adapt the limit from the call's outcome.
+
+        sample_latency=False leaves the latency out of the moving average and
+        the spike check (streamed responses, whose duration depends on how
+        much text is generated).
+        """
+        with self._condition:
+            self.in_flight -= 1
+            spike = (sample_latency and not overloaded and self.latency_avg is not None
+                     and latency > self.spike_ratio * self.latency_avg)
+            if sample_latency and not overloaded:
+                self.latency_avg = latency if self.latency_avg is None else 0.8 * self.latency_avg + 0.2 * latency
+
+            now = time.monotonic()
+            if overloaded or spike:
+                cooldown = self.cooldown if self.cooldown is not None else (self.latency_avg or 1.0)
+                if now - self._last_decrease >= cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class LLMRateController:
+    """Per-model token bucket + adaptive concurrency + jittered retry, shared by all LLM calls"""
+
+    def __init__(self, default_rpm=60, model_rpm=None, initial_concurrency=4, max_concurrency=16,
+                 max_attempts=5, backoff_base=1.0, backoff_cap=30.0, default_deadline=120.0):
+        """
+        Args:
+            default_rpm (float): Requests per minute for models without their own entry (0 = unlimited)
+            model_rpm (dict): model name -> (requests per minute, burst or None)
+            initial_concurrency (int): Starting concurrency limit per model
+            max_concurrency (int): Ceiling for the adaptive limit
+            max_attempts (int): Attempts per call, including the first
+            backoff_base (float): First retry waits up to this many seconds
+            backoff_cap (float): Longest single backoff
+            default_deadline (float): Deadline in seconds when the caller gives none
+        """
+        self.default_rpm = default_rpm
+        self.model_rpm = model_rpm or {}
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.default_deadline = default_deadline
+        self._buckets = {}
+        self._concurrency = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _state(self, model):
+        with self._lock:
+            if model not in self._concurrency:
+                rpm, burst = self.model_rpm.get(model, (self.default_rpm, None))
+                # Default burst: a tenth of the per-minute budget, so short fan-outs (map-reduce, /evaluate) start at once
+                self._buckets[model] = TokenBucket(rpm / 60.0, burst or max(1.0, rpm / 10.0)) if rpm > 0 else None
+                self._concurrency[model] = AdaptiveConcurrency(self.initial_concurrency, maximum=self.max_concurrency)
+                self._counters[model] = {'calls': 0, 'retries': 0, 'rate_limited': 0, 'gave_up': 0, 'errors': 0}
+            return self._buckets[model], self._concurrency[model], self._counters[model]
+
+    def _count(self, counters, name):
+        with self._lock:
+            counters[name] += 1
+
+    @contextmanager
+    def slot(self, model, deadline=None, sample_latency=True):
+        """
+        Hold one rate-limited, concurrency-limited slot for a single attempt.
+
+        sample_latency=False keeps the attempt's duration out of the adaptive
+        limit's latency signal (see AdaptiveConcurrency.release).
+
+        Raises:
+            RateLimitError: If no slot frees up before the deadline (time.monotonic())
+        """
+        bucket, concurrency, counters = self._state(model)
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+        if bucket is not None and not bucket.acquire(timeout=remaining()):
+            raise RateLimitError(f'request budget for {model} exhausted until the deadline')
+        if not concurrency.acquire(timeout=remaining()):
+            raise RateLimitError(f'no free concurrency slot for {model} before the deadline')
+
+        self._count(counters, 'calls')
+        start_time = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = is_rate_limited(e)
+            if overloaded:
+                self._count(counters, 'rate_limited')
+            raise
+        finally:
+            concurrency.release(time.monotonic() - start_time, overloaded=overloaded,
+                                sample_latency=sample_latency)
+
+    def _backoff(self, counters, error, attempt, deadline):
+        """
+        Seconds to wait before retrying a failed attempt.
+
+        Rate-limited calls that run out of attempts or time count as gave_up;
+        every other error that reaches the caller counts as errors.
+
+        Raises:
+            RateLimitError: Still rate limited and out of attempts or time
+            Exception: `error` itself when it is not worth retrying
+        """
+        if is_retryable(error) and attempt < self.max_attempts:
+            backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+            if time.monotonic() + backoff < deadline:
+                self._count(counters, 'retries')
+                return backoff
+        if is_rate_limited(error):
+            self._count(counters, 'gave_up')
+            raise RateLimitError(str(error)) from error
+        self._count(counters, 'errors')
+        raise error
+        self._count(counters, 'retries')
+        return backoff
+
+    def call(self, model, fn, timeout=None):
+        """
+        Run fn(remaining_seconds) under the model's limits, retrying retryable
+        failures with full-jitter exponential backoff until the deadline.
+
+        Raises:
+            RateLimitError: Deadline reached while waiting or still rate limited
+            Exception: The last non-retryable error from fn
+        """
+        _, _, counters = self._state(model)
+        deadline = time.monotonic() + (timeout or self.default_deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with self.slot(model, deadline):
+                    return fn(max(0.0, deadline - time.monotonic()))
+            except RateLimitError:
+                self._count(counters, 'gave_up')
+                raise
+            except Exception as e:
+                time.sleep(self._backoff(counters, e, attempt, deadline))
+
+    def stream(self, model, fn, timeout=None):
+        """
+        Like call(), for a streamed response: fn(remaining_seconds) returns an
+        iterator of chunks, which are yielded as they arrive.
+
+        The slot is held until the stream is exhausted, fails or is closed, so
+        in-flight streams count against the concurrency limit for their whole
+        length; their durations are not used as a latency signal. Failures
+        before the first chunk are retried like call(); later ones are raised.
+        Callers that may stop early should close() the generator.
+
+        Raises:
+            RateLimitError: Deadline reached while waiting or still rate limited
+            Exception: The last non-retryable error from fn or the stream
+        """
+        _, _, counters = self._state(model)
+        deadline = time.monotonic() + (timeout or self.default_deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            started = False
+            try:
+                with self.slot(model, deadline, sample_latency=False):
+                    for chunk in fn(max(0.0, deadline - time.monotonic())):
+                        started = True
+                        yield chunk
+                return
+            except RateLimitError:
+                self._count(counters, 'gave_up')
+                raise
+            except Exception as e:
+                if started:
+                    self._count(counters, 'errors')
+                    raise
+                time.sleep(self._backoff(counters, e, attempt, deadline))
+
+    def stats(self):
+        """Concurrency limit, in-flight calls and retry/give-up/error counters per model"""
+        with self._lock:
+            return {
+                model: {
+                    'concurrency_limit': round(self._concurrency[model].limit, 2),
+                    'in_flight': self._concurrency[model].in_flight,
+                    'requests_per_minute': round(self._buckets[model].rate * 60, 2) if self._buckets[model] else None,
+                    **self._counters[model]
+                }
+                for model in sorted(self._concurrency)
+            }
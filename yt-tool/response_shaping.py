@@ -0,0 +1,126 @@
+"""
+Response Shaping and Compression
+Trims JSON payloads to the fields a client asks for and compresses large
+responses with brotli or gzip, whichever the client accepts.
+
+Field selection takes dotted paths; a path into a list applies to every
+element, e.g. "video_id,results.model,results.metrics.rouge1" on /evaluate.
+
+brotli is optional: without the package installed only gzip is offered.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressing tiny bodies costs more than it saves
+DEFAULT_MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/html', 'text/css', 'application/javascript')
+
+
+def parse_fields(value):
+    """
+    Normalize a field selection ("a,b.c" or a list) into a list of paths.
+
+    Returns:
+        list: Field paths, or None to keep every field
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = [str(field).strip() for field in value if str(field).strip()]
+    return fields or None
+
+
+def _field_tree(fields):
+    """["a", "b.c", "b.d"] -> {"a": {}, "b": {"c": {}, "d": {}}}; an empty dict means the whole value"""
+    tree = {}
+    for field in fields:
+        node = tree
+        parts = field.split('.')
+        for i, part in enumerate(parts):
+            if part in node and not node[part]:
+                break  # an ancestor is already selected whole
+            node = node.setdefault(part, {})
+            if i == len(parts) - 1:
+                node.clear()
+    return tree
+
+
+def _select(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _select(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def select_fields(payload, fields):
+    """
+    Keep only the selected fields of a JSON-style payload.
+
+    Args:
+        payload (dict): Response payload
+        fields (list): Dotted paths from parse_fields(), or None for everything
+
+    Returns:
+        dict: The trimmed payload (unknown fields are ignored)
+    """
+    if not fields:
+        return payload
+    return _select(payload, _field_tree(fields))
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress_response(response, accept_encodings, min_size=DEFAULT_MIN_SIZE, gzip_level=6, brotli_quality=5):
+    """
+    Compress a buffered Flask response in place if the client accepts it.
+
+    Streamed responses, partial content (206 / Content-Range, whose byte
+    ranges refer to the uncompressed body), already-encoded bodies and
+    bodies under min_size are left alone.
+
+    Args:
+        response (flask.Response): Outgoing response
+        accept_encodings (werkzeug.datastructures.Accept): request.accept_encodings
+        min_size (int): Smallest body worth compressing, in bytes
+
+    Returns:
+        flask.Response: The same response
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Range' in response.headers):
+        return response
+
+    encoding = accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    # The compressed body differs byte-wise, so a strong validator becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=brotli_quality)
+    else:
+        compressed = gzip.compress(body, compresslevel=gzip_level)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
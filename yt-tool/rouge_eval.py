@@ -0,0 +1,219 @@
+"""
+ROUGE Evaluation
+Pure-Python ROUGE-N and ROUGE-L that give the same scores as
+rouge_score.RougeScorer (same tokenizer rules, same Porter stemmer), built
+for scoring many candidate summaries against one reference:
+
+- A reference is tokenized, stemmed and turned into n-gram counts and LCS
+  match masks once (RougeReference) and reused for every candidate.
+- Stems are memoized per word, so repeated vocabulary is stemmed only once
+  across every text the process scores.
+- ROUGE-L uses a bit-parallel LCS (Hyyrö 2004): the reference positions of
+  each token are an int bitmask, so each candidate token costs a few
+  big-int operations instead of a row of the O(m*n) DP table.
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict, namedtuple
+from functools import lru_cache
+
+from lazy_imports import load
+
+# Same shape as rouge_score.scoring.Score
+Score = namedtuple('Score', ['precision', 'recall', 'fmeasure'])
+
+DEFAULT_ROUGE_TYPES = ('rouge1', 'rouge2', 'rougeL')
+
+# rouge_score's tokenizer: lowercase, non-alphanumerics become spaces
+_NON_ALPHANUM_RE = re.compile(r'[^a-z0-9]+')
+_VALID_TOKEN_RE = re.compile(r'^[a-z0-9]+$')
+
+# Like rouge_score, only words longer than this are stemmed
+_MIN_STEM_LENGTH = 3
+
+_stemmer = None
+
+
+def _porter():
+    """NLTK's PorterStemmer (the one rouge_score uses), created on first use"""
+    global _stemmer
+    if _stemmer is None:
+        _stemmer = load('nltk.stem.porter').PorterStemmer()
+    return _stemmer
+
+
+@lru_cache(maxsize=200000)
+def stem(word):
+    """Memoized Porter stem of one lowercase word"""
+    return _porter().stem(word)
+
+
+def tokenize(text, use_stemmer=True):
+    """
+    Tokenize like rouge_score.tokenize.tokenize.
+
+    Args:
+        text (str): Text to tokenize
+        use_stemmer (bool): Porter-stem words longer than 3 characters
+
+    Returns:
+        list: Tokens
+    """
+    tokens = _NON_ALPHANUM_RE.sub(' ', text.lower()).split()
+    if use_stemmer:
+        tokens = [stem(token) if len(token) > _MIN_STEM_LENGTH else token for token in tokens]
+    # Stemming can in principle produce an invalid token; rouge_score drops those
+    return [token for token in tokens if _VALID_TOKEN_RE.match(token)]
+
+
+def fmeasure(precision, recall):
+    if precision + recall > 0:
+        return 2 * precision * recall / (precision + recall)
+    return 0.0
+
+
+def ngram_counts(tokens, n):
+    """Count of each n-gram (tuple of tokens)"""
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _ngram_order(rouge_type):
+    if rouge_type == 'rougeL':
+        return None
+    if re.fullmatch(r'rouge[1-9]', rouge_type):
+        return int(rouge_type[5:])
+    raise ValueError(f'Unsupported ROUGE type: {rouge_type}')
+
+
+def lcs_masks(tokens):
+    """token -> int bitmask of the positions where it occurs"""
+    masks = {}
+    for i, token in enumerate(tokens):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    return masks
+
+
+def lcs_length(masks, length, candidate_tokens):
+    """
+    Length of the longest common subsequence, bit-parallel.
+
+    Args:
+        masks (dict): lcs_masks() of the first sequence
+        length (int): Length of the first sequence
+        candidate_tokens (list): Second sequence
+
+    Returns:
+        int: LCS length
+    """
+    full = (1 << length) - 1
+    v = full
+    for token in candidate_tokens:
+        match = masks.get(token)
+        if match:
+            u = v & match
+            v = ((v + u) | (v - u)) & full
+    return length - v.bit_count()
+
+
+class RougeReference:
+    """A reference text prepared once for scoring many candidates"""
+
+    def __init__(self, tokens, rouge_types=DEFAULT_ROUGE_TYPES, use_stemmer=True):
+        """
+        Args:
+            tokens (list): The reference's tokens (see tokenize())
+            rouge_types (tuple): e.g. ('rouge1', 'rouge2', 'rougeL')
+            use_stemmer (bool): Must match how the tokens were produced
+        """
+        self.rouge_types = tuple(rouge_types)
+        self.use_stemmer = use_stemmer
+        self.tokens = tokens
+        self._ngrams = {}
+        for rouge_type in self.rouge_types:
+            n = _ngram_order(rouge_type)
+            if n is not None and n not in self._ngrams:
+                counts = ngram_counts(tokens, n)
+                self._ngrams[n] = (counts, sum(counts.values()))
+        self._masks = lcs_masks(tokens) if 'rougeL' in self.rouge_types else None
+
+    def score_tokens(self, tokens):
+        """Scores for an already tokenized candidate"""
+        result = {}
+        for rouge_type in self.rouge_types:
+            n = _ngram_order(rouge_type)
+            if n is None:
+                result[rouge_type] = self._score_lcs(tokens)
+            else:
+                result[rouge_type] = self._score_ngrams(n, tokens)
+        return result
+
+    def score(self, candidate):
+        """
+        Score one candidate summary.
+
+        Returns:
+            dict: rouge type -> Score(precision, recall, fmeasure)
+        """
+        return self.score_tokens(tokenize(candidate, self.use_stemmer))
+
+    def score_many(self, candidates):
+        """Score a batch of candidate summaries; returns one score dict per candidate, in order"""
+        return [self.score(candidate) for candidate in candidates]
+
+    def _score_ngrams(self, n, tokens):
+        reference_counts, reference_total = self._ngrams[n]
+        candidate_counts = ngram_counts(tokens, n)
+        overlap = sum(min(count, candidate_counts[ngram]) for ngram, count in reference_counts.items())
+        precision = overlap / max(sum(candidate_counts.values()), 1)
+        recall = overlap / max(reference_total, 1)
+        return Score(precision, recall, fmeasure(precision, recall))
+
+    def _score_lcs(self, tokens):
+        if not self.tokens or not tokens:
+            return Score(0, 0, 0)
+        lcs = lcs_length(self._masks, len(self.tokens), tokens)
+        precision = lcs / len(tokens)
+        recall = lcs / len(self.tokens)
+        return Score(precision, recall, fmeasure(precision, recall))
+
+
+class RougeEvaluator:
+    """
+    Drop-in for rouge_score.RougeScorer.score() that caches prepared references.
+
+    Prepared references are kept in a small LRU keyed by text, so scoring
+    several summaries against the same reference (one /evaluate request, or
+    repeat requests for a video) tokenizes and stems it only once.
+    """
+
+    def __init__(self, rouge_types=DEFAULT_ROUGE_TYPES, use_stemmer=True, cache_entries=32):
+        for rouge_type in rouge_types:
+            _ngram_order(rouge_type)
+        self.rouge_types = tuple(rouge_types)
+        self.use_stemmer = use_stemmer
+        self.cache_entries = cache_entries
+        self._references = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reference(self, text):
+        """The prepared RougeReference for a reference text"""
+        with self._lock:
+            reference = self._references.get(text)
+            if reference is not None:
+                self._references.move_to_end(text)
+                return reference
+        reference = RougeReference(tokenize(text, self.use_stemmer), self.rouge_types, self.use_stemmer)
+        with self._lock:
+            self._references[text] = reference
+            while len(self._references) > self.cache_entries:
+                self._references.popitem(last=False)
+        return reference
+
+    def score(self, target, prediction):
+        """Same arguments and result as rouge_score.RougeScorer.score"""
+        return self.reference(target).score(prediction)
+
+    def score_many(self, target, predictions):
+        """Score several predictions against one target"""
+        return self.reference(target).score_many(predictions)
@@ -0,0 +1,252 @@
+"""
+Batch Sentiment Engine
+Scores lists or Series of comments with the TextBlob (pattern) lexicon
+and applies the positive/negative/neutral thresholds in bulk.
+
+Shared by app.py and evaluate_sentiment.py so both classify comments
+exactly the same way.
+
+TextBlob (and the NLTK it imports) is loaded on the first comment scored,
+and pandas is only touched when the caller passes a Series, so importing
+this module stays cheap for the web app.
+"""
+
+import sys
+
+import numpy as np
+
+from lazy_imports import load
+
+# Polarity thresholds used everywhere in the project
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+LABELS = ('Positive', 'Negative', 'Neutral')
+
+# Fixed polarity bins over [-1, 1] so histograms from different batches can be merged
+HISTOGRAM_BINS = 20
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# text -> polarity lookup table; bounded so long-running servers don't grow without limit
+_POLARITY_CACHE_MAX = 200000
+_polarity_cache = {}
+_pattern_sentiment = None
+
+
+def _lexicon():
+    """The pattern sentiment analyzer, importing TextBlob on first use"""
+    global _pattern_sentiment
+    if _pattern_sentiment is None:
+        _pattern_sentiment = load('textblob.en').sentiment
+    return _pattern_sentiment
+
+
+def _is_series(obj):
+    # Only a caller that imported pandas can hand us a Series
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(obj, pd.Series)
+
+
+def warm_up():
+    """Load the pattern sentiment lexicon now instead of on the first request"""
+    _lexicon().load()
+
+
+def polarity(text):
+    """
+    Polarity of a single text, identical to TextBlob(text).sentiment.polarity.
+
+    TextBlob's PatternAnalyzer just calls the pattern lexicon on the raw
+    string, so calling it directly skips building a TextBlob per comment.
+    Non-string input (e.g. NaN from a CSV) scores 0.0.
+    """
+    if not isinstance(text, str):
+        return 0.0
+    score = _polarity_cache.get(text)
+    if score is None:
+        score = _lexicon()(text)[0]
+        if len(_polarity_cache) >= _POLARITY_CACHE_MAX:
+            _polarity_cache.clear()
+        _polarity_cache[text] = score
+    return score
+
+
+def score_polarities(texts):
+    """
+    Score many texts at once; duplicate texts are only scored once.
+
+    Args:
+        texts (list or pd.Series): Comment texts
+
+    Returns:
+        np.ndarray: float64 polarity per input text, in input order
+    """
+    values = texts.tolist() if _is_series(texts) else list(texts)
+    scores = {}
+    for text in values:
+        key = text if isinstance(text, str) else None
+        if key not in scores:
+            scores[key] = polarity(text)
+    return np.fromiter(
+        (scores[text if isinstance(text, str) else None] for text in values),
+        dtype=np.float64,
+        count=len(values)
+    )
+
+
+def classify_polarities(polarities, lowercase=False):
+    """
+    Apply the 0.1 / -0.1 thresholds to an array of polarities.
+
+    Args:
+        polarities (array-like): Polarity scores
+        lowercase (bool): Return 'positive' instead of 'Positive' (app.py style)
+
+    Returns:
+        np.ndarray: Label per polarity
+    """
+    polarities = np.asarray(polarities, dtype=np.float64)
+    positive, negative, neutral = (label.lower() for label in LABELS) if lowercase else LABELS
+    return np.select(
+        [polarities > POSITIVE_THRESHOLD, polarities < NEGATIVE_THRESHOLD],
+        [positive, negative],
+        default=neutral
+    )
+
+
+def classify_texts(texts, lowercase=False):
+    """
+    Score and label many texts in one call.
+
+    Returns:
+        pd.Series with the same index when given a Series, otherwise np.ndarray
+    """
+    labels = classify_polarities(score_polarities(texts), lowercase=lowercase)
+    if _is_series(texts):
+        return sys.modules['pandas'].Series(labels, index=texts.index, name=texts.name)
+    return labels
+
+
+class SentimentAccumulator:
+    """
+    Streaming, mergeable sentiment statistics.
+
+    Label counts, polarity sum and a fixed-bin polarity histogram are updated
+    in a single pass, one batch at a time. Accumulators built over separate
+    pages or shards merge by adding their counters. Percentiles come from the
+    histogram (interpolated within a bin, so accurate to 2 / HISTOGRAM_BINS).
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self.counts = {label.lower(): 0 for label in LABELS}
+        self.total = 0
+        self.polarity_sum = 0.0
+        self.min_polarity = None
+        self.max_polarity = None
+        self.histogram = np.zeros(bins, dtype=np.int64)
+
+    def _bin_index(self, polarities):
+        index = np.floor((polarities + 1.0) / 2.0 * self.bins).astype(np.int64)
+        return np.clip(index, 0, self.bins - 1)
+
+    def update(self, labels, polarities):
+        """
+        Add a batch of classified comments.
+
+        Args:
+            labels (array-like): Lowercase labels ('positive', 'negative', 'neutral')
+            polarities (array-like): Polarity per comment
+
+        Returns:
+            SentimentAccumulator: self, for chaining
+        """
+        polarities = np.asarray(polarities, dtype=np.float64)
+        if not len(polarities):
+            return self
+        values, counts = np.unique(np.asarray(labels), return_counts=True)
+        for label, count in zip(values.tolist(), counts.tolist()):
+            self.counts[label] = self.counts.get(label, 0) + count
+        self.total += len(polarities)
+        self.polarity_sum += float(polarities.sum())
+        low, high = float(polarities.min()), float(polarities.max())
+        self.min_polarity = low if self.min_polarity is None else min(self.min_polarity, low)
+        self.max_polarity = high if self.max_polarity is None else max(self.max_polarity, high)
+        self.histogram += np.bincount(self._bin_index(polarities), minlength=self.bins)
+        return self
+
+    def add(self, label, polarity):
+        """Add a single classified comment"""
+        return self.update([label], [polarity])
+
+    def merge(self, other):
+        """Fold another accumulator (same number of bins) into this one"""
+        for label, count in other.counts.items():
+            self.counts[label] = self.counts.get(label, 0) + count
+        self.total += other.total
+        self.polarity_sum += other.polarity_sum
+        if other.min_polarity is not None:
+            self.min_polarity = other.min_polarity if self.min_polarity is None else min(self.min_polarity, other.min_polarity)
+            self.max_polarity = other.max_polarity if self.max_polarity is None else max(self.max_polarity, other.max_polarity)
+        self.histogram += other.histogram
+        return self
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) of polarity from the histogram"""
+        if not self.total:
+            return None
+        target = q / 100.0 * self.total
+        cumulative = np.cumsum(self.histogram)
+        index = min(int(np.searchsorted(cumulative, target)), self.bins - 1)
+        before = cumulative[index - 1] if index else 0
+        in_bin = self.histogram[index]
+        fraction = (target - before) / in_bin if in_bin else 0.0
+        width = 2.0 / self.bins
+        value = -1.0 + (index + fraction) * width
+        return float(min(max(value, self.min_polarity), self.max_polarity))
+
+    def statistics(self):
+        """The analysis 'statistics' block: counts, percents, average, percentiles and histogram"""
+        total = self.total
+        positive, negative, neutral = self.counts['positive'], self.counts['negative'], self.counts['neutral']
+        edges = np.linspace(-1.0, 1.0, self.bins + 1)
+        return {
+            'total': total,
+            'positive': positive,
+            'negative': negative,
+            'neutral': neutral,
+            'positive_percent': round((positive / total) * 100, 1) if total > 0 else 0,
+            'negative_percent': round((negative / total) * 100, 1) if total > 0 else 0,
+            'neutral_percent': round((neutral / total) * 100, 1) if total > 0 else 0,
+            'average_polarity': round(self.polarity_sum / total, 3) if total > 0 else 0,
+            'polarity_percentiles': {
+                f'p{q}': round(self.percentile(q), 3) if total > 0 else None for q in PERCENTILES
+            },
+            'polarity_histogram': {
+                'edges': [round(edge, 3) for edge in edges.tolist()],
+                'counts': self.histogram.tolist()
+            }
+        }
+
+    def to_dict(self):
+        """JSON-serializable state (see from_dict)"""
+        return {
+            'bins': self.bins,
+            'counts': self.counts,
+            'total': self.total,
+            'polarity_sum': self.polarity_sum,
+            'min_polarity': self.min_polarity,
+            'max_polarity': self.max_polarity,
+            'histogram': self.histogram.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls(bins=data['bins'])
+        accumulator.counts.update(data['counts'])
+        accumulator.total = data['total']
+        accumulator.polarity_sum = data['polarity_sum']
+        accumulator.min_polarity = data['min_polarity']
+        accumulator.max_polarity = data['max_polarity']
+        accumulator.histogram = np.asarray(data['histogram'], dtype=np.int64)
+        return accumulator
@@ -0,0 +1,310 @@
+"""
+Subtitle Fetcher (yt-dlp fallback)
+Fetches English subtitles through yt-dlp when youtube-transcript-api fails,
+without paying the full setup cost on every call:
+
+- A pool of YoutubeDL instances owned by the fetcher: a call checks one
+  out and returns it afterwards (YoutubeDL keeps per-download state, so
+  two calls never use one at the same time). Instances outlive the
+  request and stage threads that borrow them.
+- A short-lived cache of the subtitle tracks found by extract_info, so a
+  retry or a second language skips the metadata round trip.
+- One pooled requests.Session for the subtitle downloads (keep-alive).
+- A streaming JSON3 parser that decodes caption events while the file is
+  still downloading, instead of loading and walking the whole document.
+
+Fixture mode reads <video_id>.info.json files (as written by
+`yt-dlp --write-info-json --skip-download`) from a directory instead of
+calling YouTube, and serves the directory on a local HTTP server, so the
+download and parsing path can be exercised offline. Subtitle URLs in the
+fixtures may be relative (e.g. "abc.en.json3").
+
+Command line:
+    python subtitle_fetcher.py VIDEO_ID [--fixtures DIR] [--record DIR]
+"""
+
+import argparse
+import codecs
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lazy_imports import load
+from rate_limit import YOUTUBE_HOST
+from telemetry import span
+
+YDL_OPTS = {
+    'skip_download': True,
+    'writesubtitles': True,
+    'writeautomaticsub': True,
+    'subtitlesformat': 'json3',
+    'quiet': True,
+    'no_warnings': True,
+}
+
+# Bytes read from the subtitle response per parser step
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json3_segments(chunks):
+    """
+    Yield the text of every caption segment in a JSON3 document, in order.
+
+    Events are decoded one at a time as soon as they are complete, so
+    parsing overlaps with the download and the whole document is never
+    held in memory as Python objects.
+
+    Args:
+        chunks (iterable): The document as bytes chunks
+
+    Yields:
+        str: Each segment's 'utf8' text
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    in_events = False
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        if not in_events:
+            key = buffer.find('"events"')
+            bracket = buffer.find('[', key) if key >= 0 else -1
+            if bracket < 0:
+                continue
+            buffer = buffer[bracket + 1:]
+            in_events = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                event, pos_end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # incomplete event, wait for more data
+            for seg in event.get('segs', ()):
+                if 'utf8' in seg:
+                    yield seg['utf8']
+            pos = pos_end
+        buffer = buffer[pos:]
+
+
+def pick_track(tracks):
+    """The json3 track from a list of subtitle formats (the first one if there is none)"""
+    for track in tracks:
+        if track.get('ext') == 'json3':
+            return track
+    return tracks[0] if tracks else None
+
+
+class FixtureServer:
+    """Serves a fixture directory over HTTP on 127.0.0.1 in a daemon thread"""
+
+    def __init__(self, directory, port=0):
+        handler = partial(_QuietHandler, directory=directory)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_port}/'
+        threading.Thread(target=self.httpd.serve_forever, name='subtitle-fixtures', daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class SubtitleFetcher:
+    """yt-dlp subtitle fallback with reused YoutubeDL instances, cached track lists and pooled downloads"""
+
+    def __init__(self, rate_limiter=None, info_cache_ttl=1800, info_cache_entries=512, pool_size=10,
+                 timeout=30, fixture_dir=None):
+        """
+        Args:
+            rate_limiter (HostRateLimiter): Paces extract_info calls to YouTube
+            info_cache_ttl (int): Seconds a video's subtitle tracks are reused
+                (the track URLs are signed and expire after a few hours)
+            info_cache_entries (int): Videos kept in the track cache
+            pool_size (int): Keep-alive connections kept per host
+            timeout (float): Seconds to wait on a subtitle download
+            fixture_dir (str): Serve videos from local fixtures instead of YouTube
+        """
+        self.rate_limiter = rate_limiter
+        self.info_cache_ttl = info_cache_ttl
+        self.info_cache_entries = info_cache_entries
+        self.timeout = timeout
+        self.fixture_dir = fixture_dir
+        self.fixture_server = FixtureServer(fixture_dir) if fixture_dir else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.hits = 0
+        self.misses = 0
+        self._ydl_pool = queue.LifoQueue()  # idle YoutubeDL instances, most recently used first
+        self.ydl_created = 0
+        self._info = OrderedDict()  # (video_id, lang) -> (fetched_at, {'subtitles': [...], 'automatic_captions': [...]})
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def ydl(self):
+        """Check out an idle YoutubeDL from the pool (creating one only when none is idle)"""
+        try:
+            ydl = self._ydl_pool.get_nowait()
+        except queue.Empty:
+            ydl = load('yt_dlp').YoutubeDL(YDL_OPTS)
+            with self._lock:
+                self.ydl_created += 1
+        try:
+            yield ydl
+        finally:
+            self._ydl_pool.put(ydl)
+
+    def _extract_info(self, video_id):
+        if self.fixture_dir:
+            with open(os.path.join(self.fixture_dir, f'{video_id}.info.json'), encoding='utf-8') as f:
+                return json.load(f)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(YOUTUBE_HOST)
+        with span('ytdlp_extract_info'):
+            with self.ydl() as ydl:
+                return ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+
+    def tracks(self, video_id, lang='en', use_cache=True):
+        """
+        Manual and automatic subtitle tracks for one language, from cache or extract_info.
+
+        Returns:
+            dict: {'subtitles': [formats], 'automatic_captions': [formats]}
+        """
+        key = (video_id, lang)
+        if use_cache:
+            with self._lock:
+                entry = self._info.get(key)
+                if entry is not None and time.time() - entry[0] <= self.info_cache_ttl:
+                    self._info.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+
+        info = self._extract_info(video_id)
+        # Keep only this language's track lists, not the whole (large) info dict
+        tracks = {
+            'subtitles': (info.get('subtitles') or {}).get(lang) or [],
+            'automatic_captions': (info.get('automatic_captions') or {}).get(lang) or []
+        }
+        with self._lock:
+            self._info[key] = (time.time(), tracks)
+            self._info.move_to_end(key)
+            while len(self._info) > self.info_cache_entries:
+                self._info.popitem(last=False)
+        return tracks
+
+    def download_text(self, url):
+        """Stream a JSON3 subtitle file and join its segments like the original parser did"""
+        if self.fixture_server is not None:
+            url = urljoin(self.fixture_server.base_url, url)
+        with span('subtitle_download'):
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                return ' '.join(iter_json3_segments(response.iter_content(CHUNK_SIZE)))
+
+    def fetch(self, video_id, lang='en'):
+        """
+        Subtitle text for a video, preferring manual subtitles over automatic captions.
+
+        A download that fails with cached tracks is retried once with fresh
+        ones, since the cached URLs may have expired.
+
+        Returns:
+            tuple: (transcript text, error message)
+        """
+        try:
+            for use_cache in (True, False):
+                tracks = self.tracks(video_id, lang, use_cache=use_cache)
+                track = pick_track(tracks['subtitles']) or pick_track(tracks['automatic_captions'])
+                if track is None:
+                    return None, "No subtitles found for this video."
+                try:
+                    return self.download_text(track['url']), None
+                except requests.HTTPError:
+                    if not use_cache:
+                        raise
+            return None, "No subtitles found for this video."
+        except Exception as e:
+            return None, f"yt-dlp error: {str(e)}"
+
+    def clear(self):
+        with self._lock:
+            self._info.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._info), 'hits': self.hits, 'misses': self.misses,
+                    'ydl_instances': self.ydl_created}
+
+
+def record_fixture(video_id, directory, lang='en'):
+    """Save a video's info (subtitle tracks only) and its JSON3 subtitles as fixtures"""
+    fetcher = SubtitleFetcher()
+    tracks = fetcher.tracks(video_id, lang, use_cache=False)
+    info = {'id': video_id, 'subtitles': {}, 'automatic_captions': {}}
+    for kind in ('subtitles', 'automatic_captions'):
+        track = pick_track(tracks[kind])
+        if track is None:
+            continue
+        filename = f'{video_id}.{lang}.{kind}.json3'
+        response = fetcher.session.get(track['url'], timeout=fetcher.timeout)
+        response.raise_for_status()
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(response.content)
+        info[kind][lang] = [{'ext': 'json3', 'url': filename}]
+    with open(os.path.join(directory, f'{video_id}.info.json'), 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch a video transcript through the yt-dlp subtitle fallback')
+    parser.add_argument('video_id')
+    parser.add_argument('--lang', default='en')
+    parser.add_argument('--fixtures', help='Read <video_id>.info.json and subtitles from this directory')
+    parser.add_argument('--record', help='Save the video as fixtures in this directory instead')
+    args = parser.parse_args()
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        record_fixture(args.video_id, args.record, args.lang)
+        print(f"Saved fixtures for {args.video_id} in {args.record}", file=sys.stderr)
+        return
+
+    fetcher = SubtitleFetcher(fixture_dir=args.fixtures)
+    for attempt in ('cold', 'warm'):
+        start_time = time.perf_counter()
+        text, error = fetcher.fetch(args.video_id, args.lang)
+        print(f"{attempt}: {time.perf_counter() - start_time:.3f}s", file=sys.stderr)
+        if error:
+            print(f"Error: {error}", file=sys.stderr)
+            sys.exit(1)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Summary Result Cache
+Memoizes Gemini summaries keyed by (transcript hash, model, length,
+temperature, preprocessing) with an in-process LRU tier in front of an
+on-disk SQLite tier.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_summary_key(transcript, model_name, length, temperature, apply_preprocessing, chunking=None):
+    """
+    Build the cache key for one summarization request.
+
+    chunking holds the settings that change how long transcripts are
+    summarized (chunk tokens, overlap, reduce strategy), so changing them
+    does not serve summaries made with the old ones.
+    """
+    transcript_hash = hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+    params = json.dumps([transcript_hash, model_name, length, round(float(temperature), 3), bool(apply_preprocessing),
+                         list(chunking) if chunking else None])
+    return hashlib.sha256(params.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """Two-tier (memory LRU + SQLite) summary cache"""
+
+    def __init__(self, db_path, memory_entries=256, disk_entries=5000,
+                 ttl_seconds=30 * 24 * 3600, deterministic_only=False):
+        """
+        Args:
+            db_path (str): SQLite file for the on-disk tier (None keeps the cache in memory only)
+            memory_entries (int): Capacity of the in-process LRU tier (0 disables the cache)
+            disk_entries (int): Maximum rows kept on disk; least recently used rows are evicted
+            ttl_seconds (int): Entries older than this are treated as missing
+            deterministic_only (bool): Only cache temperature 0 requests, since
+                other temperatures are expected to vary between calls
+        """
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.deterministic_only = deterministic_only
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def enabled(self):
+        return self.memory_entries > 0 and self.ttl_seconds > 0
+
+    def should_cache(self, temperature):
+        """Whether a request with this temperature is eligible for caching"""
+        if not self.enabled:
+            return False
+        return not (self.deterministic_only and float(temperature) > 0)
+
+    def _db(self):
+        """Open the SQLite tier lazily (called under lock)"""
+        if self._conn is None and self.db_path:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS summaries ('
+                'key TEXT PRIMARY KEY, summary TEXT NOT NULL, '
+                'created REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_access ON summaries(last_access)')
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key, summary, created):
+        self._memory[key] = (summary, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a cached summary.
+
+        Returns:
+            str: Cached summary, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                summary, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return summary
+                del self._memory[key]
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute('SELECT summary, created FROM summaries WHERE key = ?', (key,)).fetchone()
+                    if row is not None and now - row[1] <= self.ttl_seconds:
+                        conn.execute('UPDATE summaries SET last_access = ? WHERE key = ?', (now, key))
+                        conn.commit()
+                        self._remember(key, row[0], row[1])
+                        self.hits += 1
+                        return row[0]
+                    if row is not None:
+                        conn.execute('DELETE FROM summaries WHERE key = ?', (key,))
+                        conn.commit()
+                except sqlite3.Error:
+                    pass
+
+            self.misses += 1
+            return None
+
+    def set(self, key, summary):
+        """Store a summary in both tiers"""
+        if not self.enabled or not summary:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._remember(key, summary, now)
+
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO summaries (key, summary, created, last_access) VALUES (?, ?, ?, ?)',
+                    (key, summary, now, now)
+                )
+                # Evict expired rows, then least recently used rows beyond the cap
+                conn.execute('DELETE FROM summaries WHERE created < ?', (now - self.ttl_seconds,))
+                conn.execute(
+                    'DELETE FROM summaries WHERE key IN ('
+                    'SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                    (self.disk_entries,)
+                )
+                conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        """Remove every cached summary from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute('DELETE FROM summaries')
+                conn.commit()
+
+    def stats(self):
+        with self._lock:
+            disk_rows = 0
+            conn = self._db()
+            if conn is not None:
+                disk_rows = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+            return {
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_rows,
+                'hits': self.hits,
+                'misses': self.misses
+            }
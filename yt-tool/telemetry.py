@@ -0,0 +1,250 @@
+"""
+Request Tracing and Metrics
+Records timed spans for each pipeline stage, keeps in-process latency
+histograms and counters, and renders them in the Prometheus text format
+for GET /metrics.
+
+A trace is started per request; spans opened while it is active (including
+in worker threads started with contextvars.copy_context()) are attached to
+it and reported in the response's Server-Timing header. Every span is also
+observed in the yt_tool_stage_duration_seconds histogram, traced or not.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Seconds; wide enough for both sub-millisecond cache hits and multi-minute summaries
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label set"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=None):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{_format_labels(key + (("le", _format_value(bound)),))} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(key + (("le", "+Inf"),))} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {series[-2]!r}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {series[-1]}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label set"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=None, amount=1):
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Histograms and counters plus collector callbacks for values owned elsewhere (cache stats)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def counter(self, name, help_text):
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def register_collector(self, fn):
+        """
+        Add a callback run at scrape time.
+
+        fn() returns an iterable of (name, type, help, [(labels dict, value), ...])
+        with type 'counter' or 'gauge'.
+        """
+        self._collectors.append(fn)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f'{name}{_format_labels(_label_key(labels))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    'yt_tool_stage_duration_seconds', 'Duration of pipeline stages (spans) in seconds')
+stage_errors = registry.counter(
+    'yt_tool_stage_errors_total', 'Spans that ended with an exception')
+request_duration = registry.histogram(
+    'yt_tool_http_request_duration_seconds', 'Time to produce the HTTP response (streams: until headers)')
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans = []  # (name, start offset, duration, error) - appended from any thread
+
+    def server_timing(self):
+        """Server-Timing header value: one entry per stage name, durations summed, in ms"""
+        totals = {}
+        for name, _, duration, _ in list(self.spans):
+            totals[name] = totals.get(name, 0.0) + duration
+        return ', '.join(f'{name};dur={duration * 1000:.1f}' for name, duration in totals.items())
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'spans': [
+                {'name': name, 'start': round(start, 4), 'duration': round(duration, 4), 'error': error}
+                for name, start, duration, error in list(self.spans)
+            ]
+        }
+
+
+def start_trace(name):
+    """Begin a trace in the current context; returns (trace, token for end_trace)"""
+    trace = Trace(name)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name):
+    """Time a block as a stage: observed in the histogram and added to the active trace"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stage_duration.observe(duration, {'stage': name})
+        if error and error != 'GeneratorExit':
+            stage_errors.inc({'stage': name})
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((name, start - trace.start, duration, error))
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_collector(caches):
+    """
+    Collector exposing hits, misses and hit ratio for objects with a stats() dict.
+
+    Args:
+        caches (dict): cache label -> object whose stats() has 'hits' and 'misses'
+    """
+    def collect():
+        hits, misses, ratios = [], [], []
+        for label, cache in caches.items():
+            stats = cache.stats()
+            h, m = stats.get('hits', 0), stats.get('misses', 0)
+            hits.append(({'cache': label}, h))
+            misses.append(({'cache': label}, m))
+            ratios.append(({'cache': label}, round(h / (h + m), 4) if h + m else None))
+        return [
+            ('yt_tool_cache_hits_total', 'counter', 'Cache lookups served from cache', hits),
+            ('yt_tool_cache_misses_total', 'counter', 'Cache lookups that missed', misses),
+            ('yt_tool_cache_hit_ratio', 'gauge', 'hits / (hits + misses) since start', ratios),
+        ]
+    return collect
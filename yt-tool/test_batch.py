@@ -0,0 +1,104 @@
+"""
+Tests for batch: completion-order NDJSON records, per-video error lines and
+trace propagation to the worker threads, for run_batch and /process/batch.
+
+Run with: python -m pytest test_batch.py
+"""
+
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+import telemetry
+from batch import run_batch
+
+DELAYS = {'slow': 0.15, 'fails': 0.05, 'raises': 0.1, 'fast': 0.0}
+
+
+def stub_pipeline(video_id):
+    """Finishes in DELAYS order; 'fails' returns an error and 'raises' raises"""
+    time.sleep(DELAYS[video_id])
+    with telemetry.span(f'video_{video_id}'):
+        if video_id == 'fails':
+            return None, 'No subtitles found for this video.'
+        if video_id == 'raises':
+            raise RuntimeError('quota exceeded')
+        return {'video_id': video_id, 'summary': f'summary of {video_id}'}, None
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_records_arrive_in_completion_order_with_their_index(executor):
+    records = list(run_batch(['slow', 'fails', 'slow', 'raises', 'fast'], stub_pipeline, executor))
+
+    # Duplicates run once; the index is the position among the distinct videos
+    assert [(r['index'], r['video_id']) for r in records] == [(3, 'fast'), (1, 'fails'), (2, 'raises'), (0, 'slow')]
+    by_id = {r['video_id']: r for r in records}
+    assert by_id['slow']['status'] == 'ok'
+    assert by_id['slow']['result'] == {'video_id': 'slow', 'summary': 'summary of slow'}
+    assert by_id['slow']['elapsed'] >= DELAYS['slow']
+    assert by_id['fails'] == {'index': 1, 'video_id': 'fails', 'status': 'error',
+                              'error': 'No subtitles found for this video.', 'elapsed': by_id['fails']['elapsed']}
+    assert by_id['raises']['status'] == 'error' and by_id['raises']['error'] == 'quota exceeded'
+    assert 'result' not in by_id['raises']
+
+
+def test_videos_join_the_callers_trace(executor):
+    trace, token = telemetry.start_trace('batch')
+    try:
+        records = list(run_batch(['fast', 'fails'], stub_pipeline, executor))
+    finally:
+        telemetry.end_trace(token)
+
+    assert len(records) == 2
+    assert sorted(name for name, _, _, _ in trace.spans) == ['video_fails', 'video_fast']
+
+
+def test_videos_run_in_the_given_context(executor):
+    trace, token = telemetry.start_trace('batch')
+    context = contextvars.copy_context()
+    telemetry.end_trace(token)
+
+    # The generator is consumed with no trace active, as a streamed response is
+    assert telemetry.current_trace() is None
+    list(run_batch(['fast'], stub_pipeline, executor, context))
+    assert [name for name, _, _, _ in trace.spans] == ['video_fast']
+
+
+def test_batch_endpoint_streams_ndjson(monkeypatch):
+    seen = []
+
+    def process_pipeline(video_id, **params):
+        seen.append((telemetry.current_trace(), threading.current_thread().name))
+        result, error = stub_pipeline(video_id)
+        return result, error, 400 if error else 200
+
+    monkeypatch.setattr(app, 'process_pipeline', process_pipeline)
+    monkeypatch.setattr(app, 'extract_video_id', lambda url: url)
+
+    response = app.app.test_client().post('/process/batch', json={
+        'urls': ['slow', 'fails', 'fast'], 'fields': 'video_id'
+    })
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert lines[0] == {'event': 'batch', 'total': 3, 'video_ids': ['slow', 'fails', 'fast']}
+    assert [(line['index'], line['status']) for line in lines[1:-1]] == [(2, 'ok'), (1, 'error'), (0, 'ok')]
+    assert lines[1]['result'] == {'video_id': 'fast'}
+    assert lines[2]['error'] == 'No subtitles found for this video.'
+    assert {key: lines[-1][key] for key in ('event', 'succeeded', 'failed')} == \
+        {'event': 'done', 'succeeded': 2, 'failed': 1}
+
+    # Each video ran on a batch worker inside the request's trace
+    for trace, thread_name in seen:
+        assert trace is not None and trace.trace_id == response.headers['X-Trace-Id']
+        assert thread_name != threading.current_thread().name
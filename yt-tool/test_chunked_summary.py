@@ -0,0 +1,73 @@
+"""
+Tests for chunked_summary: chunking, failure handling and the summary cache key.
+
+Run with: python -m pytest test_chunked_summary.py
+"""
+
+import threading
+import time
+
+from chunked_summary import map_reduce_summarize, split_into_chunks
+from summary_cache import make_summary_key
+
+LONG_TEXT = ' '.join(f'word{i}' for i in range(1000))
+
+
+def reduce_fn(partials, is_final):
+    return f'reduced({partials.count("Part ")})', None
+
+
+def test_chunks_overlap_and_cover_the_text():
+    chunks = split_into_chunks(LONG_TEXT, chunk_tokens=130, overlap_tokens=13)
+    assert chunks[0].split()[-10:] == chunks[1].split()[:10]
+    assert chunks[-1].split()[-1] == 'word999'
+
+
+def test_empty_transcript_is_an_error():
+    calls = []
+
+    def record(*args):
+        calls.append(args)
+        return 'summary', None
+
+    for text in ('', '   \n\t'):
+        summary, error = map_reduce_summarize(text, record, record)
+        assert summary is None and error == 'Transcript is empty'
+    assert calls == []
+
+
+def test_map_reduce_keeps_order():
+    summary, error = map_reduce_summarize(
+        LONG_TEXT, lambda chunk, i, total: (f'part {i}', None), reduce_fn, chunk_tokens=130, overlap_tokens=0)
+    assert error is None
+    assert summary == 'reduced(10)'
+
+
+def test_failed_chunk_returns_without_waiting_and_cancels_the_rest():
+    started = []
+    release = threading.Event()
+
+    def map_fn(chunk, index, total):
+        started.append(index)
+        if index == 0:
+            return None, 'quota exceeded'
+        release.wait(5)
+        return f'part {index}', None
+
+    start_time = time.monotonic()
+    summary, error = map_reduce_summarize(LONG_TEXT, map_fn, reduce_fn, chunk_tokens=130, overlap_tokens=0,
+                                          max_workers=2)
+    elapsed = time.monotonic() - start_time
+    release.set()
+
+    assert error == 'Chunk 1/10 failed: quota exceeded'
+    assert elapsed < 1  # did not wait for the running chunk
+    time.sleep(0.1)
+    assert len(started) <= 3  # queued chunks never ran
+
+
+def test_summary_key_includes_chunk_settings():
+    base = ('transcript', 'models/gemini', 'medium', 0.7, False)
+    assert make_summary_key(*base, (30000, 200, 'single')) != make_summary_key(*base, (8000, 200, 'single'))
+    assert make_summary_key(*base, (30000, 200, 'single')) != make_summary_key(*base, (30000, 200, 'tree'))
+    assert make_summary_key(*base, (30000, 200, 'single')) == make_summary_key(*base, (30000, 200, 'single'))
@@ -0,0 +1,89 @@
+"""
+Tests for comment_fetcher: paging, prefetching and discovery client reuse.
+
+Run with: python -m pytest test_comment_fetcher.py
+"""
+
+import threading
+import types
+
+import pytest
+
+import comment_fetcher
+from comment_fetcher import CommentFetcher
+
+
+def comment_items(count):
+    return [{
+        'id': f'c{i}',
+        'snippet': {'topLevelComment': {'snippet': {
+            'textDisplay': f'comment {i}', 'authorDisplayName': 'someone',
+            'likeCount': 0, 'publishedAt': f'2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z'
+        }}}
+    } for i in range(count)]
+
+
+class FakeYouTube:
+    """commentThreads().list(...).execute() over a fixed list of items"""
+
+    def __init__(self, items):
+        self.items = items
+
+    def commentThreads(self):
+        return self
+
+    def list(self, maxResults=20, pageToken=None, **kwargs):
+        start = int(pageToken or 0)
+        end = min(start + maxResults, len(self.items))
+        response = {'items': self.items[start:end]}
+        if end < len(self.items):
+            response['nextPageToken'] = str(end)
+        return types.SimpleNamespace(execute=lambda: response)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count discovery.build() calls, per thread"""
+    calls = []
+    items = comment_items(250)
+
+    def build(*args, **kwargs):
+        calls.append(threading.current_thread().name)
+        return FakeYouTube(items)
+
+    discovery = types.SimpleNamespace(build=build)
+    monkeypatch.setattr(comment_fetcher, 'load', lambda name: discovery)
+    return calls
+
+
+def test_prefetching_reuses_clients_across_fetches(builds):
+    fetcher = CommentFetcher('key', cache_ttl=0, prefetch_workers=2)
+    for _ in range(10):
+        comments, error = fetcher.fetch('video', max_comments=250)
+        assert error is None
+        assert [c['id'] for c in comments] == [f'c{i}' for i in range(250)]
+
+    # At most one client per prefetch thread, however many fetches ran
+    assert 1 <= len(builds) <= 2
+    assert len(set(builds)) == len(builds)
+    assert all(name.startswith('comment-prefetch') for name in builds)
+
+
+def test_unprefetched_paging_reuses_the_callers_client(builds):
+    fetcher = CommentFetcher('key', cache_ttl=0)
+    for _ in range(5):
+        pages = list(fetcher.iter_pages('video', max_comments=150, use_cache=False, prefetch=False))
+        assert [len(page) for page in pages] == [100, 50]
+    assert builds == [threading.current_thread().name]
+
+
+def test_stopping_early_frees_the_prefetch_thread(builds):
+    fetcher = CommentFetcher('key', cache_ttl=0, prefetch_pages=1, prefetch_workers=1)
+    for _ in range(3):
+        pages = fetcher.iter_pages('video', max_comments=250)
+        next(pages)
+        pages.close()
+    # With one worker, a producer stuck on an abandoned consumer would block this fetch
+    comments, error = fetcher.fetch('video', max_comments=250)
+    assert error is None and len(comments) == 250
+    assert len(builds) == 1
@@ -0,0 +1,140 @@
+"""
+Tests for the per-video comment store and the incremental refresh in app.py.
+
+Run with: python -m pytest test_comment_store.py
+"""
+
+import sqlite3
+
+import pytest
+
+import app
+from comment_store import SCHEMA_VERSION, CommentSentimentStore
+
+
+def make_comment(i):
+    """Comment number i; higher numbers are newer"""
+    return {
+        'id': f'c{i}', 'text': f'comment {i}', 'author': 'someone', 'likes': 0,
+        'published': f'2024-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z'
+    }
+
+
+class FakeFetcher:
+    """iter_pages over a growing newest-first comment list; counts what the API returned"""
+
+    def __init__(self, count):
+        self.count = count
+        self.fetched = 0
+
+    def post(self, count):
+        self.count += count
+
+    def iter_pages(self, video_id, max_comments=100, order=None, use_cache=True, prefetch=True):
+        assert order == 'time' and not use_cache
+        comments = [make_comment(i) for i in range(self.count - 1, -1, -1)][:max_comments]
+        for start in range(0, len(comments), 10):
+            page = comments[start:start + 10]
+            self.fetched += len(page)
+            yield page
+
+
+@pytest.fixture
+def refresh(tmp_path, monkeypatch):
+    """refresh_comment_analysis against a fake fetcher and a fresh store; records scored IDs"""
+    fetcher = FakeFetcher(30)
+    scored = []
+
+    def score_comments(comments, accumulator=None):
+        scored.extend(comment['id'] for comment in comments)
+        return [dict(comment, sentiment='positive', polarity=0.5) for comment in comments]
+
+    monkeypatch.setattr(app, 'comment_fetcher', fetcher)
+    monkeypatch.setattr(app, 'comment_store', CommentSentimentStore(str(tmp_path / 'store.sqlite3'), 0))
+    monkeypatch.setattr(app, 'score_comments', score_comments)
+
+    def run(max_comments=10):
+        scored.clear()
+        return app.refresh_comment_analysis('video', max_comments)
+
+    run.fetcher = fetcher
+    run.scored = scored
+    return run
+
+
+def stored_ids():
+    return {row[0] for row in app.comment_store._db().execute('SELECT comment_id FROM comments')}
+
+
+def test_first_fill_keeps_newest_comments(refresh):
+    analysis = refresh()
+    assert analysis['order'] == 'time'
+    assert analysis['new_comments'] == 10
+    assert [c['id'] for c in analysis['comments']] == [f'c{i}' for i in range(29, 19, -1)]
+    assert app.comment_store.sync_state('video')['watermark'] == make_comment(29)['published']
+
+
+def test_refresh_only_scores_new_comments(refresh):
+    refresh()
+    refresh.fetcher.post(3)
+    analysis = refresh()
+    assert analysis['new_comments'] == 3
+    assert sorted(refresh.scored) == sorted(['c30', 'c31', 'c32', 'c29'])  # c29 sits on the watermark
+    assert app.comment_store.sync_state('video')['watermark'] == make_comment(32)['published']
+
+
+def test_refresh_over_budget_backfills_the_gap(refresh):
+    refresh()
+    refresh.fetcher.post(25)  # c30..c54, more than one refresh's budget
+
+    analysis = refresh()
+    assert analysis['new_comments'] == 10
+    state = app.comment_store.sync_state('video')
+    assert state['watermark'] == make_comment(29)['published']
+    assert state['backfill_from'] == make_comment(45)['published']
+
+    analysis = refresh()
+    assert analysis['new_comments'] == 10
+    assert not set(refresh.scored) & {f'c{i}' for i in range(46, 55)}  # stored ones are not re-scored
+
+    analysis = refresh()
+    assert analysis['new_comments'] == 5
+    state = app.comment_store.sync_state('video')
+    assert state['backfill_from'] is None
+    assert state['watermark'] == make_comment(54)['published']
+    assert stored_ids() == {f'c{i}' for i in range(20, 55)}
+
+    # statistics follow the requested budget; stored_statistics cover every stored comment
+    assert analysis['statistics']['total'] == 10
+    assert analysis['stored_statistics']['total'] == 35
+
+
+def test_new_comments_during_backfill(refresh):
+    refresh()
+    refresh.fetcher.post(25)
+    refresh()
+    refresh.fetcher.post(4)  # c55..c58 arrive before the gap is filled
+    for _ in range(4):
+        refresh()
+    assert stored_ids() == {f'c{i}' for i in range(20, 59)}
+    assert app.comment_store.sync_state('video')['backfill_from'] is None
+
+
+def test_stats_reopen_from_disk(tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    store = CommentSentimentStore(path)
+    store.add('video', [dict(make_comment(i), sentiment='negative', polarity=-0.5) for i in range(3)])
+    store.mark_refreshed('video')
+
+    reopened = CommentSentimentStore(path)
+    assert reopened.analysis('video')['stored_statistics']['negative'] == 3
+    assert sqlite3.connect(path).execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+
+
+def test_newer_schema_is_refused(tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION + 1}')
+    conn.commit()
+    with pytest.raises(RuntimeError):
+        CommentSentimentStore(path).stats()
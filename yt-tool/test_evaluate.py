@@ -0,0 +1,85 @@
+"""
+Tests for /evaluate: concurrent models, the shared deadline and ROUGE scoring.
+
+Run with: python -m pytest test_evaluate.py
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+
+MODELS = ['models/fast', 'models/slow', 'models/queued']
+
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    """POST /evaluate against fake Gemini calls that honor their request timeout"""
+    calls = []
+    latency = {'models/fast': 0.0, 'models/slow': 5.0, 'models/queued': 0.0}
+    executor = ThreadPoolExecutor(max_workers=2)
+
+    def generate_with_gemini(prompt, temperature=0.7, model_name=None, timeout=None):
+        calls.append((model_name, timeout))
+        if timeout is not None and latency[model_name] > timeout:
+            time.sleep(timeout)
+            return None, 'Error generating summary: 504 Deadline Exceeded'
+        time.sleep(latency[model_name])
+        return 'the speaker explains attention and transformers', None
+
+    monkeypatch.setattr(app, 'generate_with_gemini', generate_with_gemini)
+    monkeypatch.setattr(app, 'get_transcript', lambda video_id: ('the speaker explains attention ' * 50, None))
+    monkeypatch.setattr(app, 'EVALUATION_MODELS', MODELS)
+    monkeypatch.setattr(app, 'evaluation_executor', executor)
+    client = app.app.test_client()
+
+    def post(**body):
+        body.setdefault('url', 'https://www.youtube.com/watch?v=abc123')
+        return client.post('/evaluate', json=body)
+
+    post.calls = calls
+    post.latency = latency
+    post.executor = executor
+    yield post
+    executor.shutdown(wait=True)
+
+
+def test_models_are_scored_in_order(evaluate):
+    evaluate.latency['models/slow'] = 0.0
+    response = evaluate(model_timeout=5)
+    results = response.get_json()['results']
+    assert [r['model'] for r in results] == MODELS
+    assert all(r['metrics']['rouge1']['fmeasure'] > 0 for r in results)
+
+
+def test_slow_model_times_out_and_frees_its_worker(evaluate):
+    start_time = time.monotonic()
+    response = evaluate(model_timeout=0.3)
+    elapsed = time.monotonic() - start_time
+    results = {r['model']: r for r in response.get_json()['results']}
+
+    assert elapsed < 2
+    assert results['models/slow']['error'].startswith('Timed out after 0.3 seconds')
+    assert 'summary' in results['models/fast']
+    # The slow call was given the remaining deadline, not a fresh timeout
+    slow_timeout = next(timeout for model, timeout in evaluate.calls if model == 'models/slow')
+    assert 0 < slow_timeout <= 0.3
+
+    # The worker is free again: nothing from the request is still running
+    ran = threading.Event()
+    evaluate.executor.submit(ran.set)
+    evaluate.executor.submit(ran.set)
+    assert ran.wait(0.5)
+
+
+def test_model_queued_past_the_deadline_is_not_called(evaluate, monkeypatch):
+    monkeypatch.setattr(app, 'evaluation_executor', ThreadPoolExecutor(max_workers=1))
+    evaluate.latency['models/fast'] = 5.0
+    response = evaluate(model_timeout=0.2)
+    results = {r['model']: r for r in response.get_json()['results']}
+
+    assert all(r['error'].startswith('Timed out after 0.2 seconds') for r in results.values())
+    assert 'models/queued' not in [model for model, _ in evaluate.calls]
@@ -0,0 +1,134 @@
+"""
+Tests for the incremental sentiment metrics, the dataset reservoir sample and
+sharded full-dataset evaluation.
+
+Run with: python -m pytest test_evaluate_sentiment.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comments_dataset import LABEL_COLUMN, TEXT_COLUMN, convert_to_columnar, reservoir_sample
+from evaluate_sentiment import ConfusionAccumulator, stream_evaluate
+from sentiment_engine import LABELS
+
+sklearn_metrics = pytest.importorskip('sklearn.metrics')
+
+
+def random_labels(size, labels, seed):
+    return list(np.random.default_rng(seed).choice(labels, size=size))
+
+
+def assert_matches_sklearn(y_true, y_pred, chunks=3):
+    accumulator = ConfusionAccumulator()
+    for part in np.array_split(np.arange(len(y_true)), chunks):
+        accumulator.merge(ConfusionAccumulator().update(
+            [y_true[i] for i in part], [y_pred[i] for i in part]
+        ))
+    metrics = accumulator.metrics()
+
+    assert metrics['accuracy'] == pytest.approx(sklearn_metrics.accuracy_score(y_true, y_pred))
+    per_class = sklearn_metrics.precision_recall_fscore_support(y_true, y_pred, labels=LABELS, zero_division=0)
+    for name, expected in zip(('precision', 'recall', 'f1', 'support'), per_class):
+        np.testing.assert_allclose(metrics[name], expected)
+    for average in ('macro', 'weighted'):
+        expected = sklearn_metrics.precision_recall_fscore_support(y_true, y_pred, average=average, zero_division=0)
+        for name, value in zip(('precision', 'recall', 'f1'), expected):
+            assert metrics[f'{name}_{average}'] == pytest.approx(value), f'{name}_{average}'
+    np.testing.assert_array_equal(
+        metrics['confusion_matrix'], sklearn_metrics.confusion_matrix(y_true, y_pred, labels=LABELS)
+    )
+
+
+def test_metrics_match_sklearn():
+    assert_matches_sklearn(random_labels(500, LABELS, 1), random_labels(500, LABELS, 2))
+
+
+def test_macro_average_skips_a_class_missing_from_the_sample():
+    # Neutral never occurs: sklearn averages over the two labels present
+    y_true = random_labels(300, ['Positive', 'Negative'], 3)
+    y_pred = random_labels(300, ['Positive', 'Negative'], 4)
+    assert_matches_sklearn(y_true, y_pred)
+
+
+def test_macro_average_counts_a_class_that_is_only_predicted():
+    y_true = random_labels(300, ['Positive', 'Negative'], 5)
+    y_pred = random_labels(300, LABELS, 6)
+    assert_matches_sklearn(y_true, y_pred)
+
+
+def dataset_chunks(rows, chunksize):
+    frame = pd.DataFrame({
+        TEXT_COLUMN: [f'comment {i}' for i in range(rows)],
+        LABEL_COLUMN: [LABELS[i % len(LABELS)] for i in range(rows)]
+    })
+    return [frame.iloc[start:start + chunksize] for start in range(0, rows, chunksize)]
+
+
+def test_reservoir_sample_counts():
+    sample, seen = reservoir_sample(dataset_chunks(25, 7), sample_size=10)
+    assert seen == 25
+    assert len(sample) == 10
+    assert sample[TEXT_COLUMN].is_unique
+    # Text and label stay paired
+    for text, label in zip(sample[TEXT_COLUMN], sample[LABEL_COLUMN]):
+        assert label == LABELS[int(text.split()[1]) % len(LABELS)]
+
+    small, seen = reservoir_sample(dataset_chunks(6, 4), sample_size=10)
+    assert seen == 6
+    assert list(small[TEXT_COLUMN]) == [f'comment {i}' for i in range(6)]
+
+
+def test_reservoir_sample_is_reproducible():
+    first, _ = reservoir_sample(dataset_chunks(100, 30), sample_size=10, seed=7)
+    second, _ = reservoir_sample(dataset_chunks(100, 30), sample_size=10, seed=7)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_reservoir_sample_is_uniform():
+    rows, sample_size, runs = 40, 8, 2000
+    hits = np.zeros(rows)
+    for seed in range(runs):
+        sample, _ = reservoir_sample(dataset_chunks(rows, 9), sample_size=sample_size, seed=seed)
+        hits[[int(text.split()[1]) for text in sample[TEXT_COLUMN]]] += 1
+
+    # Each row should be kept with probability sample_size / rows = 0.2
+    # (binomial standard deviation about 0.009 over 2000 runs)
+    np.testing.assert_allclose(hits / runs, sample_size / rows, atol=0.04)
+
+
+@pytest.fixture
+def labeled_csv(tmp_path):
+    words = ['great', 'awful', 'video', 'boring', 'love', 'hate', 'fine', 'ok', 'best', 'worst', 'é', '👍']
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'CommentID': range(500),
+        TEXT_COLUMN: [' '.join(rng.choice(words, size=rng.integers(0, 6))) for _ in range(500)],
+        LABEL_COLUMN: random_labels(500, LABELS, 9)
+    })
+    path = tmp_path / 'comments.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def evaluate(csv_path, results_path, workers):
+    accumulator = stream_evaluate(csv_path, chunksize=37, results_path=results_path, workers=workers)
+    return accumulator, pd.read_csv(results_path, keep_default_na=False)
+
+
+@pytest.mark.parametrize('columnar', [False, True], ids=['csv', 'columnar'])
+def test_stream_evaluate_is_the_same_for_any_worker_count(labeled_csv, tmp_path, columnar):
+    if columnar:
+        convert_to_columnar(labeled_csv, chunksize=100)
+
+    single, single_rows = evaluate(labeled_csv, str(tmp_path / 'one.csv'), workers=1)
+    for workers in (2, 3):
+        sharded, sharded_rows = evaluate(labeled_csv, str(tmp_path / f'{workers}.csv'), workers=workers)
+        np.testing.assert_array_equal(sharded.matrix, single.matrix)
+        assert (sharded.total, sharded.correct) == (single.total, single.correct)
+        assert sharded.metrics()['f1_macro'] == single.metrics()['f1_macro']
+        pd.testing.assert_frame_equal(sharded_rows, single_rows)
+
+    # Blank comments are dropped, everything else is scored once
+    assert single.total == len(single_rows) < 500
@@ -0,0 +1,138 @@
+"""
+Tests for jobs: deduplication by key, failed jobs, stats() and purging
+finished jobs after their TTL.
+
+Run with: python -m pytest test_jobs.py
+"""
+
+import threading
+import time
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+
+
+class Clock:
+    """Stands in for the time module inside jobs"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobs, 'time', clock)
+    return clock
+
+
+def wait_until_done(job, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert job.done
+
+
+def test_same_key_joins_the_job_in_flight():
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(2)
+        return {'value': value}, None
+
+    queue = JobQueue(max_workers=2)
+    first, created = queue.submit('video:abc', work, 1)
+    assert created
+    second, created = queue.submit('video:abc', work, 2)
+    assert not created and second is first
+    other, created = queue.submit('video:def', work, 3)
+    assert created and other is not first
+
+    release.set()
+    wait_until_done(first)
+    wait_until_done(other)
+    assert sorted(calls) == [1, 3]
+    assert first.to_dict()['result'] == {'value': 1}
+
+    # Once finished, the key starts a new job
+    again, created = queue.submit('video:abc', work, 4)
+    assert created and again is not first
+    wait_until_done(again)
+
+
+@pytest.mark.parametrize('fn', [
+    lambda: (None, 'Transcript not available'),
+    lambda: 1 / 0,
+], ids=['error', 'exception'])
+def test_failing_job(fn):
+    queue = JobQueue(max_workers=1)
+    job, _ = queue.submit('video:abc', fn)
+    wait_until_done(job)
+
+    data = queue.get(job.id).to_dict()
+    assert data['status'] == jobs.FAILED
+    assert data['error'] and 'result' not in data
+    assert queue.stats() == {'queued': 0, 'running': 0, 'succeeded': 0, 'failed': 1}
+
+    # A failed job does not block a retry with the same key
+    retry, created = queue.submit('video:abc', lambda: ('ok', None))
+    assert created
+    wait_until_done(retry)
+    assert queue.stats() == {'queued': 0, 'running': 0, 'succeeded': 1, 'failed': 1}
+
+
+def test_stats_counts_queued_and_running_jobs():
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(2)
+        return 'ok', None
+
+    queue = JobQueue(max_workers=1)
+    running, _ = queue.submit('a', work)
+    queued, _ = queue.submit('b', work)
+    assert started.wait(2)
+    assert queue.stats() == {'queued': 1, 'running': 1, 'succeeded': 0, 'failed': 0}
+
+    release.set()
+    wait_until_done(running)
+    wait_until_done(queued)
+    assert queue.stats() == {'queued': 0, 'running': 0, 'succeeded': 2, 'failed': 0}
+
+
+def test_finished_jobs_are_purged_after_the_ttl(clock):
+    queue = JobQueue(max_workers=1, result_ttl=60)
+    succeeded, _ = queue.submit('a', lambda: ('ok', None))
+    failed, _ = queue.submit('b', lambda: (None, 'boom'))
+    wait_until_done(succeeded)
+    wait_until_done(failed)
+
+    clock.now += 60
+    assert queue.get(succeeded.id) is succeeded
+    assert queue.stats() == {'queued': 0, 'running': 0, 'succeeded': 1, 'failed': 1}
+
+    clock.now += 1
+    assert queue.stats() == {'queued': 0, 'running': 0, 'succeeded': 0, 'failed': 0}
+    assert queue.get(succeeded.id) is None
+    assert queue.get(failed.id) is None
+
+
+def test_unfinished_jobs_are_never_purged(clock):
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, result_ttl=60)
+    job, _ = queue.submit('a', lambda: (release.wait(2), None))
+
+    clock.now += 3600
+    assert queue.get(job.id) is job
+    release.set()
+    wait_until_done(job)
+    assert queue.get(job.id) is job
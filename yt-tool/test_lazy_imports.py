@@ -0,0 +1,65 @@
+"""
+Tests for lazy_imports: first-use loading, on-load hooks and concurrent imports.
+
+Run with: python -m pytest test_lazy_imports.py
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import lazy_imports
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Threads start loading different NLTK-dependent modules at the same moment,
+# in a fresh interpreter so nothing is imported yet
+CONCURRENT_NLTK_IMPORTS = textwrap.dedent('''
+    import threading
+    import lazy_imports
+
+    NAMES = ('textblob.en', 'nltk.stem.porter', 'nltk.corpus')
+    barrier = threading.Barrier(len(NAMES))
+    errors = []
+
+    def run(name):
+        barrier.wait()
+        try:
+            lazy_imports.load(name)
+        except Exception as e:
+            errors.append(f'{name}: {type(e).__name__}: {e}')
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in NAMES]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    lazy_imports.load('nltk.stem.porter').PorterStemmer().stem('running')
+    lazy_imports.load('textblob.en').sentiment('great video')
+    lazy_imports.load('nltk.corpus').stopwords
+''')
+
+
+@pytest.mark.parametrize('attempt', range(3))
+def test_concurrent_nltk_imports(attempt):
+    pytest.importorskip('textblob')
+    result = subprocess.run([sys.executable, '-c', CONCURRENT_NLTK_IMPORTS], cwd=HERE,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+def test_load_times_first_import_and_runs_hooks():
+    seen = []
+    lazy_imports.on_load('colorsys', seen.append)
+    module = lazy_imports.load('colorsys')
+
+    assert seen == [module]
+    assert lazy_imports.load('colorsys') is module
+    assert 'colorsys' in lazy_imports.import_timings()
+
+    lazy_imports.on_load('colorsys', seen.append)  # already loaded: runs at once
+    assert seen == [module, module]
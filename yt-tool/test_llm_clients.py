@@ -0,0 +1,65 @@
+"""
+Tests for llm_clients: shared models, call stats and warm-up reporting.
+
+Run with: python -m pytest test_llm_clients.py
+"""
+
+import types
+
+import pytest
+
+import llm_clients
+from llm_clients import GeminiClientRegistry
+
+
+class FakeModel:
+    def __init__(self, model_name, safety_settings=None):
+        self.model_name = model_name
+
+    def count_tokens(self, contents):
+        if 'missing' in self.model_name:
+            raise ValueError('404 model not found')
+        return types.SimpleNamespace(total_tokens=2)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    created = []
+
+    def generative_model(**kwargs):
+        created.append(kwargs['model_name'])
+        return FakeModel(**kwargs)
+
+    monkeypatch.setattr(llm_clients, 'load', lambda name: types.SimpleNamespace(GenerativeModel=generative_model))
+    registry = GeminiClientRegistry()
+    registry.created = created
+    return registry
+
+
+def test_models_are_created_once(registry):
+    assert registry.get('models/a') is registry.get('models/a')
+    assert registry.created == ['models/a']
+
+
+def test_warm_up_is_reported_apart_from_calls(registry, capsys):
+    registry.warm_up(['models/a', 'models/missing']).join()
+
+    stats = registry.stats()
+    assert stats['models/a']['warm_up']['ok'] is True
+    assert stats['models/missing']['warm_up'] == dict(stats['models/missing']['warm_up'], ok=False,
+                                                      error='404 model not found')
+    for model_stats in stats.values():
+        assert (model_stats['calls'], model_stats['errors'], model_stats['status']) == (0, 0, 'unknown')
+    assert 'Warm-up of models/missing failed' in capsys.readouterr().out
+
+
+def test_track_records_calls_and_errors(registry):
+    with registry.track('models/a'):
+        pass
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            with registry.track('models/a'):
+                raise RuntimeError('boom')
+
+    stats = registry.stats()['models/a']
+    assert (stats['calls'], stats['errors'], stats['status'], stats['last_error']) == (4, 3, 'unhealthy', 'boom')
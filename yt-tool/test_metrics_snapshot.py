@@ -0,0 +1,102 @@
+"""
+Tests for metrics_snapshot: sample size snapping, disk reuse, the in-memory bound
+and dataset detection.
+
+Run with: python -m pytest test_metrics_snapshot.py
+"""
+
+import threading
+
+import pytest
+
+from metrics_snapshot import MetricsSnapshotStore, dataset_available
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / 'comments.csv'
+    path.write_text('CommentText,Sentiment\ngreat,Positive\n', encoding='utf-8')
+    return str(path)
+
+
+def counting_build(calls):
+    def build(csv_path, sample_size):
+        calls.append(sample_size)
+        return {'dataset_info': {'evaluated_comments': sample_size}}
+    return build
+
+
+def test_sample_sizes_are_snapped_to_the_allowed_set(dataset, tmp_path):
+    calls = []
+    store = MetricsSnapshotStore(dataset, str(tmp_path / 'snapshots'), build_fn=counting_build(calls),
+                                 sample_sizes=(100, 1000, 5000))
+    assert store.snap(1) == 100
+    assert store.snap(550) == 1000  # tie goes to the larger size
+    assert store.snap(1234) == 1000
+    assert store.snap(10 ** 6) == 5000
+
+    for sample_size in range(900, 1200):
+        assert store.get(sample_size)['dataset_info']['evaluated_comments'] == 1000
+    assert calls == [1000]
+
+
+def test_memory_is_bounded_and_evicted_snapshots_come_from_disk(dataset, tmp_path):
+    calls = []
+    store = MetricsSnapshotStore(dataset, str(tmp_path / 'snapshots'), build_fn=counting_build(calls),
+                                 sample_sizes=(10, 20, 30, 40), max_snapshots=2)
+    for sample_size in (10, 20, 30, 40, 10):
+        store.get(sample_size)
+
+    assert len(store._snapshots) == 2
+    assert len(store._locks) == 4
+    # 10 was evicted from memory but read back from its snapshot file
+    assert calls == [10, 20, 30, 40]
+
+
+def test_concurrent_requests_share_one_build(dataset, tmp_path):
+    calls = []
+    build = counting_build(calls)
+    started = threading.Event()
+
+    def slow_build(csv_path, sample_size):
+        started.wait(1)
+        return build(csv_path, sample_size)
+
+    store = MetricsSnapshotStore(dataset, str(tmp_path / 'snapshots'), build_fn=slow_build,
+                                 sample_sizes=(1000,))
+    threads = [threading.Thread(target=store.get, args=(size,)) for size in (990, 1000, 1010, 2000)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1000]
+
+
+def test_dataset_available_rejects_missing_files_and_lfs_pointers(dataset, tmp_path):
+    pointer = tmp_path / 'pointer.csv'
+    pointer.write_text('version https://git-lfs.github.com/spec/v1\noid sha256:0\nsize 1\n', encoding='utf-8')
+    assert dataset_available(dataset)
+    assert not dataset_available(str(pointer))
+    assert not dataset_available(str(tmp_path / 'missing.csv'))
+
+
+def test_endpoint_reports_the_sample_size_served(dataset, tmp_path, monkeypatch):
+    app = pytest.importorskip('app')
+    calls = []
+    store = MetricsSnapshotStore(dataset, str(tmp_path / 'snapshots'), build_fn=counting_build(calls),
+                                 sample_sizes=(100, 1000))
+    monkeypatch.setattr(app, 'metrics_snapshots', store)
+    monkeypatch.setattr(app, 'dataset_available', lambda path: True)
+    client = app.app.test_client()
+
+    body = client.get('/sentiment-metrics?sample_size=300').get_json()
+    assert body['requested_sample_size'] == 300
+    assert body['sample_size'] == 100
+    assert body['dataset_info']['evaluated_comments'] == 100
+
+    body = client.get('/sentiment-metrics').get_json()
+    assert (body['requested_sample_size'], body['sample_size']) == (1000, 1000)
+    # The cached snapshot itself is not changed by the response fields
+    assert 'requested_sample_size' not in store.get(300)
+    assert client.get('/sentiment-metrics?sample_size=0').status_code == 400
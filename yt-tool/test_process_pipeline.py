@@ -0,0 +1,71 @@
+"""
+Tests for process_pipeline: a failed transcript or summary stops the comment
+stage that runs alongside it.
+
+Run with: python -m pytest test_process_pipeline.py
+"""
+
+import threading
+import time
+
+import pytest
+
+import app
+
+
+def comment(i):
+    return {'id': f'c{i}', 'text': 'great video', 'author': 'someone', 'likes': 0,
+            'published': f'2024-01-01T00:00:{59 - i:02d}Z'}
+
+
+@pytest.fixture
+def comment_pages(monkeypatch):
+    """A slow 20-page comment source that records how many pages were requested"""
+    state = {'requested': 0, 'first_page': threading.Event(), 'closed': threading.Event()}
+
+    def iter_pages(video_id, max_comments=100, **kwargs):
+        try:
+            for i in range(20):
+                state['requested'] += 1
+                time.sleep(0.05)
+                yield [comment(i)]
+                state['first_page'].set()
+        finally:
+            state['closed'].set()
+
+    monkeypatch.setattr(app, 'YOUTUBE_API_KEY', 'test-key')
+    monkeypatch.setattr(app.comment_fetcher, 'iter_pages', iter_pages)
+    return state
+
+
+@pytest.mark.parametrize('store', [False, True], ids=['fetcher', 'store'])
+def test_failed_transcript_stops_the_running_comment_stage(comment_pages, monkeypatch, tmp_path, store):
+    monkeypatch.setattr(app, 'COMMENT_STORE_ENABLED', store)
+    monkeypatch.setattr(app, 'comment_store', app.CommentSentimentStore(str(tmp_path / 'store.sqlite3'), 0))
+
+    def get_transcript(video_id):
+        # Fail while the comment stage is in the middle of paging
+        assert comment_pages['first_page'].wait(2)
+        return None, 'Transcript not available'
+
+    monkeypatch.setattr(app, 'get_transcript', get_transcript)
+    result, error, status = app.process_pipeline('abc', analyze_comments=True)
+    assert (result, error, status) == (None, 'Transcript not available', 400)
+
+    # The stage stops at the next page instead of paging through all 20
+    assert comment_pages['closed'].wait(2)
+    assert comment_pages['requested'] < 5
+    if store:
+        # A cancelled refresh doesn't move the watermark past comments it never saw
+        assert app.comment_store.sync_state('abc')['watermark'] is None
+
+
+def test_successful_request_joins_the_comment_stage(comment_pages, monkeypatch):
+    monkeypatch.setattr(app, 'COMMENT_STORE_ENABLED', False)
+    monkeypatch.setattr(app, 'get_transcript', lambda video_id: ('a short transcript', None))
+    monkeypatch.setattr(app, 'summarize_with_gemini', lambda *args, **kwargs: ('a summary', None))
+
+    result, error, status = app.process_pipeline('abc', analyze_comments=True, max_comments=20)
+    assert error is None and status == 200
+    assert len(result['comment_analysis']['comments']) == 20
+    assert set(result['timings']) == {'transcript', 'summary', 'comments', 'total'}
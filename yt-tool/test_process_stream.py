@@ -0,0 +1,55 @@
+"""
+Tests for /process/stream: event order and trace propagation to the stage threads.
+
+Run with: python -m pytest test_process_stream.py
+"""
+
+import json
+import threading
+
+import app
+import telemetry
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_stage_threads_join_the_request_trace(monkeypatch):
+    seen = {}
+
+    def get_transcript(video_id):
+        seen['transcript'] = (telemetry.current_trace(), threading.current_thread().name)
+        return 'a short transcript', None
+
+    def stream_summary(*args, **kwargs):
+        yield 'first '
+        yield 'second'
+
+    def build_comment_analysis(video_id, max_comments=None):
+        seen['comments'] = (telemetry.current_trace(), threading.current_thread().name)
+        return {'comments': [], 'statistics': {}}
+
+    monkeypatch.setattr(app, 'get_transcript', get_transcript)
+    monkeypatch.setattr(app, 'stream_summary_with_gemini', stream_summary)
+    monkeypatch.setattr(app, 'build_comment_analysis', build_comment_analysis)
+
+    response = app.app.test_client().post('/process/stream', json={
+        'url': 'https://www.youtube.com/watch?v=abc123', 'analyze_comments': True
+    })
+    events = parse_events(response.get_data(as_text=True))
+
+    names = [name for name, _ in events]
+    assert names[0] == 'video' and names[-1] == 'done'
+    assert [data['text'] for name, data in events if name == 'summary_chunk'] == ['first ', 'second']
+    assert ('summary', {'summary': 'first second'}) in events
+
+    trace_id = response.headers['X-Trace-Id']
+    for stage in ('transcript', 'comments'):
+        trace, thread_name = seen[stage]
+        assert trace is not None and trace.trace_id == trace_id
+        assert thread_name != threading.current_thread().name
@@ -0,0 +1,151 @@
+"""
+Tests for rate_limit: adaptive concurrency, retries, streamed calls, error
+counters and limit validation.
+
+Run with: python -m pytest test_rate_limit.py
+"""
+
+import time
+
+import pytest
+
+from rate_limit import LLMRateController, RateLimitError, TokenBucket, parse_rate_limits
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f'{code} error')
+        self.code = code
+
+
+def controller():
+    return LLMRateController(default_rpm=0, initial_concurrency=2, backoff_base=0.001)
+
+
+def failing(code):
+    def fn(remaining):
+        raise APIError(code)
+    return fn
+
+
+def in_flight(limiter, model='m'):
+    return limiter.stats()[model]['in_flight']
+
+
+def test_stream_holds_its_slot_until_exhausted():
+    limiter = controller()
+    seen = []
+    for chunk in limiter.stream('m', lambda remaining: iter(['a', 'b', 'c'])):
+        seen.append((chunk, in_flight(limiter)))
+    assert seen == [('a', 1), ('b', 1), ('c', 1)]
+    assert in_flight(limiter) == 0
+
+
+def test_closed_stream_gives_its_slot_back():
+    limiter = controller()
+    chunks = limiter.stream('m', lambda remaining: iter(['a', 'b', 'c']))
+    assert next(chunks) == 'a'
+    assert in_flight(limiter) == 1
+    chunks.close()
+    assert in_flight(limiter) == 0
+
+
+def test_stream_duration_is_not_a_latency_sample():
+    limiter = controller()
+    limiter.call('m', lambda remaining: 'done')
+    _, concurrency, _ = limiter._state('m')
+    average = concurrency.latency_avg
+
+    def slow_stream(remaining):
+        concurrency.latency_avg = average  # a stream taking far longer than the average
+        yield 'a'
+        time.sleep(0.05)
+        yield 'b'
+
+    assert list(limiter.stream('m', slow_stream)) == ['a', 'b']
+    assert concurrency.latency_avg == average
+    assert concurrency.decreases == 0
+
+
+def test_stream_retries_before_the_first_chunk_only():
+    limiter = controller()
+    attempts = []
+
+    def flaky(remaining):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise APIError(503)
+        return iter(['ok'])
+
+    assert list(limiter.stream('m', flaky)) == ['ok']
+    assert len(attempts) == 3
+    assert limiter.stats()['m']['retries'] == 2
+
+    def breaks_midway(remaining):
+        attempts.append(1)
+        yield 'a'
+        raise APIError(503)
+
+    attempts.clear()
+    chunks = limiter.stream('m', breaks_midway)
+    assert next(chunks) == 'a'
+    with pytest.raises(APIError):
+        next(chunks)
+    assert len(attempts) == 1
+    assert in_flight(limiter) == 0
+
+
+def test_rate_limited_call_is_retried_and_halves_the_limit():
+    limiter = controller()
+    calls = []
+
+    def limited(remaining):
+        calls.append(1)
+        if len(calls) == 1:
+            raise APIError(429)
+        return 'ok'
+
+    assert limiter.call('m', limited) == 'ok'
+    stats = limiter.stats()['m']
+    assert (stats['rate_limited'], stats['retries']) == (1, 1)
+    assert limiter._state('m')[1].decreases == 1
+
+
+def test_give_ups_and_other_errors_are_counted_apart():
+    limiter = controller()
+    with pytest.raises(APIError):
+        limiter.call('m', failing(400))
+    stats = limiter.stats()['m']
+    assert (stats['errors'], stats['gave_up'], stats['retries']) == (1, 0, 0)
+
+    with pytest.raises(RateLimitError):
+        limiter.call('m', failing(429))
+    stats = limiter.stats()['m']
+    assert (stats['errors'], stats['gave_up'], stats['retries']) == (1, 1, 4)
+
+    # A server error that stays failing is an error, not a rate-limit give-up
+    with pytest.raises(APIError):
+        limiter.call('m', failing(503))
+    stats = limiter.stats()['m']
+    assert (stats['errors'], stats['gave_up'], stats['retries']) == (2, 1, 8)
+
+
+@pytest.mark.parametrize('rate, burst', [(5, 0.5), (0, 1), (-1, None)])
+def test_token_bucket_rejects_limits_it_could_never_serve(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+
+
+def test_token_bucket_rejects_more_tokens_than_it_holds():
+    bucket = TokenBucket(1, 2)
+    with pytest.raises(ValueError):
+        bucket.acquire(3)
+    assert bucket.acquire(2, timeout=0)
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits(' www.youtube.com=2:5, api=10 ,,') == {'www.youtube.com': (2.0, 5.0), 'api': (10.0, None)}
+    assert parse_rate_limits('api=0') == {'api': (0.0, None)}  # 0 = unlimited
+    for spec in ('host=5:0.5', 'host=-1'):
+        with pytest.raises(ValueError, match='host'):
+            parse_rate_limits(spec)
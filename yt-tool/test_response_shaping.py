@@ -0,0 +1,201 @@
+"""
+Tests for response_shaping: field selection, negotiated gzip/br compression,
+the responses that must stay uncompressed and transcript=ref links.
+
+Run with: python -m pytest test_response_shaping.py
+"""
+
+import gzip
+import json
+
+import pytest
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+import response_shaping
+from transcript_cache import TranscriptCache
+from response_shaping import compress_response, parse_fields, select_fields
+
+PAYLOAD = {
+    'video_id': 'abc',
+    'transcript': 'words ' * 10,
+    'results': [
+        {'model': 'models/a', 'summary': 'one', 'metrics': {'rouge1': 0.5, 'rouge2': 0.2}},
+        {'model': 'models/b', 'summary': 'two', 'metrics': {'rouge1': 0.4, 'rouge2': 0.1}, 'error': None},
+    ]
+}
+
+BODY = json.dumps({'transcript': 'the speaker explains attention ' * 200})
+
+
+def accept(value):
+    return parse_accept_header(value)
+
+
+def json_response(body=BODY, status=200):
+    response = Response(body, status=status, mimetype='application/json')
+    response.set_etag('v1')
+    return response
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields('') is None
+    assert parse_fields(' , ') is None
+    assert parse_fields('video_id, results.model,,') == ['video_id', 'results.model']
+    assert parse_fields(['video_id', ' results ']) == ['video_id', 'results']
+
+
+def test_select_fields():
+    assert select_fields(PAYLOAD, None) is PAYLOAD
+    assert select_fields(PAYLOAD, ['video_id', 'results.model', 'results.metrics.rouge1', 'missing.path']) == {
+        'video_id': 'abc',
+        'results': [
+            {'model': 'models/a', 'metrics': {'rouge1': 0.5}},
+            {'model': 'models/b', 'metrics': {'rouge1': 0.4}},
+        ]
+    }
+    # A whole ancestor wins over its children, in either order
+    for fields in (['results', 'results.model'], ['results.model', 'results']):
+        assert select_fields(PAYLOAD, fields) == {'results': PAYLOAD['results']}
+    # Selecting below a scalar keeps the scalar
+    assert select_fields(PAYLOAD, ['video_id.length']) == {'video_id': 'abc'}
+
+
+def test_gzip_when_accepted(monkeypatch):
+    monkeypatch.setattr(response_shaping, 'brotli', None)
+    response = compress_response(json_response(), accept('br;q=1.0, gzip;q=0.8'))
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == BODY.encode('utf-8')
+    assert int(response.headers['Content-Length']) == len(response.get_data()) < len(BODY)
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag() == ('v1', True)
+
+
+def test_brotli_preferred_when_installed():
+    brotli = pytest.importorskip('brotli')
+    response = compress_response(json_response(), accept('gzip, br'))
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()) == BODY.encode('utf-8')
+
+    response = compress_response(json_response(), accept('gzip'))
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('accept_encoding', ['', 'identity', 'gzip;q=0', 'deflate'])
+def test_no_compression_unless_accepted(accept_encoding):
+    response = compress_response(json_response(), accept(accept_encoding))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == BODY
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_streamed_responses_are_not_compressed():
+    response = Response((chunk for chunk in ['data: 1\n\n', 'data: 2\n\n']), mimetype='text/plain')
+    response = compress_response(response, accept('gzip'), min_size=0)
+    assert 'Content-Encoding' not in response.headers
+    assert response.is_streamed
+    assert b''.join(response.iter_encoded()) == b'data: 1\n\ndata: 2\n\n'
+
+
+def test_partial_content_is_not_compressed():
+    body = BODY.encode('utf-8')
+    response = Response(body[:2048], status=206, mimetype='application/json')
+    response.headers['Content-Range'] = f'bytes 0-2047/{len(body)}'
+    compress_response(response, accept('gzip'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == body[:2048]
+
+    # A Content-Range on any status refers to the uncompressed bytes as well
+    response = json_response()
+    response.headers['Content-Range'] = f'bytes */{len(body)}'
+    compress_response(response, accept('gzip'))
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('make_response', [
+    lambda: json_response('{"ok": true}'),  # under min_size
+    lambda: json_response(status=304),
+    lambda: json_response(status=204),
+    lambda: Response(b'\x89PNG' + b'\0' * 4096, mimetype='image/png'),
+], ids=['small', 'not-modified', 'no-content', 'binary'])
+def test_other_responses_left_alone(make_response):
+    response = make_response()
+    original = response.get_data()
+    compress_response(response, accept('gzip'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == original
+
+
+def test_already_encoded_body_is_not_compressed_twice():
+    response = json_response(gzip.compress(BODY.encode('utf-8')))
+    response.headers['Content-Encoding'] = 'gzip'
+    compressed = response.get_data()
+    compress_response(response, accept('gzip'))
+    assert response.get_data() == compressed
+
+
+def test_app_compresses_cached_transcripts(monkeypatch):
+    app = pytest.importorskip('app')
+    transcript = 'the speaker explains attention ' * 200
+    monkeypatch.setattr(app, 'RESPONSE_COMPRESSION', True)
+    monkeypatch.setattr(app.transcript_cache, 'get', lambda video_id, language: transcript)
+    client = app.app.test_client()
+
+    response = client.get('/transcripts/abc', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data()))['transcript'] == transcript
+
+    # Revalidating with the (now weak) ETag still gives 304
+    revalidated = client.get('/transcripts/abc', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']
+    })
+    assert revalidated.status_code == 304
+    assert 'Content-Encoding' not in revalidated.headers
+
+    plain = client.get('/transcripts/abc?format=text')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data(as_text=True) == transcript
+
+
+@pytest.fixture
+def shaping_app(tmp_path, monkeypatch):
+    app = pytest.importorskip('app')
+    monkeypatch.setattr(app, 'transcript_cache', TranscriptCache(str(tmp_path / 'transcripts')))
+    return app
+
+
+RESULT = {'video_id': 'abc', 'summary': 'short', 'transcript': 'the speaker explains attention'}
+
+
+def test_transcript_ref_links_a_stored_transcript(shaping_app):
+    shaping_app.transcript_cache.set('abc', 'en', RESULT['transcript'])
+    shaped = shaping_app.shape_process_result(RESULT, transcript_mode='ref')
+    assert 'transcript' not in shaped
+    assert shaped['transcript_ref'] == {'url': '/transcripts/abc', 'characters': 30, 'words': 4}
+
+    response = shaping_app.app.test_client().get(shaped['transcript_ref']['url'])
+    assert response.status_code == 200
+    assert response.get_json()['transcript'] == RESULT['transcript']
+
+
+def test_transcript_ref_falls_back_inline_when_not_stored(shaping_app):
+    # Never stored (e.g. the write failed)
+    shaped = shaping_app.shape_process_result(RESULT, transcript_mode='ref')
+    assert shaped['transcript'] == RESULT['transcript'] and 'transcript_ref' not in shaped
+
+    # Stored, then evicted before the response was shaped
+    shaping_app.transcript_cache.set('abc', 'en', RESULT['transcript'])
+    shaping_app.transcript_cache.clear()
+    shaped = shaping_app.shape_process_result(RESULT, transcript_mode='ref')
+    assert shaped['transcript'] == RESULT['transcript'] and 'transcript_ref' not in shaped
+
+    # Checking does not count as a cache hit
+    assert shaping_app.transcript_cache.stats()['hits'] == 0
+
+
+def test_transcript_omit(shaping_app):
+    shaped = shaping_app.shape_process_result(RESULT, fields=['video_id', 'transcript'], transcript_mode='omit')
+    assert shaped == {'video_id': 'abc'}
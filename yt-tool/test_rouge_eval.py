@@ -0,0 +1,96 @@
+"""
+Parity tests: rouge_eval must give exactly the scores of rouge_score.RougeScorer.
+
+Run with: python -m pytest test_rouge_eval.py
+"""
+
+import random
+
+import pytest
+
+from rouge_eval import RougeEvaluator, lcs_length, lcs_masks, tokenize
+
+rouge_scorer = pytest.importorskip('rouge_score.rouge_scorer')
+
+ROUGE_TYPES = ['rouge1', 'rouge2', 'rougeL']
+
+REFERENCE = (
+    "In this video we're looking at how transformers process long documents. "
+    "The speaker explains attention, positional encodings and why running "
+    "summaries of chunks works better than truncating the input. Running, runs, "
+    "ran: stemming should fold these together. Prices rose 3.5% in 2024!"
+)
+
+CANDIDATES = [
+    "The video explains how transformers process long documents using attention.",
+    "Summaries of chunks work better than truncation, the speaker argues.",
+    "Completely unrelated text about cooking pasta with garlic and olive oil.",
+    "",
+    "attention attention attention",
+    "Prices rose 3.5% in 2024",
+    "Ünïcödé — punctuation!!! and    whitespace\n\ttabs",
+    REFERENCE,
+]
+
+VOCABULARY = ('the a attention running runs summary summaries chunk chunks model models '
+              'long document documents is was generalization caresses ponies 42 x').split()
+
+
+def assert_same_scores(expected, actual):
+    assert set(actual) == set(expected)
+    for rouge_type, score in expected.items():
+        assert actual[rouge_type].precision == pytest.approx(score.precision, abs=1e-12)
+        assert actual[rouge_type].recall == pytest.approx(score.recall, abs=1e-12)
+        assert actual[rouge_type].fmeasure == pytest.approx(score.fmeasure, abs=1e-12)
+
+
+@pytest.mark.parametrize('use_stemmer', [True, False])
+@pytest.mark.parametrize('candidate', CANDIDATES)
+def test_scores_match_rouge_score(candidate, use_stemmer):
+    expected = rouge_scorer.RougeScorer(ROUGE_TYPES, use_stemmer=use_stemmer).score(REFERENCE, candidate)
+    actual = RougeEvaluator(ROUGE_TYPES, use_stemmer=use_stemmer).score(REFERENCE, candidate)
+    assert_same_scores(expected, actual)
+
+
+@pytest.mark.parametrize('use_stemmer', [True, False])
+def test_tokenize_matches_rouge_score(use_stemmer):
+    stemmer = rouge_scorer.tokenizers.DefaultTokenizer(use_stemmer)
+    for text in CANDIDATES + [REFERENCE]:
+        assert tokenize(text, use_stemmer) == stemmer.tokenize(text)
+
+
+def test_random_texts_match_rouge_score():
+    rng = random.Random(7)
+    scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rouge3', 'rougeL'], use_stemmer=True)
+    evaluator = RougeEvaluator(['rouge1', 'rouge2', 'rouge3', 'rougeL'])
+    for _ in range(200):
+        reference = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 80)))
+        candidate = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 40)))
+        assert_same_scores(scorer.score(reference, candidate), evaluator.score(reference, candidate))
+
+
+def test_batch_matches_single_scores():
+    scorer = rouge_scorer.RougeScorer(ROUGE_TYPES, use_stemmer=True)
+    results = RougeEvaluator().score_many(REFERENCE, CANDIDATES)
+    assert len(results) == len(CANDIDATES)
+    for candidate, actual in zip(CANDIDATES, results):
+        assert_same_scores(scorer.score(REFERENCE, candidate), actual)
+
+
+def test_reference_is_prepared_once():
+    evaluator = RougeEvaluator()
+    assert evaluator.reference(REFERENCE) is evaluator.reference(REFERENCE)
+
+
+def test_bit_parallel_lcs_matches_dp_table():
+    rng = random.Random(11)
+    for _ in range(300):
+        a = [rng.choice('abcde') for _ in range(rng.randint(0, 70))]
+        b = [rng.choice('abcde') for _ in range(rng.randint(0, 70))]
+        expected = rouge_scorer._lcs_table(a, b)[-1][-1] if a and b else 0
+        assert lcs_length(lcs_masks(a), len(a), b) == expected
+
+
+def test_unsupported_rouge_type():
+    with pytest.raises(ValueError):
+        RougeEvaluator(['rougeLsum'])
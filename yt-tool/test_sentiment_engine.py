@@ -0,0 +1,71 @@
+"""
+Tests for sentiment_engine: batch scoring gives the same labels and polarities
+as scoring each comment with TextBlob.
+
+Run with: python -m pytest test_sentiment_engine.py
+"""
+
+import numpy as np
+import pytest
+
+import sentiment_engine
+from sentiment_engine import classify_polarities, classify_texts, score_polarities
+
+textblob = pytest.importorskip('textblob')
+
+COMMENTS = [
+    'This is the best video I have ever seen!',
+    'Terrible audio, I could not hear anything.',
+    'Uploaded on a Tuesday.',
+    'not bad at all',
+    'Not good. Not good at all!!!',
+    'meh',
+    'I love it but the ending was awful',
+    'GREAT explanation :)',
+    '',
+    '   ',
+    'Très bien 👍',
+    'This is the best video I have ever seen!',  # duplicates are scored once
+    'pretty ok I guess',
+    'very very very happy',
+    'the worst, the absolute worst',
+]
+
+
+def old_label(text):
+    """The per-comment TextBlob path this module replaced"""
+    polarity = textblob.TextBlob(text).sentiment.polarity
+    if polarity > 0.1:
+        return 'Positive'
+    elif polarity < -0.1:
+        return 'Negative'
+    else:
+        return 'Neutral'
+
+
+def test_labels_match_per_comment_textblob():
+    assert classify_texts(COMMENTS).tolist() == [old_label(text) for text in COMMENTS]
+    assert classify_texts(COMMENTS, lowercase=True).tolist() == [old_label(text).lower() for text in COMMENTS]
+
+
+def test_polarities_match_per_comment_textblob():
+    sentiment_engine._polarity_cache.clear()
+    expected = [textblob.TextBlob(text).sentiment.polarity for text in COMMENTS]
+    np.testing.assert_array_equal(score_polarities(COMMENTS), expected)
+    # Second pass comes from the polarity cache
+    np.testing.assert_array_equal(score_polarities(COMMENTS), expected)
+
+
+def test_thresholds_are_exclusive():
+    polarities = [0.1, 0.1000001, -0.1, -0.1000001, 0.0, 1.0, -1.0]
+    assert classify_polarities(polarities).tolist() == [
+        'Neutral', 'Positive', 'Neutral', 'Negative', 'Neutral', 'Positive', 'Negative'
+    ]
+
+
+def test_series_and_missing_values():
+    pd = pytest.importorskip('pandas')
+    texts = pd.Series(['great stuff', float('nan'), 'awful'], index=[10, 11, 12], name='CommentText')
+    labels = classify_texts(texts)
+    assert list(labels.index) == [10, 11, 12]
+    assert labels.tolist() == [old_label('great stuff'), 'Neutral', old_label('awful')]
@@ -0,0 +1,148 @@
+"""
+Tests for subtitle_fetcher: the streaming JSON3 parser against json.loads,
+for every way the download can be split into chunks, fixture mode and
+YoutubeDL reuse across threads.
+
+Run with: python -m pytest test_subtitle_fetcher.py
+"""
+
+import json
+import threading
+import time
+import types
+
+import pytest
+
+import subtitle_fetcher
+from subtitle_fetcher import SubtitleFetcher, iter_json3_segments
+
+DOCUMENT = {
+    'wireMagic': 'pb3',
+    'pens': [{}],
+    'events': [
+        {'tStartMs': 0, 'dDurationMs': 1200, 'id': 1, 'wpWinPosId': 1},  # window event, no segs
+        {'tStartMs': 100, 'dDurationMs': 900, 'segs': [{'utf8': 'Hello'}, {'utf8': ' world', 'tOffsetMs': 400}]},
+        {'tStartMs': 1000, 'segs': [{'utf8': 'naïve café — ünïcödé ✓ 👍'}]},
+        {'tStartMs': 2000, 'segs': [{'utf8': 'quotes " and \\ backslashes, ] brackets } and [ {'}]},
+        {'tStartMs': 2500, 'aAppend': 1, 'segs': [{'utf8': '\n'}]},
+        {'tStartMs': 3000, 'segs': [{'acAsrConf': 0}, {'utf8': '日本語の字幕'}]},
+        {'tStartMs': 4000, 'segs': [{'utf8': '"events": [ not a key'}]},
+    ]
+}
+
+
+def expected_segments(document):
+    """What the original parser produced: json.loads and walk every event"""
+    return [seg['utf8'] for event in document['events'] for seg in event.get('segs', ()) if 'utf8' in seg]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('ensure_ascii', [False, True], ids=['utf8', 'escaped'])
+def test_every_chunk_size_gives_the_same_segments(ensure_ascii):
+    data = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii).encode('utf-8')
+    expected = expected_segments(json.loads(data))
+    for size in range(1, len(data) + 1):
+        assert list(iter_json3_segments(split(data, size))) == expected, f'chunk size {size}'
+
+
+def test_split_inside_a_multibyte_character_and_the_events_key():
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=2).encode('utf-8')
+    expected = expected_segments(DOCUMENT)
+
+    emoji = data.index('👍'.encode('utf-8'))
+    key = data.index(b'"events"')
+    bracket = data.index(b'[', key)
+    for cut in (emoji + 1, emoji + 2, emoji + 3, key + 1, key + 4, key + 7, bracket, bracket + 1):
+        assert list(iter_json3_segments([data[:cut], data[cut:]])) == expected, f'cut at {cut}'
+
+    # And one byte at a time across the whole document
+    assert list(iter_json3_segments(data[i:i + 1] for i in range(len(data)))) == expected
+
+
+def test_documents_without_events():
+    assert list(iter_json3_segments([b'{"wireMagic": "pb3", "events": []}'])) == []
+    assert list(iter_json3_segments([b'{"wireMagic": "pb3"}'])) == []
+    assert list(iter_json3_segments([])) == []
+
+
+def test_fixture_mode_downloads_and_joins_segments(tmp_path):
+    (tmp_path / 'abc.en.json3').write_bytes(json.dumps(DOCUMENT).encode('utf-8'))
+    (tmp_path / 'abc.info.json').write_text(json.dumps({
+        'id': 'abc',
+        'subtitles': {'en': [{'ext': 'vtt', 'url': 'abc.en.vtt'}, {'ext': 'json3', 'url': 'abc.en.json3'}]},
+        'automatic_captions': {}
+    }), encoding='utf-8')
+
+    fetcher = SubtitleFetcher(fixture_dir=str(tmp_path))
+    try:
+        text, error = fetcher.fetch('abc')
+        assert error is None
+        assert text == ' '.join(expected_segments(DOCUMENT))
+
+        fetcher.fetch('abc')
+        assert fetcher.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'ydl_instances': 0}
+    finally:
+        fetcher.fixture_server.close()
+
+
+@pytest.fixture
+def youtube_dl(monkeypatch):
+    """A fake yt_dlp whose YoutubeDL records which instance served each call"""
+    instances = []
+    calls = []
+
+    class YoutubeDL:
+        def __init__(self, opts):
+            instances.append(self)
+            self.busy = False
+
+        def extract_info(self, url, download=False):
+            assert not self.busy, 'one YoutubeDL used by two calls at once'
+            self.busy = True
+            calls.append(self)
+            release.wait(1)
+            self.busy = False
+            return {'subtitles': {'en': [{'ext': 'json3', 'url': 'x'}]}}
+
+    release = threading.Event()
+    monkeypatch.setattr(subtitle_fetcher, 'load', lambda name: types.SimpleNamespace(YoutubeDL=YoutubeDL))
+    return types.SimpleNamespace(instances=instances, calls=calls, release=release)
+
+
+def run_in_thread(fn, *args):
+    thread = threading.Thread(target=fn, args=args)
+    thread.start()
+    thread.join()
+
+
+def test_youtube_dl_is_reused_by_calls_from_different_threads(youtube_dl):
+    youtube_dl.release.set()
+    fetcher = SubtitleFetcher()
+    for video_id in ('a', 'b', 'c'):
+        run_in_thread(fetcher.tracks, video_id, 'en', False)
+
+    assert len(youtube_dl.calls) == 3
+    assert len(youtube_dl.instances) == 1
+    assert fetcher.stats()['ydl_instances'] == 1
+
+
+def test_concurrent_calls_get_their_own_youtube_dl(youtube_dl):
+    fetcher = SubtitleFetcher()
+    threads = [threading.Thread(target=fetcher.tracks, args=(video_id, 'en', False)) for video_id in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while len(youtube_dl.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(youtube_dl.calls) == 2
+    youtube_dl.release.set()
+    for thread in threads:
+        thread.join()
+    assert len(youtube_dl.instances) == 2
+
+    # Both are back in the pool and reused from then on
+    run_in_thread(fetcher.tracks, 'c', 'en', False)
+    assert len(youtube_dl.instances) == 2
@@ -0,0 +1,129 @@
+"""
+Tests for summary_cache: what the key depends on, persistence across
+instances, memory LRU eviction and TTL expiry.
+
+Run with: python -m pytest test_summary_cache.py
+"""
+
+import pytest
+
+import summary_cache
+from summary_cache import SummaryCache, make_summary_key
+
+TRANSCRIPT = 'the speaker explains attention ' * 20
+BASE = dict(transcript=TRANSCRIPT, model_name='models/gemini-2.5-flash', length='medium',
+            temperature=0.0, apply_preprocessing=True)
+
+
+class Clock:
+    """Stands in for the time module inside summary_cache"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(summary_cache, 'time', clock)
+    return clock
+
+
+def key(**changes):
+    return make_summary_key(**{**BASE, **changes})
+
+
+@pytest.mark.parametrize('changes', [
+    {'temperature': 0.7},
+    {'length': 'short'},
+    {'length': 'long'},
+    {'apply_preprocessing': False},
+    {'model_name': 'models/gemini-2.5-pro'},
+    {'transcript': TRANSCRIPT + 'and more'},
+], ids=lambda changes: next(iter(changes)))
+def test_key_changes_with_every_setting(changes):
+    assert key(**changes) != key()
+
+
+def test_key_ignores_equivalent_values():
+    assert key(temperature=0) == key(temperature=0.0) == key(temperature='0.0001')
+    assert key(apply_preprocessing=1) == key()
+    assert key() == key()
+
+
+def test_hit_and_miss(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'))
+    assert cache.get(key()) is None
+    cache.set(key(), 'a summary')
+    assert cache.get(key()) == 'a summary'
+    assert cache.get(key(length='short')) is None
+    assert cache.stats() == {'memory_entries': 1, 'disk_entries': 1, 'hits': 1, 'misses': 2}
+
+
+def test_hit_after_reopening(tmp_path):
+    db_path = str(tmp_path / 'summaries.sqlite3')
+    SummaryCache(db_path).set(key(), 'a summary')
+
+    reopened = SummaryCache(db_path)
+    assert reopened.stats()['memory_entries'] == 0
+    assert reopened.get(key()) == 'a summary'
+    # The disk hit is promoted to the memory tier
+    assert reopened.stats() == {'memory_entries': 1, 'disk_entries': 1, 'hits': 1, 'misses': 0}
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = SummaryCache(None, memory_entries=2)
+    cache.set('a', 'summary a')
+    cache.set('b', 'summary b')
+    assert cache.get('a') == 'summary a'  # b is now the least recently used
+    cache.set('c', 'summary c')
+
+    assert [cache.get(k) for k in ('a', 'b', 'c')] == ['summary a', None, 'summary c']
+    assert cache.stats()['memory_entries'] == 2
+
+
+def test_memory_evictions_are_still_served_from_disk(tmp_path):
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'), memory_entries=1)
+    cache.set('a', 'summary a')
+    cache.set('b', 'summary b')
+    assert cache.stats()['memory_entries'] == 1
+    assert cache.get('a') == 'summary a'
+
+
+def test_disk_tier_keeps_the_most_recently_used_rows(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'), memory_entries=1, disk_entries=2)
+    for k in ('a', 'b'):
+        cache.set(k, f'summary {k}')
+        clock.now += 1
+    cache.get('a')  # read from disk, so b is now the least recently used row
+    clock.now += 1
+    cache.set('c', 'summary c')
+
+    reopened = SummaryCache(cache.db_path)
+    assert [reopened.get(k) for k in ('a', 'b', 'c')] == ['summary a', None, 'summary c']
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path / 'summaries.sqlite3'), ttl_seconds=60)
+    cache.set('a', 'summary a')
+    clock.now += 60
+    assert cache.get('a') == 'summary a'
+    clock.now += 1
+    assert cache.get('a') is None
+    assert cache.stats()['disk_entries'] == 0
+
+
+def test_disabled_and_non_deterministic_requests():
+    assert not SummaryCache(None, memory_entries=0).should_cache(0)
+    assert SummaryCache(None).should_cache(0.7)
+
+    deterministic = SummaryCache(None, deterministic_only=True)
+    assert deterministic.should_cache(0)
+    assert not deterministic.should_cache(0.7)
+
+    disabled = SummaryCache(None, memory_entries=0)
+    disabled.set('a', 'summary a')
+    assert disabled.get('a') is None
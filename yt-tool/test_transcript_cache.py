@@ -0,0 +1,180 @@
+"""
+Tests for transcript_cache: TTL expiry, LRU eviction order, the size cap and
+writes that are skipped or fail.
+
+Run with: python -m pytest test_transcript_cache.py
+"""
+
+import os
+
+import pytest
+
+import transcript_cache
+from transcript_cache import TranscriptCache
+
+TEXT = 'the speaker explains attention ' * 10
+
+
+class Clock:
+    """Stands in for the time module inside transcript_cache"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(transcript_cache, 'time', clock)
+    return clock
+
+
+def entry_size(tmp_path, video_id='size'):
+    """Bytes one TEXT entry takes on disk"""
+    probe = TranscriptCache(str(tmp_path / 'probe'))
+    probe.set(video_id, 'en', TEXT)
+    return probe.stats()['bytes']
+
+
+def test_hit_and_miss(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path))
+    assert cache.get('abc') is None
+    cache.set('abc', 'en', TEXT, source='captions')
+    assert cache.get('abc') == TEXT
+    assert cache.get('abc', 'de') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 2)
+    assert stats['bytes'] == os.path.getsize(cache._key_path('abc', 'en'))
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path), ttl_seconds=60)
+    cache.set('abc', 'en', TEXT)
+
+    clock.advance(60)
+    assert cache.get('abc') == TEXT
+
+    clock.advance(1)
+    assert not cache.contains('abc')
+    assert cache.get('abc') is None
+    assert cache.stats()['entries'] == 0
+    assert not any(files for _, _, files in os.walk(tmp_path))
+
+
+def test_expired_entries_are_purged_on_the_next_write(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path), ttl_seconds=60)
+    cache.set('old', 'en', TEXT)
+    clock.advance(61)
+    cache.set('new', 'en', TEXT)
+    assert cache.stats()['entries'] == 1
+    assert cache.get('new') == TEXT
+
+
+def test_least_recently_used_entry_is_evicted_first(tmp_path, clock):
+    size = entry_size(tmp_path)
+    cache = TranscriptCache(str(tmp_path / 'cache'), max_bytes=3 * size)
+    for video_id in ('aaaa', 'bbbb', 'cccc'):
+        cache.set(video_id, 'en', TEXT)
+        clock.advance(1)
+
+    # Reading aaaa makes bbbb the least recently used
+    assert cache.get('aaaa') == TEXT
+    clock.advance(1)
+    cache.set('dddd', 'en', TEXT)
+
+    assert [cache.contains(video_id) for video_id in ('aaaa', 'bbbb', 'cccc', 'dddd')] == [True, False, True, True]
+    # contains() does not refresh the LRU position, get() does
+    cache.get('aaaa')
+    clock.advance(1)
+    cache.set('eeee', 'en', TEXT)
+    assert [cache.contains(video_id) for video_id in ('aaaa', 'cccc', 'dddd', 'eeee')] == [True, False, True, True]
+
+
+def test_size_cap(tmp_path, clock):
+    size = entry_size(tmp_path)
+    cache = TranscriptCache(str(tmp_path / 'cache'), max_bytes=int(2.5 * size))
+    for i in range(5):
+        cache.set(f'vid{i}', 'en', TEXT)
+        clock.advance(1)
+        assert cache.stats()['bytes'] <= 2.5 * size
+
+    assert cache.stats()['entries'] == 2
+    assert [cache.contains(f'vid{i}') for i in range(5)] == [False, False, False, True, True]
+
+    # A single entry larger than the cap is still kept
+    cache = TranscriptCache(str(tmp_path / 'tiny'), max_bytes=1)
+    cache.set('abc', 'en', TEXT)
+    assert cache.get('abc') == TEXT
+
+
+def test_lru_order_survives_a_restart(tmp_path, clock):
+    size = entry_size(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+    cache = TranscriptCache(cache_dir, max_bytes=2 * size)
+    cache.set('aaaa', 'en', TEXT)
+    clock.advance(1)
+    cache.set('bbbb', 'en', TEXT)
+    clock.advance(1)
+    cache.get('aaaa')
+    clock.advance(1)
+
+    # A new instance orders the files on disk by their last access
+    cache = TranscriptCache(cache_dir, max_bytes=2 * size)
+    cache.set('cccc', 'en', TEXT)
+    assert [cache.contains(video_id) for video_id in ('aaaa', 'bbbb', 'cccc')] == [True, False, True]
+
+
+def test_empty_transcripts_and_disabled_caches_are_not_stored(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path / 'cache'))
+    cache.set('abc', 'en', '')
+    cache.set('abc', 'en', None)
+    assert cache.stats()['entries'] == 0
+    assert not os.path.exists(tmp_path / 'cache')
+
+    for disabled in (TranscriptCache(str(tmp_path / 'off'), ttl_seconds=0),
+                     TranscriptCache(str(tmp_path / 'off'), max_bytes=0)):
+        disabled.set('abc', 'en', TEXT)
+        assert disabled.get('abc') is None
+        assert not os.path.exists(tmp_path / 'off')
+
+
+def test_failed_writes_are_skipped(tmp_path, clock, monkeypatch):
+    cache = TranscriptCache(str(tmp_path / 'cache'))
+    cache.set('abc', 'en', TEXT)
+
+    def replace(src, dst):
+        raise OSError('disk full')
+
+    with monkeypatch.context() as patched:
+        patched.setattr(transcript_cache.os, 'replace', replace)
+        cache.set('def', 'en', TEXT)
+
+    assert cache.stats()['entries'] == 1
+    assert not cache.contains('def')
+    assert cache.get('abc') == TEXT
+    # The temporary file is cleaned up
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+
+
+def test_unwritable_cache_directory_is_skipped(tmp_path, clock):
+    blocker = tmp_path / 'cache'
+    blocker.write_text('not a directory')
+    cache = TranscriptCache(str(blocker))
+    cache.set('abc', 'en', TEXT)
+    assert cache.get('abc') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_corrupt_entries_are_dropped(tmp_path, clock):
+    cache = TranscriptCache(str(tmp_path))
+    cache.set('abc', 'en', TEXT)
+    with open(cache._key_path('abc', 'en'), 'w', encoding='utf-8') as f:
+        f.write('{"text": ')
+    assert cache.get('abc') is None
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,118 @@
+"""
+NLP Preprocessing Engine
+Lowercasing, punctuation removal, tokenization and stop-word removal,
+built once and reused for every request.
+
+The stop-word set and punctuation translation table are created a single
+time, and tokenization uses a precompiled regex instead of NLTK's
+word_tokenize. Once punctuation is stripped, word_tokenize only splits on
+whitespace, on curly quotes and on a handful of Treebank contractions
+("cannot" -> "can not", "gonna" -> "gon na", ...); the regex tokenizer
+reproduces those rules, so the output matches the original pipeline.
+"""
+
+import re
+import string
+import threading
+
+from lazy_imports import load
+
+# Treebank contraction splits that survive punctuation removal
+CONTRACTION_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# Curly quotes are not in string.punctuation, so word_tokenize splits them off as tokens
+_QUOTES = '“”‘’«»'
+_TOKEN_RE = re.compile(f'[{_QUOTES}]|[^\\s{_QUOTES}]+')
+_QUOTE_RE = re.compile(f'[{_QUOTES}]')
+_CONTRACTIONS = frozenset(CONTRACTION_SPLITS)
+
+
+class TextPreprocessor:
+    """Reusable preprocessing pipeline (tokenization, stop-word removal, normalization)"""
+
+    def __init__(self, language='english'):
+        self.language = language
+        self.translation_table = str.maketrans('', '', string.punctuation)
+        self._stop_words = None
+        self._lock = threading.Lock()
+
+    @property
+    def stop_words(self):
+        """Frozen NLTK stop-word set, loaded on first use"""
+        if self._stop_words is None:
+            with self._lock:
+                if self._stop_words is None:
+                    stopwords = load('nltk.corpus').stopwords
+                    self._stop_words = frozenset(stopwords.words(self.language))
+        return self._stop_words
+
+    def tokens(self, text):
+        """
+        Normalize and tokenize text, dropping stop words.
+
+        Returns:
+            list: Remaining tokens in order
+        """
+        stop_words = self.stop_words
+        normalized = text.lower().translate(self.translation_table)
+        # Plain whitespace split is the common case; the regex is only needed for curly quotes
+        raw_tokens = _TOKEN_RE.findall(normalized) if _QUOTE_RE.search(normalized) else normalized.split()
+
+        if _CONTRACTIONS.isdisjoint(raw_tokens):
+            return [token for token in raw_tokens if token not in stop_words]
+
+        filtered = []
+        for token in raw_tokens:
+            for part in CONTRACTION_SPLITS.get(token, (token,)):
+                if part not in stop_words:
+                    filtered.append(part)
+        return filtered
+
+    def preprocess(self, text):
+        """
+        Preprocess one document.
+
+        Args:
+            text (str): Raw text
+
+        Returns:
+            str: Space-joined tokens after normalization and stop-word removal
+        """
+        return ' '.join(self.tokens(text))
+
+    def iter_preprocess(self, segments):
+        """
+        Stream preprocessing over transcript segments.
+
+        Args:
+            segments (iterable): Transcript segments (strings or
+                youtube-transcript-api entries with a 'text' key)
+
+        Yields:
+            str: Preprocessed text per segment (segments left empty are skipped)
+        """
+        for segment in segments:
+            text = segment['text'] if isinstance(segment, dict) else segment
+            processed = self.preprocess(text)
+            if processed:
+                yield processed
+
+    def preprocess_batch(self, documents):
+        """
+        Preprocess many documents at once.
+
+        Returns:
+            list: Preprocessed text per document, in input order
+        """
+        return [self.preprocess(document) for document in documents]
+
+
+# Shared default instance
+default_preprocessor = TextPreprocessor()
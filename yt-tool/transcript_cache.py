@@ -0,0 +1,185 @@
+"""
+Persistent Transcript Cache
+Stores fetched transcripts on local disk keyed by video ID and language,
+with TTL expiry, LRU eviction and a total size cap.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TranscriptCache:
+    """Disk-backed transcript cache with TTL + LRU eviction"""
+
+    def __init__(self, cache_dir, ttl_seconds=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory where cache entries are stored
+            ttl_seconds (int): Entries older than this are treated as missing (0 disables the cache)
+            max_bytes (int): Total size cap; least recently used entries are evicted beyond it
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None  # path -> (size, last_access), oldest first
+        self._total_bytes = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_bytes > 0
+
+    def _key_path(self, video_id, language):
+        digest = hashlib.sha256(f'{video_id}:{language}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f'{digest}.json')
+
+    def _load_index(self):
+        """Build the LRU index from the files already on disk (called once, under lock)"""
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith('.json'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, path, st.st_size))
+        entries.sort()
+        self._index = OrderedDict((path, (size, mtime)) for mtime, path, size in entries)
+        self._total_bytes = sum(size for size, _ in self._index.values())
+
+    def _drop(self, path):
+        size, _ = self._index.pop(path, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, video_id, language='en'):
+        """
+        Look up a cached transcript.
+
+        Returns:
+            str: Cached transcript text, or None on a miss / expired entry
+        """
+        if not self.enabled:
+            return None
+
+        path = self._key_path(video_id, language)
+        with self._lock:
+            entry = self._read(path)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Touch the entry so it moves to the most recently used end
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            size, _ = self._index.pop(path)
+            self._index[path] = (size, now)
+            self.hits += 1
+            return entry['text']
+
+    def contains(self, video_id, language='en'):
+        """True when a valid entry is stored (does not count as a hit or refresh its LRU position)"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            return self._read(self._key_path(video_id, language)) is not None
+
+    def _read(self, path):
+        """The stored entry at path, dropping it if unreadable or expired (called under lock)"""
+        self._load_index()
+        if path not in self._index:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._drop(path)
+            return None
+        if time.time() - entry.get('created', 0) > self.ttl_seconds:
+            self._drop(path)
+            return None
+        return entry
+
+    def set(self, video_id, language, text, source=None):
+        """Store a transcript and evict old entries if the size cap is exceeded"""
+        if not self.enabled or not text:
+            return
+
+        path = self._key_path(video_id, language)
+        now = time.time()
+        payload = json.dumps({
+            'video_id': video_id,
+            'language': language,
+            'source': source,
+            'created': now,
+            'text': text
+        }).encode('utf-8')
+
+        with self._lock:
+            self._load_index()
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    f.write(payload)
+                # The file's mtime is its LRU position when the index is rebuilt on restart
+                os.utime(tmp_path, (now, now))
+                os.replace(tmp_path, path)
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            if path in self._index:
+                self._total_bytes -= self._index.pop(path)[0]
+            self._index[path] = (len(payload), now)
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def _evict(self):
+        """Expire stale entries, then drop least recently used ones until under the cap"""
+        cutoff = time.time() - self.ttl_seconds
+        for path, (_, last_access) in list(self._index.items()):
+            if last_access < cutoff:
+                self._drop(path)
+
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+
+    def clear(self):
+        """Remove every cached transcript"""
+        with self._lock:
+            self._load_index()
+            for path in list(self._index):
+                self._drop(path)
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }